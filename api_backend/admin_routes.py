@@ -3,16 +3,20 @@ Admin routes for lead management
 Secure endpoints for viewing and exporting leads
 """
 import os
-import json
-from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import StreamingResponse
 import secrets
-import csv
-import io
+import pytz
+
+try:
+    from api_backend.services.lead_store import lead_store
+    from api_backend.services.lead_export import EXPORT_FORMATS, stream_leads
+except ImportError:
+    from services.lead_store import lead_store
+    from services.lead_export import EXPORT_FORMATS, stream_leads
 
 # Create router
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -20,6 +24,8 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 # Basic auth for security
 security = HTTPBasic()
 
+hawaii_tz = pytz.timezone('Pacific/Honolulu')
+
 def verify_credentials(credentials: HTTPBasicCredentials = Depends(security)):
     """Verify admin credentials"""
     # Get credentials from environment
@@ -51,46 +57,64 @@ def verify_credentials(credentials: HTTPBasicCredentials = Depends(security)):
     
     return credentials.username
 
+def _parse_date_param(value: Optional[str], name: str, end_of_day: bool = False) -> Optional[float]:
+    """ISO date or datetime query parameter as epoch seconds (Hawaii time when no offset is given)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: use YYYY-MM-DD or an ISO timestamp")
+    
+    if parsed.tzinfo is None:
+        parsed = hawaii_tz.localize(parsed)
+    # A bare end date includes that whole day
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed.timestamp()
+
 @router.get("/leads")
 async def get_leads(
     username: str = Depends(verify_credentials),
-    limit: int = Query(100, description="Maximum number of leads to return"),
-    quality: Optional[str] = Query(None, description="Filter by quality: hot, warm, cold")
+    limit: int = Query(100, ge=1, le=500, description="Maximum number of leads to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    quality: Optional[str] = Query(None, description="Filter by quality: hot, warm, cold"),
+    island: Optional[str] = Query(None, description="Filter by island / location"),
+    business_type: Optional[str] = Query(None, description="Filter by business type"),
+    min_score: Optional[int] = Query(None, ge=0, le=100, description="Minimum qualification score"),
+    max_score: Optional[int] = Query(None, ge=0, le=100, description="Maximum qualification score"),
+    since: Optional[str] = Query(None, description="Captured on or after (YYYY-MM-DD or ISO timestamp)"),
+    until: Optional[str] = Query(None, description="Captured on or before (YYYY-MM-DD or ISO timestamp)")
 ):
-    """Get all captured leads"""
-    leads_dir = Path("logs/leads")
-    
-    if not leads_dir.exists():
-        return {"leads": [], "total": 0, "message": "No leads directory found"}
-    
-    leads = []
-    lead_files = sorted(leads_dir.glob("lead_*.json"), reverse=True)
-    
-    for lead_file in lead_files[:limit]:
-        try:
-            with open(lead_file, 'r') as f:
-                lead = json.load(f)
-                
-                # Apply quality filter if specified
-                if quality:
-                    lead_quality = lead.get('lead_quality', '').lower()
-                    if quality.lower() not in lead_quality:
-                        continue
-                
-                leads.append(lead)
-        except Exception as e:
-            continue
-    
-    # Calculate summary stats
+    """Get captured leads one page at a time, newest first"""
+    try:
+        leads, next_cursor = lead_store.query_leads(
+            limit=limit,
+            cursor=cursor,
+            quality=quality,
+            location=island,
+            business_type=business_type,
+            min_score=min_score,
+            max_score=max_score,
+            since=_parse_date_param(since, "since"),
+            until=_parse_date_param(until, "until", end_of_day=True)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Summary counts cover every lead, not just this page
+    stats = lead_store.get_stats()
     summary = {
-        "total": len(leads),
-        "hot": sum(1 for l in leads if 'HOT' in l.get('lead_quality', '')),
-        "warm": sum(1 for l in leads if 'WARM' in l.get('lead_quality', '')),
-        "cold": sum(1 for l in leads if 'COLD' in l.get('lead_quality', '')),
+        "total": stats["total"],
+        "hot": stats["by_quality"]["hot"],
+        "warm": stats["by_quality"]["warm"],
+        "cold": stats["by_quality"]["cold"],
     }
     
     return {
         "leads": leads,
+        "count": len(leads),
+        "next_cursor": next_cursor,
         "summary": summary,
         "timestamp": datetime.now().isoformat()
     }
@@ -98,63 +122,49 @@ async def get_leads(
 @router.get("/leads/export")
 async def export_leads(
     username: str = Depends(verify_credentials),
-    format: str = Query("json", description="Export format: json or csv")
+    format: str = Query("json", description="Export format: json, ndjson or csv"),
+    gzip: bool = Query(False, description="Gzip-compress the export")
 ):
-    """Export all leads as JSON or CSV"""
-    leads_dir = Path("logs/leads")
+    """Stream every lead as JSON, NDJSON or CSV"""
+    format = format.lower()
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
     
-    if not leads_dir.exists():
+    if lead_store.get_stats()["total"] == 0:
         raise HTTPException(status_code=404, detail="No leads found")
     
-    leads = []
-    lead_files = sorted(leads_dir.glob("lead_*.json"), reverse=True)
-    
-    for lead_file in lead_files:
-        try:
-            with open(lead_file, 'r') as f:
-                leads.append(json.load(f))
-        except:
-            continue
-    
-    if format.lower() == "csv":
-        # Create CSV in memory
-        output = io.StringIO()
-        
-        if leads:
-            fieldnames = [
-                'lead_id', 'captured_at', 'name', 'email', 'phone',
-                'company', 'business_type', 'location', 'main_challenge',
-                'budget_range', 'qualification_score', 'lead_quality',
-                'conversation_summary'
-            ]
-            
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for lead in leads:
-                writer.writerow({k: lead.get(k, '') for k in fieldnames})
-        
-        output.seek(0)
-        return StreamingResponse(
-            io.BytesIO(output.getvalue().encode()),
-            media_type="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename=leads_export_{datetime.now().strftime('%Y%m%d')}.csv"
-            }
-        )
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"leads_export_{datetime.now().strftime('%Y%m%d')}.{extension}"
+    if gzip:
+        media_type = "application/gzip"
+        filename += ".gz"
     
-    else:
-        # Return JSON
-        return JSONResponse(
-            content={
-                "leads": leads,
-                "total": len(leads),
-                "exported_at": datetime.now().isoformat()
-            },
-            headers={
-                "Content-Disposition": f"attachment; filename=leads_export_{datetime.now().strftime('%Y%m%d')}.json"
-            }
-        )
+    # Leads are read from the store in batches and rendered as they are sent
+    return StreamingResponse(
+        stream_leads(lead_store.iter_leads(), format, compress=gzip),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
+@router.get("/leads/search")
+async def search_leads(
+    username: str = Depends(verify_credentials),
+    q: str = Query(..., min_length=1, description="Name, company, email, phone, challenge or summary keywords"),
+    limit: int = Query(25, ge=1, le=100, description="Results per page"),
+    offset: int = Query(0, ge=0, description="Results to skip")
+):
+    """Ranked full-text search over leads"""
+    leads, has_more = lead_store.search_leads(q, limit=limit, offset=offset)
+    
+    return {
+        "query": q,
+        "leads": leads,
+        "count": len(leads),
+        "next_offset": offset + len(leads) if has_more else None,
+        "timestamp": datetime.now().isoformat()
+    }
 
 @router.get("/leads/{lead_id}")
 async def get_lead(
@@ -162,17 +172,15 @@ async def get_lead(
     username: str = Depends(verify_credentials)
 ):
     """Get a specific lead by ID"""
-    lead_file = Path(f"logs/leads/{lead_id}.json")
-    
-    if not lead_file.exists():
-        raise HTTPException(status_code=404, detail="Lead not found")
-    
     try:
-        with open(lead_file, 'r') as f:
-            lead = json.load(f)
-        return lead
+        lead = lead_store.get_lead(lead_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading lead: {str(e)}")
+    
+    if lead is None:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    
+    return lead
 
 @router.delete("/leads/{lead_id}")
 async def delete_lead(
@@ -180,67 +188,84 @@ async def delete_lead(
     username: str = Depends(verify_credentials)
 ):
     """Delete a specific lead"""
-    lead_file = Path(f"logs/leads/{lead_id}.json")
-    
-    if not lead_file.exists():
-        raise HTTPException(status_code=404, detail="Lead not found")
-    
     try:
-        lead_file.unlink()
-        return {"message": f"Lead {lead_id} deleted successfully"}
+        deleted = lead_store.delete_lead(lead_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting lead: {str(e)}")
+    
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    
+    return {"message": f"Lead {lead_id} deleted successfully"}
+
+@router.post("/broadcast")
+async def broadcast_notice(
+    notice: Dict[str, str],
+    username: str = Depends(verify_credentials)
+):
+    """Push a notice (e.g. "Reno is online now") to every connected chat, on all workers"""
+    message = (notice.get("message") or "").strip()
+    if not message:
+        raise HTTPException(status_code=400, detail="message is required")
+    
+    from api_backend.services.websocket_manager import connection_manager
+    local = await connection_manager.broadcast({"message": message}, frame_type="notice")
+    return {"delivered_locally": local, "backplane": connection_manager.get_status()["backplane"]}
 
 @router.get("/stats")
 async def get_stats(username: str = Depends(verify_credentials)):
     """Get chatbot statistics"""
-    leads_dir = Path("logs/leads")
-    
     stats = {
-        "leads": {
-            "total": 0,
-            "by_quality": {"hot": 0, "warm": 0, "cold": 0},
-            "by_location": {},
-            "by_business_type": {},
-            "last_captured": None
-        }
+        "leads": lead_store.get_stats()
     }
     
-    if leads_dir.exists():
-        lead_files = list(leads_dir.glob("lead_*.json"))
-        stats["leads"]["total"] = len(lead_files)
-        
-        # Get most recent lead time
-        if lead_files:
-            most_recent = max(lead_files, key=lambda f: f.stat().st_mtime)
-            stats["leads"]["last_captured"] = datetime.fromtimestamp(
-                most_recent.stat().st_mtime
-            ).isoformat()
-        
-        # Analyze leads
-        for lead_file in lead_files:
-            try:
-                with open(lead_file, 'r') as f:
-                    lead = json.load(f)
-                    
-                    # Quality
-                    if 'HOT' in lead.get('lead_quality', ''):
-                        stats["leads"]["by_quality"]["hot"] += 1
-                    elif 'WARM' in lead.get('lead_quality', ''):
-                        stats["leads"]["by_quality"]["warm"] += 1
-                    else:
-                        stats["leads"]["by_quality"]["cold"] += 1
-                    
-                    # Location
-                    location = lead.get('location', 'Unknown')
-                    stats["leads"]["by_location"][location] = \
-                        stats["leads"]["by_location"].get(location, 0) + 1
-                    
-                    # Business type
-                    btype = lead.get('business_type', 'Unknown')
-                    stats["leads"]["by_business_type"][btype] = \
-                        stats["leads"]["by_business_type"].get(btype, 0) + 1
-            except:
-                continue
+    # HubSpot rate-limit budget and requeue backlog
+    try:
+        from api_backend.services.hubspot_service import hubspot_service
+        stats["hubspot"] = hubspot_service.get_rate_limit_status()
+    except Exception as e:
+        stats["hubspot"] = {"enabled": False, "error": str(e)}
+    
+    # Write-behind Postgres queue depth and write counters
+    try:
+        from api_backend.services.postgres_store import postgres_store
+        stats["postgres"] = postgres_store.get_status()
+    except Exception as e:
+        stats["postgres"] = {"enabled": False, "error": str(e)}
+    
+    # Analytics event buffer and sink health
+    try:
+        from api_backend.services.analytics_events import analytics
+        stats["analytics"] = analytics.get_status()
+    except Exception as e:
+        stats["analytics"] = {"error": str(e)}
+    
+    # Live WebSocket connections and send queues
+    try:
+        from api_backend.services.websocket_manager import connection_manager
+        stats["websockets"] = connection_manager.get_status()
+    except Exception as e:
+        stats["websockets"] = {"error": str(e)}
+    
+    # Claude generation slots and queue (admission control)
+    try:
+        from api_backend.services.admission import chat_admission
+        stats["admission"] = chat_admission.get_status()
+    except Exception as e:
+        stats["admission"] = {"error": str(e)}
+    
+    # Cold start timings
+    try:
+        from api_backend.services.startup_profile import startup_profile
+        stats["startup"] = startup_profile.get_status()
+    except Exception as e:
+        stats["startup"] = {"error": str(e)}
+    
+    # Per-destination webhook latency, errors and retry queues
+    try:
+        from api_backend.services.webhook_lead_capture import webhook_lead_capture
+        stats["webhooks"] = webhook_lead_capture.get_metrics()
+    except Exception as e:
+        stats["webhooks"] = {"error": str(e)}
     
     return stats
\ No newline at end of file
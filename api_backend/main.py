@@ -2,7 +2,13 @@
 Hawaiian LeniLani Chatbot - FastAPI Backend
 Main application entry point with Hawaiian business logic
 """
+# First, so the startup profile covers every import below
+from api_backend.services.startup_profile import startup_profile
+
 import os
+import math
+import time
+import asyncio
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional, Any
@@ -10,7 +16,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
+from fastapi.responses import JSONResponse, FileResponse, HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, EmailStr
 import pytz
@@ -26,6 +32,8 @@ from services.hawaiian_timezone_handler import HawaiianTimezoneHandler
 from config.hawaiian_cultural_config import HAWAIIAN_CONFIG
 from config.island_business_config import ISLAND_BUSINESS_CONFIG
 from services.startup_tasks import run_startup_tasks
+from api_backend.services.tracing import TraceMiddleware, current_trace, current_trace_id, install_log_trace_ids
+from api_backend.services.structured_logging import setup_logging
 try:
     from . import admin_routes
 except ImportError:
@@ -34,36 +42,102 @@ except ImportError:
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging: JSON lines written off the request path, tagged with the
+# current request's trace ID, PII redacted (see LOG_* in .env.example)
+install_log_trace_ids()
+setup_logging()
 logger = logging.getLogger(__name__)
 
+startup_profile.mark("imports")
+
+# Lazy init builds the Claude client and lead capture in the background warm-up
+# instead of at import, so the server starts listening sooner after a cold start
+LAZY_INIT = os.getenv("LAZY_INIT", "false").lower() == "true"
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"
+
 # Initialize services
-conversation_router = HawaiianConversationRouter()
+conversation_router = HawaiianConversationRouter(lazy=LAZY_INIT)
 cultural_tone_manager = CulturalToneManager()
 island_intelligence = IslandBusinessIntelligence()
 timezone_handler = HawaiianTimezoneHandler()
+startup_profile.mark("services")
+
+# Background warm-up task (see services/warmup.py)
+warmup_task: Optional[asyncio.Task] = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle"""
+    global warmup_task
+    
     # Startup
     logger.info("🌺 Starting Hawaiian LeniLani Chatbot API...")
     
     # Run startup tasks (create directories, etc.)
     run_startup_tasks()
     
+    # Read and precompress the landing page, widget and admin pages once
+    load_static_assets()
+    await static_assets.start_watching()
+    
+    # Write-behind Postgres persistence (no-op unless POSTGRES_PERSISTENCE_ENABLED=true)
+    from api_backend.services.postgres_store import postgres_store
+    await postgres_store.start()
+    
+    # Buffered analytics event stream
+    from api_backend.services.analytics_events import analytics
+    await analytics.start()
+    
+    # Cross-worker WebSocket delivery (no-op unless WS_BACKPLANE is set)
+    await manager.start()
+    
+    # Finish lazy init and pre-open Anthropic/HubSpot connections without holding up startup
+    if STARTUP_WARMUP:
+        from api_backend.services.warmup import warm_up
+        warmup_task = asyncio.create_task(warm_up(conversation_router))
+    
+    startup_profile.mark("lifespan")
     logger.info(f"🏝️ Hawaii Time: {timezone_handler.get_current_hawaii_time()}")
-    logger.info("🤙 Aloha! Ready to serve Hawaiian businesses!")
+    logger.info(f"🤙 Aloha! Ready to serve Hawaiian businesses! Startup: {startup_profile.summary()}")
     
     yield
     
     # Shutdown
     logger.info("🌙 Shutting down Hawaiian LeniLani Chatbot API...")
+    
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    
+    await static_assets.stop_watching()
+    await manager.stop()
+    
+    # Sync lead updates still waiting out their debounce period
+    try:
+        if conversation_router.lead_capture:
+            await conversation_router.lead_capture.flush_pending_updates()
+    except Exception as e:
+        logger.warning(f"Error flushing pending lead updates: {str(e)}")
+    
+    # Flush buffered analytics events (before the Postgres pool closes)
+    try:
+        await analytics.stop()
+    except Exception as e:
+        logger.warning(f"Error flushing analytics events: {str(e)}")
+    
+    # Write out queued conversations, messages and leads
+    try:
+        await postgres_store.stop()
+    except Exception as e:
+        logger.warning(f"Error stopping Postgres persistence: {str(e)}")
+    
+    # Close the pooled webhook client
+    try:
+        from api_backend.services.webhook_lead_capture import webhook_lead_capture
+        await webhook_lead_capture.close()
+    except Exception as e:
+        logger.warning(f"Error closing webhook client: {str(e)}")
+    
     logger.info("A hui hou! Until we meet again!")
 
 
@@ -106,57 +180,116 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Trace ID + Server-Timing on every response (outermost, so it times everything)
+app.add_middleware(TraceMiddleware)
+
 # Serve static files (widget.js)
 import os
+from api_backend.services.static_assets import static_assets
+from api_backend.services import widget_bundle, widget_bootstrap
+from api_backend.services.fast_json import FastJSONResponse
+from api_backend.services.metrics import metrics, CHAT_REQUEST_SECONDS, CHAT_STAGE_SECONDS, StageTimer
+from api_backend.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+
 public_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "public")
+project_dir = os.path.dirname(os.path.dirname(__file__))
+
+# Pages are revalidated on every load (cheap 304s via ETag); the logo rarely changes.
+# The widget itself is content-hashed, so it is cached forever (see widget_bundle)
+HTML_CACHE_CONTROL = "no-cache"
+LOGO_CACHE_CONTROL = "public, max-age=86400"
+
+STATIC_ASSET_FILES = {
+    "landing": ([os.path.join(public_dir, "landing-page.html")], "text/html; charset=utf-8", HTML_CACHE_CONTROL),
+    "landing_full": ([os.path.join(project_dir, "landing-page.html")], "text/html; charset=utf-8", HTML_CACHE_CONTROL),
+    "widget": (
+        [os.path.join(public_dir, "hawaiian-widget.js"), os.path.join(public_dir, "widget.js")],
+        "application/javascript; charset=utf-8",
+        widget_bundle.BUNDLE_CACHE_CONTROL
+    ),
+    "logo": ([os.path.join(public_dir, "lenilani-logo.webp")], "image/webp", LOGO_CACHE_CONTROL),
+    "admin": ([os.path.join(public_dir, "admin.html")], "text/html; charset=utf-8", HTML_CACHE_CONTROL),
+    "view_leads": ([os.path.join(public_dir, "view-leads.html")], "text/html; charset=utf-8", HTML_CACHE_CONTROL),
+}
+
+
+def load_static_asset(name: str) -> bool:
+    """Read and precompress one asset (first existing candidate path wins)"""
+    paths, media_type, cache_control = STATIC_ASSET_FILES[name]
+    transform = widget_bundle.minify_js if name == widget_bundle.BUNDLE_ASSET else None
+    for path in paths:
+        if os.path.exists(path):
+            return static_assets.register(name, path, media_type, cache_control, transform)
+    return False
+
+
+def load_static_assets():
+    """Warm the static asset cache at startup"""
+    for name in STATIC_ASSET_FILES:
+        load_static_asset(name)
+
+
+def serve_static_asset(request: Request, name: str):
+    """Cached response for an asset, loading it on first use if startup missed it"""
+    if static_assets.get(name) is None:
+        load_static_asset(name)
+    return static_assets.response(request, name)
+
+
 if os.path.exists(public_dir):
     app.mount("/public", StaticFiles(directory=public_dir), name="public")
     
     # Serve full landing page
     @app.get("/landing", response_class=HTMLResponse)
-    async def serve_landing_page():
+    async def serve_landing_page(request: Request):
         """Serve the full landing page"""
-        landing_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "landing-page.html")
-        if os.path.exists(landing_path):
-            with open(landing_path, 'r') as f:
-                return HTMLResponse(content=f.read())
+        response = serve_static_asset(request, "landing_full")
+        if response is not None:
+            return response
         return HTMLResponse("<h1>Landing page not found</h1>", status_code=404)
     
-    # Serve widget.js at root level for convenience
+    # Serve widget.js at root level for convenience - a small loader for the hashed bundle
     @app.get("/widget.js")
-    async def serve_widget():
-        # Serve the full Hawaiian widget
-        widget_path = os.path.join(public_dir, "hawaiian-widget.js")
-        if os.path.exists(widget_path):
-            return FileResponse(widget_path, media_type="application/javascript")
-        # Fallback to simple widget
-        widget_path = os.path.join(public_dir, "widget.js")
-        if os.path.exists(widget_path):
-            return FileResponse(widget_path, media_type="application/javascript")
+    async def serve_widget(request: Request):
+        if static_assets.get(widget_bundle.BUNDLE_ASSET) is None:
+            load_static_asset(widget_bundle.BUNDLE_ASSET)
+        response = widget_bundle.loader_response(request)
+        if response is not None:
+            return response
+        raise HTTPException(status_code=404, detail="Widget not found")
+    
+    # Minified, content-hashed widget (full Hawaiian widget, falling back to the simple widget)
+    @app.get("/widget.{version}.js")
+    async def serve_widget_bundle(request: Request, version: str):
+        if static_assets.get(widget_bundle.BUNDLE_ASSET) is None:
+            load_static_asset(widget_bundle.BUNDLE_ASSET)
+        response = widget_bundle.bundle_response(request, version)
+        if response is not None:
+            return response
         raise HTTPException(status_code=404, detail="Widget not found")
     
     # Serve logo
     @app.get("/logo")
-    async def serve_logo():
-        logo_path = os.path.join(public_dir, "lenilani-logo.webp")
-        if os.path.exists(logo_path):
-            return FileResponse(logo_path, media_type="image/webp")
+    async def serve_logo(request: Request):
+        response = serve_static_asset(request, "logo")
+        if response is not None:
+            return response
         raise HTTPException(status_code=404, detail="Logo not found")
     
     # Serve admin interface
     @app.get("/admin")
-    async def serve_admin():
-        admin_path = os.path.join(public_dir, "admin.html")
-        if os.path.exists(admin_path):
-            return FileResponse(admin_path, media_type="text/html")
+    async def serve_admin(request: Request):
+        response = serve_static_asset(request, "admin")
+        if response is not None:
+            return response
         raise HTTPException(status_code=404, detail="Admin interface not found")
     
     # Serve lead viewer instructions
     @app.get("/view-leads")
-    async def serve_lead_viewer():
-        viewer_path = os.path.join(public_dir, "view-leads.html")
-        if os.path.exists(viewer_path):
-            return FileResponse(viewer_path, media_type="text/html")
+    async def serve_lead_viewer(request: Request):
+        response = serve_static_asset(request, "view_leads")
+        if response is not None:
+            return response
         raise HTTPException(status_code=404, detail="Lead viewer not found")
 
 
@@ -173,6 +306,8 @@ class ChatMessage(BaseModel):
     user_id: Optional[str] = None
     session_id: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    # Skip the static cultural context blob in the response metadata
+    lean: Optional[bool] = None
 
 
 class ChatResponse(BaseModel):
@@ -203,30 +338,7 @@ class ScheduleConsultationRequest(BaseModel):
 
 
 # Connection manager for WebSocket
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-    
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
-        logger.info(f"🌺 New connection from client: {client_id}")
-    
-    def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-            logger.info(f"🌙 Client disconnected: {client_id}")
-    
-    async def send_message(self, message: str, client_id: str):
-        if client_id in self.active_connections:
-            await self.active_connections[client_id].send_text(message)
-    
-    async def broadcast(self, message: str):
-        for connection in self.active_connections.values():
-            await connection.send_text(message)
-
-
-manager = ConnectionManager()
+from api_backend.services.websocket_manager import connection_manager as manager
 
 # Include admin routes
 app.include_router(admin_routes.router)
@@ -247,20 +359,10 @@ async def root(request: Request):
             "greeting": greeting
         })
     
-    # Serve the full landing page
-    # Try public directory first (more reliable in Docker)
-    landing_path = os.path.join(public_dir, "landing-page.html")
-    logger.info(f"Looking for landing page at: {landing_path}")
-    logger.info(f"File exists: {os.path.exists(landing_path)}")
-    
-    if os.path.exists(landing_path):
-        try:
-            with open(landing_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                logger.info(f"Successfully loaded landing page, size: {len(content)} bytes")
-                return HTMLResponse(content=content)
-        except Exception as e:
-            logger.error(f"Error reading landing page: {e}")
+    # Serve the full landing page from the in-memory cache
+    response = serve_static_asset(request, "landing")
+    if response is not None:
+        return response
     
     # Fallback to simple landing page if file not found
     return HTMLResponse(content="""
@@ -414,6 +516,45 @@ async def health_check():
     )
 
 
+def build_widget_bootstrap() -> Dict[str, Any]:
+    """Shared (non-session) part of the widget bootstrap payload"""
+    current_time = timezone_handler.get_current_hawaii_time()
+    greeting = timezone_handler.get_time_based_greeting()
+    
+    if static_assets.get("logo") is None:
+        load_static_asset("logo")
+    
+    return {
+        "greeting": f"{greeting} How can I help your business today? 🌺",
+        "suggestions": conversation_router.get_suggestions("aloha"),
+        "logo": widget_bootstrap.logo_data_uri(),
+        "config": {
+            "hawaii_time": current_time["formatted"],
+            "time_period": current_time["time_period"],
+            "is_business_hours": current_time["is_business_hours"],
+            "chat_url": "/chat"
+        }
+    }
+
+
+# Optional bearer token for /metrics (leave unset for an open scrape endpoint)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+
+@app.get("/metrics")
+async def get_metrics(request: Request):
+    """Per-stage chat latency histograms and counters in Prometheus text format"""
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/widget/bootstrap")
+async def get_widget_bootstrap():
+    """Greeting, suggestions, logo and a new session ID for the widget in one round trip"""
+    return widget_bootstrap.widget_bootstrap.response(build_widget_bootstrap)
+
+
 @app.get("/session/{session_id}/lead-data")
 async def get_session_lead_data(session_id: str):
     """Get current lead data for a session (debugging endpoint)"""
@@ -426,24 +567,34 @@ async def end_session(session_id: str):
     return await conversation_router.end_session(session_id)
 
 
-@app.post("/chat", response_model=ChatResponse)
+# Default for clients that don't send "lean" (the widget always does)
+CHAT_LEAN_METADATA = os.getenv("CHAT_LEAN_METADATA", "false").lower() == "true"
+
+
+@app.post("/chat", response_model=ChatResponse, response_class=FastJSONResponse)
 async def chat(message: ChatMessage, request: Request):
     """Main chat endpoint for Hawaiian business conversations"""
-    # Log request details to debug double calls
-    request_id = request.headers.get("X-Request-ID", "no-id")
-    logger.info(f"Chat request received - Session: {message.session_id}, Request ID: {request_id}, Message: {message.message[:50]}")
+    # Log request details to debug double calls (the widget's X-Request-ID becomes the trace ID)
+    logger.info(
+        "Chat request received",
+        extra={"event": "chat_request", "session_id": message.session_id, "message_length": len(message.message)}
+    )
     
     try:
+        timer = StageTimer(CHAT_STAGE_SECONDS)
+        
         # Get cultural context
         cultural_context = cultural_tone_manager.get_cultural_context()
+        timer.lap("cultural_context")
         
-        # Route conversation appropriately
+        # Route conversation appropriately (the router times its own stages)
         response = await conversation_router.route_message(
             user_message=message.message,
             session_id=message.session_id,
             user_id=message.user_id,
             metadata=message.metadata
         )
+        timer.skip()
         
         # Add cultural tone enhancement for more pidgin flavor
         enhanced_response = cultural_tone_manager.enhance_response(
@@ -457,17 +608,37 @@ async def chat(message: ChatMessage, request: Request):
         # No quick replies for Claude-only implementation
         quick_replies = []
         
-        return ChatResponse(
-            response=enhanced_response,
-            metadata={
-                "cultural_context": cultural_context,
-                "timestamp": datetime.now(pytz.timezone('Pacific/Honolulu')).isoformat(),
-                "intent": response.get("intent"),
-                "confidence": response.get("confidence")
-            },
-            suggestions=suggestions,
-            quick_replies=quick_replies
-        )
+        lean = CHAT_LEAN_METADATA if message.lean is None else message.lean
+        if lean:
+            metadata = {"time_context": cultural_context.time_context.value}
+        else:
+            metadata = {"cultural_context": cultural_tone_manager.serialize_context(cultural_context)}
+        metadata.update({
+            "timestamp": datetime.now(pytz.timezone('Pacific/Honolulu')).isoformat(),
+            "intent": response.get("intent"),
+            "confidence": response.get("confidence")
+        })
+        
+        # Shed by admission control - still a normal reply, plus a hint for clients and proxies
+        headers = None
+        retry_after = response.get("metadata", {}).get("retry_after")
+        if retry_after:
+            metadata["overloaded"] = True
+            headers = {"Retry-After": str(math.ceil(retry_after))}
+        timer.lap("post_processing")
+        
+        # Returned directly so the ChatResponse model isn't re-validated and re-encoded
+        chat_response = FastJSONResponse({
+            "response": enhanced_response,
+            "metadata": metadata,
+            "suggestions": suggestions,
+            "quick_replies": quick_replies
+        }, headers=headers)
+        timer.lap("serialization")
+        CHAT_REQUEST_SECONDS.observe(timer.total(), transport="http")
+        if startup_profile.mark("first_chat_response") is not None:
+            logger.info(f"First chat response after startup: {startup_profile.summary()}")
+        return chat_response
         
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
@@ -592,50 +763,49 @@ async def get_island_insights(island: str):
 
 
 @app.websocket("/ws/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, client_id: str):
-    """WebSocket endpoint for real-time chat"""
-    await manager.connect(websocket, client_id)
-    
-    # Send welcome message
-    welcome_msg = {
-        "type": "welcome",
-        "message": timezone_handler.get_time_based_greeting() + " Ready for talk story!",
-        "timestamp": datetime.now(pytz.timezone('Pacific/Honolulu')).isoformat()
-    }
-    await manager.send_message(str(welcome_msg), client_id)
+async def websocket_endpoint(websocket: WebSocket, client_id: str, last_seq: Optional[int] = None):
+    """WebSocket endpoint for real-time chat (reconnect with ?last_seq=N to resume)"""
+    connection = await manager.connect(websocket, client_id, last_seq)
     
-    try:
-        while True:
-            # Receive message from client
-            data = await websocket.receive_json()
-            
-            # Process message
-            response = await conversation_router.route_message(
-                user_message=data.get("message", ""),
-                session_id=client_id,
-                user_id=data.get("user_id"),
-                metadata=data.get("metadata")
-            )
-            
-            # Skip cultural tone enhancement - Claude handles this
-            # enhanced_response = cultural_tone_manager.enhance_response(
-            #     response["response"],
-            #     cultural_tone_manager.get_cultural_context()
-            # )
-            enhanced_response = response["response"]
-            
-            # Send response
-            response_msg = {
-                "type": "response",
-                "message": enhanced_response,
-                "metadata": response.get("metadata", {}),
-                "timestamp": datetime.now(pytz.timezone('Pacific/Honolulu')).isoformat()
-            }
-            await manager.send_message(str(response_msg), client_id)
-            
-    except WebSocketDisconnect:
-        manager.disconnect(client_id)
-        logger.info(f"Client {client_id} disconnected from WebSocket")
+    # Send welcome message (resumed sessions get their missed frames instead)
+    if not connection.resumed:
+        connection.stream.send(
+            "welcome",
+            message=timezone_handler.get_time_based_greeting() + " Ready for talk story!"
+        )
+    
+    async def handle_message(stream, data: Dict[str, Any]):
+        started = time.perf_counter()
+        
+        # Process message
+        response = await conversation_router.route_message(
+            user_message=data.get("message", ""),
+            session_id=client_id,
+            user_id=data.get("user_id"),
+            metadata=data.get("metadata")
+        )
+        
+        # Skip cultural tone enhancement - Claude handles this
+        # enhanced_response = cultural_tone_manager.enhance_response(
+        #     response["response"],
+        #     cultural_tone_manager.get_cultural_context()
+        # )
+        enhanced_response = response["response"]
+        
+        # Send response (buffered for replay if the client dropped meanwhile)
+        trace = current_trace()
+        stream.send(
+            "response",
+            message=enhanced_response,
+            metadata=response.get("metadata", {}),
+            reply_to=data.get("id"),
+            trace_id=trace.trace_id,
+            server_timing=trace.timing_ms()
+        )
+        CHAT_REQUEST_SECONDS.observe(time.perf_counter() - started, transport="ws")
+    
+    await manager.serve(connection, handle_message)
+    logger.info(f"Client {client_id} disconnected from WebSocket")
 
 
 if __name__ == "__main__":
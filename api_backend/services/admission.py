@@ -0,0 +1,171 @@
+"""
+Admission Control - Bounded concurrency for Claude generations
+At most max_concurrent generations run at once; up to max_queue more wait in
+FIFO order. A message is shed (and gets the friendly fallback with Reno's
+contact info) when the queue is full, when the expected wait - estimated from
+recent generation times - is over max_wait_seconds, or when it has actually
+waited that long. Queue depth and in-flight count are exported on /metrics
+for autoscaling.
+"""
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+from api_backend.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest generation time in the moving average
+EWMA_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    """The message was shed instead of queued"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """FIFO admission to a fixed number of generation slots"""
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        max_queue: int = 16,
+        max_wait_seconds: float = 10.0,
+        initial_service_seconds: float = 3.0
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_seconds = max_wait_seconds
+        self.avg_service_seconds = initial_service_seconds
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.stats = {
+            "admitted_total": 0,
+            "queued_total": 0,
+            "shed_queue_full": 0,
+            "shed_expected_wait": 0,
+            "shed_wait_timeout": 0,
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def expected_wait(self, position: Optional[int] = None) -> float:
+        """Seconds until a newcomer at the back of the queue would get a slot"""
+        position = self.queue_depth if position is None else position
+        if self.in_flight < self.max_concurrent and position == 0:
+            return 0.0
+        return math.ceil((position + 1) / self.max_concurrent) * self.avg_service_seconds
+
+    def _shed(self, reason: str) -> AdmissionRejected:
+        self.stats[f"shed_{reason}"] += 1
+        retry_after = max(1.0, round(self.expected_wait(), 1))
+        logger.warning(
+            f"Shedding chat message ({reason}): {self.in_flight} in flight, "
+            f"{self.queue_depth} queued, ~{self.avg_service_seconds:.1f}s per generation"
+        )
+        return AdmissionRejected(reason, retry_after)
+
+    async def acquire(self):
+        """Wait for a slot, or raise AdmissionRejected"""
+        if self.in_flight < self.max_concurrent and not self._waiters:
+            self.in_flight += 1
+            self.stats["admitted_total"] += 1
+            return
+
+        if self.queue_depth >= self.max_queue:
+            raise self._shed("queue_full")
+        if self.expected_wait() > self.max_wait_seconds:
+            raise self._shed("expected_wait")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats["queued_total"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up - pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._shed("wait_timeout")
+            raise
+        self.stats["admitted_total"] += 1
+
+    def release(self, service_seconds: Optional[float] = None):
+        """Free a slot (handing it straight to the next waiter, if any)"""
+        if service_seconds is not None:
+            self.avg_service_seconds += EWMA_ALPHA * (service_seconds - self.avg_service_seconds)
+
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Slot transfers to the waiter - in_flight is unchanged
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a generation slot for the duration of the block"""
+        await self.acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait_seconds,
+            "avg_generation_seconds": round(self.avg_service_seconds, 2),
+            "expected_wait_seconds": round(self.expected_wait(), 2),
+            **self.stats
+        }
+
+
+# Create global instance
+chat_admission = AdmissionController(
+    max_concurrent=int(os.getenv("CHAT_MAX_CONCURRENT", "8")),
+    max_queue=int(os.getenv("CHAT_MAX_QUEUE", "16")),
+    max_wait_seconds=float(os.getenv("CHAT_MAX_WAIT_SECONDS", "10")),
+    initial_service_seconds=float(os.getenv("CHAT_INITIAL_GENERATION_SECONDS", "3"))
+)
+
+# Autoscaling signals
+metrics.gauge(
+    "lenilani_chat_queue_depth",
+    "Chat messages waiting for a Claude generation slot",
+    lambda: chat_admission.queue_depth
+)
+metrics.gauge(
+    "lenilani_chat_in_flight",
+    "Claude generations currently running",
+    lambda: chat_admission.in_flight
+)
+metrics.gauge(
+    "lenilani_chat_expected_wait_seconds",
+    "Estimated wait for a newly queued chat message",
+    lambda: chat_admission.expected_wait()
+)
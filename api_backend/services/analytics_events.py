@@ -0,0 +1,238 @@
+"""
+Analytics Events - Buffered in-process event stream for funnel and latency analysis
+Events are appended to a bounded in-memory buffer and flushed in batches to a sink
+(the analytics.events table, a JSONL file or stdout)
+"""
+import os
+import sys
+import json
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+hawaii_tz = pytz.timezone('Pacific/Honolulu')
+
+
+class StdoutSink:
+    """One JSON line per event on stdout (handy behind a log shipper)"""
+
+    name = "stdout"
+
+    async def write(self, events: List[Dict[str, Any]]):
+        sys.stdout.write("".join(json.dumps(event, default=str) + "\n" for event in events))
+        sys.stdout.flush()
+
+
+class JsonlSink:
+    """
+    Append events to a JSONL file, rotated by size
+
+    Once the file would grow past max_bytes it is renamed to path.1 (older
+    files shift to .2, .3, ...) and only the newest `backups` files are kept.
+    """
+
+    name = "jsonl"
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backups: int = 5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    async def write(self, events: List[Dict[str, Any]]):
+        # File I/O happens off the event loop
+        await asyncio.to_thread(self._append, events)
+
+    def _append(self, events: List[Dict[str, Any]]):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        payload = "".join(json.dumps(event, default=str) + "\n" for event in events).encode("utf-8")
+        if self.max_bytes > 0:
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                size = 0
+            if size and size + len(payload) > self.max_bytes:
+                self._rotate()
+        with open(self.path, "ab") as f:
+            f.write(payload)
+
+    def _rotate(self):
+        """Shift path -> path.1 -> path.2 ..., dropping the oldest"""
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+class PostgresSink:
+    """Multi-row insert into analytics.events over the persistence pool"""
+
+    name = "postgres"
+
+    async def write(self, events: List[Dict[str, Any]]):
+        from api_backend.services.postgres_store import postgres_store
+
+        if postgres_store.pool is None:
+            raise RuntimeError("Postgres persistence is not connected")
+
+        async with postgres_store.pool.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO analytics.events (conversation_id, event_type, event_data, user_id, session_id, created_at)
+                SELECT (SELECT id FROM chatbot.conversations c WHERE c.session_id = e.session_id),
+                       e.event_type, e.event_data, e.user_id, e.session_id, e.created_at
+                FROM unnest($1::varchar[], $2::jsonb[], $3::varchar[], $4::varchar[], $5::timestamptz[])
+                    AS e (event_type, event_data, user_id, session_id, created_at)
+                """,
+                [e["event_type"] for e in events],
+                [json.dumps(e["data"], default=str) for e in events],
+                [e["user_id"] for e in events],
+                [e["session_id"] for e in events],
+                [datetime.fromisoformat(e["timestamp"]) for e in events]
+            )
+
+
+def create_sink(name: str):
+    """Build the sink named by ANALYTICS_SINK"""
+    name = (name or "").lower()
+    if name == "postgres":
+        return PostgresSink()
+    if name == "stdout":
+        return StdoutSink()
+    if name == "jsonl":
+        return JsonlSink(
+            os.getenv("ANALYTICS_JSONL_PATH", "logs/analytics/events.jsonl"),
+            max_bytes=int(float(os.getenv("ANALYTICS_JSONL_MAX_MB", "50")) * 1024 * 1024),
+            backups=int(os.getenv("ANALYTICS_JSONL_BACKUPS", "5"))
+        )
+    return None
+
+
+class EventEmitter:
+    """
+    Bounded event buffer with periodic batch flushes
+
+    emit() never blocks or raises - when the buffer is full the event is
+    dropped and counted, so analytics can never slow down or break a chat.
+    """
+
+    def __init__(
+        self,
+        sink=None,
+        max_buffer: int = 5000,
+        batch_size: int = 500,
+        flush_interval: float = 5.0
+    ):
+        self.sink = sink
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._buffer: deque = deque()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+        self.stats = {
+            "emitted_total": 0,
+            "flushed_total": 0,
+            "dropped_total": 0,
+            "failed_flushes": 0,
+            "last_error": None
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink is not None
+
+    def emit(
+        self,
+        event_type: str,
+        session_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        **data
+    ):
+        """Record an event (no I/O on the caller's path)"""
+        if self.sink is None:
+            return
+
+        if len(self._buffer) >= self.max_buffer:
+            self.stats["dropped_total"] += 1
+            return
+
+        self._buffer.append({
+            "event_type": event_type,
+            "timestamp": datetime.now(hawaii_tz).isoformat(),
+            "session_id": session_id,
+            "user_id": user_id,
+            "data": data
+        })
+        self.stats["emitted_total"] += 1
+
+    async def start(self):
+        if self.sink is not None and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+            logger.info(f"Analytics events flushing to {self.sink.name} every {self.flush_interval}s")
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """Hand buffered events to the sink in batches"""
+        if self.sink is None:
+            return
+
+        async with self._flush_lock:
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                try:
+                    await self.sink.write(batch)
+                    self.stats["flushed_total"] += len(batch)
+                except Exception as e:
+                    self.stats["failed_flushes"] += 1
+                    self.stats["last_error"] = str(e)
+                    logger.error(f"Analytics flush to {self.sink.name} failed: {str(e)}")
+
+                    # Keep what still fits for the next attempt, count the rest as dropped
+                    room = self.max_buffer - len(self._buffer)
+                    keep = batch[:room]
+                    self._buffer.extendleft(reversed(keep))
+                    self.stats["dropped_total"] += len(batch) - len(keep)
+                    return
+
+    def get_status(self) -> Dict[str, Any]:
+        """Buffer depth and counters (for admin stats)"""
+        return {
+            "sink": self.sink.name if self.sink else None,
+            "buffered": len(self._buffer),
+            **self.stats
+        }
+
+
+# Create global instance
+analytics = EventEmitter(
+    sink=create_sink(os.getenv("ANALYTICS_SINK", "jsonl")),
+    max_buffer=int(os.getenv("ANALYTICS_MAX_BUFFER", "5000")),
+    batch_size=int(os.getenv("ANALYTICS_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("ANALYTICS_FLUSH_INTERVAL_SECONDS", "5"))
+)
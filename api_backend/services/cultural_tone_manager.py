@@ -5,15 +5,26 @@ import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 import random
+import time
 import pytz
 
 from models.cultural_context import (
     CulturalContext, CommunicationStyle, HawaiianValue,
     TimeOfDay, CulturalGreeting, PidginPhrase, CulturalTone
 )
+from api_backend.services.fast_json import FragmentCache, RawJSON, dumps
 
 logger = logging.getLogger(__name__)
 
+# Business types and islands with their own values, insights or etiquette -
+# anything else gets the same context as None
+CONTEXT_BUSINESS_TYPES = (None, "tourism", "restaurant", "agriculture")
+CONTEXT_ISLANDS = (None, "maui", "big_island", "kauai")
+COMMUNICATION_PREFERENCES = ("mixed", "professional", "local")
+
+# Hours (Hawaii time) at which the time of day changes
+TIME_PERIOD_BOUNDARIES = (5, 10, 14, 18, 22)
+
 
 class CulturalToneManager:
     """Manages cultural tone and context for Hawaiian business conversations"""
@@ -77,13 +88,48 @@ class CulturalToneManager:
             )
         ]
         
-        logger.info("Cultural Tone Manager initialized")
+        # Pre-serialized JSON for the constant parts of contexts (see serialize_context)
+        self._context_fragments = FragmentCache(maxsize=512)
+        self._phrase_fragments = FragmentCache()
+        
+        # Time of day is only recomputed once its period ends
+        self._time_of_day: Optional[TimeOfDay] = None
+        self._time_of_day_expires = 0.0
+        
+        self._contexts = self._precompute_contexts()
+        
+        logger.info(f"Cultural Tone Manager initialized ({len(self._contexts)} precomputed contexts)")
+    
+    def _precompute_contexts(self) -> Dict[tuple, CulturalContext]:
+        """Build every time of day x business type x island x style context (without phrases)"""
+        contexts = {}
+        for time_of_day in TimeOfDay:
+            for business_type in CONTEXT_BUSINESS_TYPES:
+                for island in CONTEXT_ISLANDS:
+                    for preference in COMMUNICATION_PREFERENCES:
+                        context = self._build_context(time_of_day, business_type, island, preference)
+                        contexts[(time_of_day, business_type, island, preference)] = context
+                        # Warm the JSON fragment cache as well
+                        self.serialize_context(context)
+        return contexts
     
     def get_current_time_of_day(self) -> TimeOfDay:
         """Get current Hawaiian time of day"""
-        hawaii_time = datetime.now(self.hawaii_tz)
-        hour = hawaii_time.hour
-        
+        now = time.time()
+        if self._time_of_day is None or now >= self._time_of_day_expires:
+            hawaii_time = datetime.now(self.hawaii_tz)
+            self._time_of_day = self._time_of_day_for_hour(hawaii_time.hour)
+            self._time_of_day_expires = now + self._seconds_until_next_period(hawaii_time)
+        return self._time_of_day
+    
+    @staticmethod
+    def _seconds_until_next_period(hawaii_time: datetime) -> float:
+        next_hour = next((h for h in TIME_PERIOD_BOUNDARIES if h > hawaii_time.hour), TIME_PERIOD_BOUNDARIES[0] + 24)
+        elapsed = hawaii_time.hour * 3600 + hawaii_time.minute * 60 + hawaii_time.second + hawaii_time.microsecond / 1e6
+        return next_hour * 3600 - elapsed
+    
+    @staticmethod
+    def _time_of_day_for_hour(hour: int) -> TimeOfDay:
         if 5 <= hour < 10:
             return TimeOfDay.KAKAHIAKA
         elif 10 <= hour < 14:
@@ -101,9 +147,25 @@ class CulturalToneManager:
         island: Optional[str] = None,
         communication_preference: str = "mixed"
     ) -> CulturalContext:
-        """Build complete cultural context"""
-        
-        time_of_day = self.get_current_time_of_day()
+        """Get complete cultural context (precomputed; only the phrases are picked per call)"""
+        key = (
+            self.get_current_time_of_day(),
+            business_type if business_type in CONTEXT_BUSINESS_TYPES else None,
+            island if island in CONTEXT_ISLANDS else None,
+            communication_preference if communication_preference in COMMUNICATION_PREFERENCES else "mixed"
+        )
+        return self._contexts[key].model_copy(update={
+            "suggested_phrases": random.sample(self.business_pidgin, min(3, len(self.business_pidgin)))
+        })
+    
+    def _build_context(
+        self,
+        time_of_day: TimeOfDay,
+        business_type: Optional[str],
+        island: Optional[str],
+        communication_preference: str
+    ) -> CulturalContext:
+        """Build a cultural context from the static tables"""
         
         # Select primary value based on context
         if business_type == "agriculture":
@@ -145,11 +207,37 @@ class CulturalToneManager:
             communication_style=comm_style,
             time_context=time_of_day,
             greeting=greeting,
-            suggested_phrases=random.sample(self.business_pidgin, min(3, len(self.business_pidgin))),
             cultural_insights=insights,
             business_etiquette=etiquette
         )
     
+    def serialize_context(self, context: CulturalContext) -> RawJSON:
+        """
+        JSON for a cultural context, reusing cached fragments
+        
+        Everything except the sampled phrases is constant for a given time of
+        day, business type and island, so that part and each phrase are encoded
+        once and spliced together per request.
+        """
+        static_key = (
+            context.primary_value,
+            tuple(context.supporting_values),
+            context.communication_style,
+            context.time_context,
+            context.greeting.hawaiian_greeting,
+            tuple(context.cultural_insights),
+            tuple(context.business_etiquette)
+        )
+        static = self._context_fragments.get(
+            static_key,
+            lambda: context.model_dump(mode="json", exclude={"suggested_phrases"})
+        )
+        phrases = [
+            self._phrase_fragments.get(phrase.pidgin, lambda phrase=phrase: phrase.model_dump(mode="json"))
+            for phrase in context.suggested_phrases
+        ]
+        return RawJSON(static.data[:-1] + b',"suggested_phrases":' + dumps(phrases) + b"}")
+    
     def enhance_response(
         self,
         response: str,
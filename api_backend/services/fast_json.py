@@ -0,0 +1,107 @@
+"""
+Fast JSON - orjson-backed serialization for hot response paths
+Falls back to the standard library when orjson is not installed. RawJSON lets
+callers splice pre-serialized fragments (e.g. cached cultural context) into a
+response without encoding them again.
+"""
+import json
+import logging
+from collections import OrderedDict
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Hashable
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class RawJSON:
+    """Already-encoded JSON that is written into the output as-is"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _contains_raw(value: Any) -> bool:
+    if isinstance(value, RawJSON):
+        return True
+    if isinstance(value, dict):
+        return any(_contains_raw(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_contains_raw(v) for v in value)
+    return False
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, RawJSON):
+        return value.data
+    if isinstance(value, dict) and _contains_raw(value):
+        return b"{" + b",".join(_dumps(str(k)) + b":" + _encode(v) for k, v in value.items()) + b"}"
+    if isinstance(value, (list, tuple)) and _contains_raw(value):
+        return b"[" + b",".join(_encode(v) for v in value) + b"]"
+    return _dumps(value)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON, splicing in any RawJSON fragments"""
+    return _encode(obj)
+
+
+class FragmentCache:
+    """Small LRU of pre-serialized JSON fragments for constant data"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._fragments: "OrderedDict[Hashable, RawJSON]" = OrderedDict()
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> RawJSON:
+        fragment = self._fragments.get(key)
+        if fragment is not None:
+            self._fragments.move_to_end(key)
+            return fragment
+
+        fragment = RawJSON(dumps(build()))
+        self._fragments[key] = fragment
+        if len(self._fragments) > self.maxsize:
+            self._fragments.popitem(last=False)
+        return fragment
+
+    def clear(self):
+        self._fragments.clear()
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (when available) and RawJSON support"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -4,11 +4,16 @@ Hawaiian Conversation Router - Routes conversations to Claude AI
 import os
 import logging
 import json
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Dict, List, Optional, Set
 from datetime import datetime
 import asyncio
 import sys
 import re
+import time
+
+from api_backend.services.admission import AdmissionRejected, chat_admission
+from api_backend.services.analytics_events import analytics
+from api_backend.services.metrics import CHAT_FALLBACKS, CHAT_STAGE_SECONDS, LEAD_CAPTURES, StageTimer
 
 logger = logging.getLogger(__name__)
 
@@ -16,20 +21,40 @@ logger = logging.getLogger(__name__)
 class HawaiianConversationRouter:
     """Routes conversations to Claude AI for cultural and business responses"""
     
-    def __init__(self):
+    def __init__(self, lazy: bool = False):
         # Session storage (in production, use Redis)
         self.sessions: Dict[str, Dict[str, Any]] = {}
         
-        # Initialize lead capture service
+        # Lead capture service and Claude client, built once each
         self.lead_capture = None
-        self._init_lead_capture()
-        
-        # Initialize Claude client once
         self.claude_client = None
-        self._init_claude_client()
+        self._initialized: Set[str] = set()
+        self._pending_init: Dict[str, asyncio.Future] = {}
+        
+        # Lazy mode defers both (and the Anthropic/requests imports) until first needed
+        if not lazy:
+            self._init_lead_capture()
+            self._init_claude_client()
         
         logger.info("Hawaiian Conversation Router initialized")
     
+    async def _ensure_initialized(self, name: str, init: Callable[[], None]):
+        """Run a deferred initializer once, off the event loop; concurrent callers share it"""
+        if name in self._initialized:
+            return
+        pending = self._pending_init.get(name)
+        if pending is None:
+            pending = self._pending_init[name] = asyncio.ensure_future(asyncio.to_thread(init))
+        await asyncio.shield(pending)
+    
+    async def ensure_ready(self):
+        """Claude client needed to answer (only waits on a cold start in lazy mode)"""
+        await self._ensure_initialized("claude_client", self._init_claude_client)
+    
+    async def ensure_lead_capture(self):
+        """Lead capture isn't needed for a reply, so it is built separately"""
+        await self._ensure_initialized("lead_capture", self._init_lead_capture)
+    
     def _init_lead_capture(self):
         """Initialize lead capture service"""
         try:
@@ -37,6 +62,7 @@ class HawaiianConversationRouter:
             self.lead_capture = LeadCaptureService()
         except Exception as e:
             logger.warning(f"Lead capture service not available: {str(e)}")
+        self._initialized.add("lead_capture")
     
     def _init_claude_client(self):
         """Initialize Claude client once"""
@@ -50,6 +76,7 @@ class HawaiianConversationRouter:
         except Exception as e:
             logger.error(f"Failed to initialize Claude client: {str(e)}")
             self.claude_client = None
+        self._initialized.add("claude_client")
     
     async def route_message(
         self,
@@ -65,14 +92,33 @@ class HawaiianConversationRouter:
             Dictionary with response and metadata
         """
         try:
+            # Only waits on a cold start in lazy mode
+            await self.ensure_ready()
+            timer = StageTimer(CHAT_STAGE_SECONDS)
+            
             # Get or create session
             session = self._get_or_create_session(session_id, user_id)
             
+            # Widget sessions opened via /widget/bootstrap have already shown a greeting
+            if metadata and "bootstrap_greeting" in metadata:
+                metadata = dict(metadata)
+                self._seed_bootstrap_greeting(session, metadata.pop("bootstrap_greeting"))
+            analytics.emit(
+                "message_received",
+                session_id=session["session_id"],
+                user_id=user_id,
+                message_length=len(user_message),
+                message_number=len(session.get("conversation_history", [])) // 2 + 1
+            )
+            
+            timer.lap("session")
+            
             # Route all messages to Claude
             return await self._route_to_claude(
                 user_message,
                 session,
-                metadata
+                metadata,
+                timer=timer
             )
                 
         except Exception as e:
@@ -84,13 +130,18 @@ class HawaiianConversationRouter:
         self,
         message: str,
         session: Dict[str, Any],
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        timer: Optional[StageTimer] = None
     ) -> Dict[str, Any]:
         """Route to Claude for cultural and business responses"""
         try:
+            timer = timer or StageTimer(CHAT_STAGE_SECONDS)
+            
             # Check if Claude client is available
             if not self.claude_client:
                 logger.error("Claude client not initialized")
+                analytics.emit("fallback_served", session_id=session.get("session_id"), reason="claude_unavailable")
+                CHAT_FALLBACKS.inc(reason="claude_unavailable")
                 return {
                     "response": "Ho brah, I stay having some technical difficulties right now. Can you try again in a bit? Mahalo for your patience! 🤙",
                     "metadata": {},
@@ -136,14 +187,36 @@ class HawaiianConversationRouter:
                 island_key = business_context['island'].lower().replace(' ', '_')
                 business_context['island_focus'] = ISLAND_CATEGORY_FOCUS.get(island_key, [])
             
-            # Generate Claude response
-            claude_response = await asyncio.to_thread(
-                self.claude_client.generate_response,
-                user_message=message,
-                conversation_history=conversation_history,
-                business_context=business_context,
-                cultural_mode="authentic"
+            timer.lap("context")
+            
+            # Generate Claude response - shed with a friendly fallback rather than queue into time-outs
+            try:
+                async with chat_admission.slot():
+                    timer.lap("admission")
+                    claude_started = time.perf_counter()
+                    claude_response = await asyncio.to_thread(
+                        self.claude_client.generate_response,
+                        user_message=message,
+                        conversation_history=conversation_history,
+                        business_context=business_context,
+                        cultural_mode="authentic"
+                    )
+            except AdmissionRejected as e:
+                timer.lap("admission")
+                return self._overloaded_response(session, e)
+            timer.lap("claude")
+            response_metadata = claude_response.get("metadata", {})
+            analytics.emit(
+                "claude_call",
+                session_id=session.get("session_id"),
+                latency_ms=round((time.perf_counter() - claude_started) * 1000, 1),
+                model=response_metadata.get("model"),
+                history_messages=len(conversation_history),
+                response_length=len(claude_response.get("response", ""))
             )
+            if response_metadata.get("fallback"):
+                analytics.emit("fallback_served", session_id=session.get("session_id"), reason="claude_error")
+                CHAT_FALLBACKS.inc(reason="claude_error")
             
             # Mark that we've greeted if this is first message
             if not session.get('has_greeted'):
@@ -162,11 +235,25 @@ class HawaiianConversationRouter:
             # Keep only last 20 messages
             session["conversation_history"] = conversation_history[-20:]
             
+            # Queued for the background Postgres writer - never waits on the database
+            from api_backend.services.postgres_store import postgres_store
+            postgres_store.record_message(session["session_id"], "user", message)
+            postgres_store.record_message(
+                session["session_id"], "bot", claude_response["response"],
+                metadata=claude_response.get("metadata", {})
+            )
+            
+            timer.lap("post")
+            
             # Check if lead information is available and capture it
             lead_info = self._extract_lead_info(message, conversation_history, session)
-            logger.info(f"Lead extraction result: {lead_info}")
-            if lead_info and self.lead_capture:
-                logger.info(f"Capturing lead with info: {lead_info}")
+            timer.lap("lead_extraction")
+            logger.info(
+                "Lead extraction result",
+                extra={"event": "lead_extraction", "session_id": session["session_id"], "ready": bool(lead_info)}
+            )
+            if lead_info:
+                logger.info("Capturing lead", extra={"session_id": session["session_id"], "fields": sorted(lead_info)})
                 asyncio.create_task(self._capture_lead(lead_info, session))
             
             return {
@@ -200,11 +287,37 @@ class HawaiianConversationRouter:
                 "lead_data": {},  # Store accumulated lead data
                 "lead_captured": False  # Track if we've already sent this lead
             }
+            
+            from api_backend.services.postgres_store import postgres_store
+            postgres_store.record_conversation(session_id, user_id)
         
         return self.sessions[session_id]
     
+    def _seed_bootstrap_greeting(self, session: Dict[str, Any], shown: Optional[str]):
+        """Record the bootstrap greeting so Claude doesn't greet a second time"""
+        if session.get("conversation_history"):
+            return
+        
+        # Only a greeting the server issued is written into the history - never client text
+        from api_backend.services.widget_bootstrap import widget_bootstrap
+        greeting = widget_bootstrap.claim_greeting(session["session_id"], str(shown) if shown else None)
+        if not greeting:
+            return
+        
+        session["has_greeted"] = True
+        # Same opening exchange the widget used to produce with a "Start conversation" /chat call
+        session["conversation_history"].extend([
+            {"role": "user", "content": "Start conversation"},
+            {"role": "assistant", "content": greeting}
+        ])
+        
+        from api_backend.services.postgres_store import postgres_store
+        postgres_store.record_message(session["session_id"], "bot", greeting, metadata={"source": "bootstrap"})
+    
     def _fallback_response(self, message: str) -> Dict[str, Any]:
         """Fallback response when routing fails"""
+        analytics.emit("fallback_served", reason="routing_error")
+        CHAT_FALLBACKS.inc(reason="routing_error")
         return {
             "response": (
                 "Ho brah, sorry! Having some technical difficulties right now. "
@@ -215,6 +328,20 @@ class HawaiianConversationRouter:
             "error": True
         }
     
+    def _overloaded_response(self, session: Dict[str, Any], rejection: AdmissionRejected) -> Dict[str, Any]:
+        """Fallback when too many Claude generations are already running or queued"""
+        analytics.emit("fallback_served", session_id=session.get("session_id"), reason=f"shed_{rejection.reason}")
+        CHAT_FALLBACKS.inc(reason=f"shed_{rejection.reason}")
+        return {
+            "response": (
+                "Ho, we stay super busy right now! Give me one minute and try again, "
+                "or reach Reno directly at reno@lenilani.com or 808-766-1164. Mahalo for your patience! 🤙"
+            ),
+            "metadata": {"overloaded": True, "retry_after": rejection.retry_after},
+            "source": "fallback",
+            "requires_human": True
+        }
+    
     def _extract_business_context(self, message: str, existing_context: Dict[str, Any]) -> Dict[str, Any]:
         """Extract business context from message"""
         context = {}
@@ -298,6 +425,7 @@ class HawaiianConversationRouter:
         """Extract and accumulate lead information from conversation"""
         # Get existing lead data from session
         existing_lead_data = session.get("lead_data", {})
+        previous_lead_data = dict(existing_lead_data)
         updated = False
         
         # Look for email
@@ -306,7 +434,7 @@ class HawaiianConversationRouter:
         if email_match and not existing_lead_data.get("email"):
             existing_lead_data["email"] = email_match.group()
             updated = True
-            logger.info(f"Found email: {email_match.group()}")
+            logger.info("Found %s in message", "email", extra={"event": "lead_field_found"})
         
         # Look for phone
         phone_pattern = r'(\d{3}[-.\s]?\d{3}[-.\s]?\d{4}|\(\d{3}\)\s*\d{3}[-.\s]?\d{4})'
@@ -314,7 +442,7 @@ class HawaiianConversationRouter:
         if phone_match and not existing_lead_data.get("phone"):
             existing_lead_data["phone"] = phone_match.group()
             updated = True
-            logger.info(f"Found phone: {phone_match.group()}")
+            logger.info("Found %s in message", "phone", extra={"event": "lead_field_found"})
         
         # Extract name if mentioned
         name_patterns = [
@@ -326,7 +454,7 @@ class HawaiianConversationRouter:
             if name_match and not existing_lead_data.get("name"):
                 existing_lead_data["name"] = name_match.group(1)
                 updated = True
-                logger.info(f"Found name: {name_match.group(1)}")
+                logger.info("Found %s in message", "name", extra={"event": "lead_field_found"})
                 break
         
         # Extract company name if mentioned
@@ -345,7 +473,7 @@ class HawaiianConversationRouter:
                     len(company_name) > 2):
                     existing_lead_data["company"] = company_name
                     updated = True
-                    logger.info(f"Found company: {company_name}")
+                    logger.info("Found %s in message", "company", extra={"event": "lead_field_found"})
                     break
         
         # Update business context information
@@ -366,6 +494,29 @@ class HawaiianConversationRouter:
         # Store updated lead data back in session
         session["lead_data"] = existing_lead_data
         
+        # Funnel steps - field names only, never the values
+        for field in existing_lead_data:
+            if field != "message_count" and not previous_lead_data.get(field):
+                analytics.emit(
+                    "lead_field_extracted",
+                    session_id=session.get("session_id"),
+                    field=field,
+                    message_number=existing_lead_data["message_count"]
+                )
+        
+        # Already captured - forward anything new to the stored lead (CRM sync is debounced)
+        if session.get("lead_captured") and session.get("lead_id") and self.lead_capture:
+            new_fields = {
+                k: v for k, v in existing_lead_data.items()
+                if k != "message_count" and previous_lead_data.get(k) != v
+            }
+            if new_fields:
+                self.lead_capture.queue_lead_update(
+                    session["lead_id"],
+                    new_fields,
+                    qualification_score=self._calculate_qualification_score(existing_lead_data, session)
+                )
+        
         # Determine if we should capture the lead now
         # We need at least email OR phone, plus some context
         has_contact = existing_lead_data.get("email") or existing_lead_data.get("phone")
@@ -376,41 +527,59 @@ class HawaiianConversationRouter:
         
         # Only return lead data if we have enough info AND haven't captured yet
         if has_contact and has_context and not session.get("lead_captured", False):
-            logger.info(f"Ready to capture lead with data: {existing_lead_data}")
+            logger.info("Ready to capture lead", extra={"fields": sorted(existing_lead_data)})
             return existing_lead_data
         elif updated:
-            logger.info(f"Updated lead data but not ready to capture yet. Current data: {existing_lead_data}")
+            logger.info(
+                "Updated lead data but not ready to capture yet",
+                extra={"event": "lead_extraction", "fields": sorted(existing_lead_data)}
+            )
         
         return None
     
     async def _capture_lead(self, lead_info: Dict, session: Dict):
         """Capture and send lead information"""
         try:
-            logger.info(f"Starting lead capture for: {lead_info}")
+            await self.ensure_lead_capture()
+            if not self.lead_capture:
+                return
+            
+            logger.info("Starting lead capture", extra={"lead": lead_info})
             # Generate conversation summary
             conversation_summary = self._generate_conversation_summary(session)
             
             # Calculate qualification score
             qualification_score = self._calculate_qualification_score(lead_info, session)
-            logger.info(f"Lead qualification score: {qualification_score}")
+            logger.info("Lead qualification score: %d", qualification_score)
             
             # Capture the lead
             result = await self.lead_capture.capture_lead(
                 lead_data=lead_info,
                 conversation_summary=conversation_summary,
-                qualification_score=qualification_score
+                qualification_score=qualification_score,
+                session_id=session.get("session_id")
             )
             
             if result["success"]:
                 logger.info(f"Lead captured successfully: {result['lead_id']}")
+                LEAD_CAPTURES.inc(result="merged" if result.get("merged") else "captured")
+                analytics.emit(
+                    "lead_captured",
+                    session_id=session.get("session_id"),
+                    lead_id=result["lead_id"],
+                    qualification_score=qualification_score,
+                    merged=result.get("merged", False)
+                )
                 # Mark lead as captured in session to prevent duplicates
                 session["lead_captured"] = True
                 session["lead_id"] = result['lead_id']
             else:
                 logger.error(f"Failed to capture lead: {result.get('error')}")
+                LEAD_CAPTURES.inc(result="failed")
                 
         except Exception as e:
             logger.error(f"Error in lead capture: {str(e)}")
+            LEAD_CAPTURES.inc(result="error")
     
     def _generate_conversation_summary(self, session: Dict) -> str:
         """Generate a summary of the conversation"""
@@ -517,9 +686,16 @@ class HawaiianConversationRouter:
                 
                 # Check if we have at least some contact info
                 if lead_data.get("email") or lead_data.get("phone"):
-                    logger.info(f"Capturing lead data at session end: {lead_data}")
+                    logger.info("Capturing lead data at session end", extra={"lead": lead_data})
                     await self._capture_lead(lead_data, session)
             
+            # No more updates can arrive for this lead - sync any debounced changes now
+            if session.get("lead_id") and self.lead_capture:
+                await self.lead_capture.flush_lead_update(session["lead_id"])
+            
+            from api_backend.services.postgres_store import postgres_store
+            postgres_store.end_conversation(session_id)
+            
             # Clean up session
             del self.sessions[session_id]
             
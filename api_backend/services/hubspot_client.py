@@ -0,0 +1,212 @@
+"""
+HubSpot Client - Rate-limit-aware HTTP wrapper for the HubSpot API
+"""
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+import requests
+
+from api_backend.services.tracing import trace_headers
+
+logger = logging.getLogger(__name__)
+
+
+class HubSpotRateLimitError(Exception):
+    """Raised when a request cannot be sent (or was rejected) because of rate limits"""
+
+    def __init__(self, retry_after: float, message: str = "HubSpot rate limit reached", local: bool = False):
+        super().__init__(f"{message} - retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+        # True when only our own burst allowance ran out - HubSpot never saw the request
+        self.local = local
+
+
+class TokenBucket:
+    """Thread-safe token bucket matching our HubSpot burst allowance"""
+
+    def __init__(self, capacity: int, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+        self._last_refill = now
+
+    def try_acquire(self, tokens: int = 1) -> float:
+        """
+        Take tokens from the bucket without blocking
+
+        Returns:
+            0.0 if the tokens were taken, otherwise seconds until they will be available
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.refill_per_second
+
+    def wait_time(self, tokens: int = 1) -> float:
+        """Seconds until tokens will be available (nothing is taken)"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                return 0.0
+            return (tokens - self._tokens) / self.refill_per_second
+
+    def drain(self, remaining: int = 0):
+        """Sync the local bucket down to what HubSpot says is left"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, float(remaining))
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class HubSpotClient:
+    """Wraps HubSpot HTTP calls with a local token bucket and rate-limit header tracking"""
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str = "https://api.hubapi.com",
+        burst_limit: int = 100,
+        burst_window_seconds: float = 10.0,
+        timeout: float = 10.0,
+        session: Optional[requests.Session] = None
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.bucket = TokenBucket(burst_limit, burst_limit / burst_window_seconds)
+        self.default_retry_after = burst_window_seconds
+
+        # Last values reported by HubSpot's X-HubSpot-RateLimit-* headers
+        self.limits: Dict[str, Any] = {
+            "max": None,
+            "remaining": None,
+            "interval_ms": None,
+            "daily": None,
+            "daily_remaining": None,
+            "last_updated": None
+        }
+        self.rate_limited_total = 0
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Send a request to HubSpot
+
+        Raises:
+            HubSpotRateLimitError: if the local bucket is empty or HubSpot answered 429
+        """
+        wait = self.bucket.try_acquire()
+        if wait > 0:
+            self.rate_limited_total += 1
+            raise HubSpotRateLimitError(wait, "Local HubSpot burst allowance exhausted", local=True)
+
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            **trace_headers(),
+            **kwargs.pop("headers", {})
+        }
+        kwargs.setdefault("timeout", self.timeout)
+
+        response = self.session.request(method, url, headers=headers, **kwargs)
+        self._track_headers(response)
+
+        if response.status_code == 429:
+            self.rate_limited_total += 1
+            self.bucket.drain(0)
+            retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+            logger.warning(f"HubSpot returned 429 for {method} {path} - retry after {retry_after:.1f}s")
+            raise HubSpotRateLimitError(retry_after)
+
+        return response
+
+    def warm_connection(self) -> bool:
+        """Open a pooled TLS connection to HubSpot (doesn't use the rate-limit budget)"""
+        try:
+            self.session.head(self.base_url, timeout=self.timeout)
+            return True
+        except requests.RequestException as e:
+            logger.warning(f"Could not pre-connect to HubSpot: {str(e)}")
+            return False
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def patch(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", path, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def _track_headers(self, response: requests.Response):
+        """Record HubSpot's rate-limit headers and keep the local bucket in sync"""
+        headers = response.headers
+        mapping = {
+            "X-HubSpot-RateLimit-Max": "max",
+            "X-HubSpot-RateLimit-Remaining": "remaining",
+            "X-HubSpot-RateLimit-Interval-Milliseconds": "interval_ms",
+            "X-HubSpot-RateLimit-Daily": "daily",
+            "X-HubSpot-RateLimit-Daily-Remaining": "daily_remaining",
+        }
+
+        seen = False
+        for header, key in mapping.items():
+            value = headers.get(header)
+            if value is None:
+                continue
+            try:
+                self.limits[key] = int(value)
+                seen = True
+            except ValueError:
+                continue
+
+        if seen:
+            self.limits["last_updated"] = time.time()
+            if self.limits["remaining"] is not None:
+                self.bucket.drain(self.limits["remaining"])
+
+    def _parse_retry_after(self, value: Optional[str]) -> float:
+        """Parse a Retry-After header (seconds or HTTP date)"""
+        if not value:
+            return self.default_retry_after
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return self.default_retry_after
+
+    def get_budget(self) -> Dict[str, Any]:
+        """Current local and remote rate-limit budget"""
+        return {
+            "local_bucket": {
+                "capacity": self.bucket.capacity,
+                "available": round(self.bucket.available, 2),
+                "refill_per_second": self.bucket.refill_per_second
+            },
+            "hubspot": dict(self.limits),
+            "rate_limited_total": self.rate_limited_total
+        }
@@ -3,11 +3,16 @@ HubSpot Service - Lead capture and CRM integration for Hawaiian businesses
 """
 import logging
 import os
-import requests
-from typing import Dict, Any, Optional
+import time
+import threading
+import contextvars
+from collections import deque
+from typing import Dict, Any, Optional, Callable
 from datetime import datetime
 import json
 
+from .hubspot_client import HubSpotClient, HubSpotRateLimitError
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,6 +24,27 @@ class HubSpotService:
         self.portal_id = os.getenv("HUBSPOT_PORTAL_ID")
         self.base_url = "https://api.hubapi.com"
         
+        # Rate-limit-aware client (burst allowance defaults to HubSpot's 100 requests / 10s)
+        self.client = HubSpotClient(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            burst_limit=int(os.getenv("HUBSPOT_BURST_LIMIT", "100")),
+            burst_window_seconds=float(os.getenv("HUBSPOT_BURST_WINDOW_SECONDS", "10"))
+        )
+        
+        # Requests rejected for rate limits are requeued instead of dropped. One worker
+        # thread retries them in FIFO order as the token bucket refills; only real
+        # HubSpot 429s count against max_requeue_attempts.
+        self.max_requeue_attempts = int(os.getenv("HUBSPOT_MAX_REQUEUE_ATTEMPTS", "5"))
+        self.requeue_stats = {"pending": 0, "requeued_total": 0, "exhausted_total": 0}
+        self._requeue_lock = threading.Lock()
+        self._requeue_ready = threading.Condition(self._requeue_lock)
+        # (func, args, attempt, context)
+        self._requeue: deque = deque()
+        self._requeue_worker: Optional[threading.Thread] = None
+        # Monotonic time before which HubSpot asked us (via Retry-After) not to call again
+        self._paused_until = 0.0
+        
         # Enhanced logging for debugging
         if not self.api_key:
             logger.warning("HUBSPOT_API_KEY not found. HubSpot integration disabled.")
@@ -34,9 +60,78 @@ class HubSpotService:
         
         if not self.api_key or self.api_key == "your_hubspot_api_key_here":
             logger.warning("HubSpot disabled - API key not properly configured")
-            logger.info("Would create contact with data: %s", contact_data)
+            logger.info("Would create contact", extra={"contact": contact_data})
             return {"success": False, "error": "HubSpot API key not configured"}
         
+        return self._call_with_requeue(self._upsert_contact, contact_data)
+    
+    def submit_lead(
+        self,
+        contact_data: Dict[str, Any],
+        deal_data: Optional[Dict[str, Any]] = None,
+        contact_id: Optional[str] = None,
+        create_missing: bool = True,
+        on_contact: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Create or update a contact and optionally attach a deal, requeueing on rate limits
+        
+        Args:
+            contact_data: Contact fields
+            deal_data: Deal to create for the contact
+            contact_id: HubSpot contact to update (skips the email/phone lookup)
+            create_missing: Create a contact when none matches
+            on_contact: Called with the contact ID once the contact is written (possibly after a requeue)
+        """
+        
+        if not self.api_key or self.api_key == "your_hubspot_api_key_here":
+            logger.warning("HubSpot disabled - API key not properly configured")
+            return {"success": False, "error": "HubSpot API key not configured"}
+        
+        return self._call_with_requeue(
+            self._submit_lead, contact_data, deal_data, contact_id, create_missing, on_contact
+        )
+    
+    def _submit_lead(
+        self,
+        contact_data: Dict[str, Any],
+        deal_data: Optional[Dict[str, Any]] = None,
+        contact_id: Optional[str] = None,
+        create_missing: bool = True,
+        on_contact: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """Contact upsert followed by deal creation - the deal is requeued on its own"""
+        result = self._upsert_contact(contact_data, contact_id, create_missing)
+        
+        if result.get("success") and on_contact:
+            try:
+                on_contact(result.get("contact_id"))
+            except Exception as e:
+                logger.error(f"HubSpot contact callback failed: {str(e)}")
+        
+        if result.get("success") and deal_data:
+            # Contact is already written, so only the deal is retried if HubSpot pushes back
+            result["deal"] = self._call_with_requeue(
+                self._create_deal_for_contact,
+                result.get("contact_id"),
+                deal_data
+            )
+        
+        return result
+    
+    def _upsert_contact(
+        self,
+        contact_data: Dict[str, Any],
+        contact_id: Optional[str] = None,
+        create_missing: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Create or update a contact (raises HubSpotRateLimitError so callers can requeue)
+        
+        The contact is found by contact_id when given, otherwise by email, or by
+        phone for leads that never gave an email.
+        """
+        
         # Prepare contact properties for HubSpot
         properties = {
             "email": contact_data.get("email"),
@@ -67,23 +162,26 @@ class HubSpotService:
         properties = {k: v for k, v in properties.items() if v is not None and v != ""}
         
         try:
-            # Try to find existing contact by email first
-            email = contact_data.get("email")
-            if email:
-                existing_contact = self._get_contact_by_email(email)
-                if existing_contact:
-                    # Update existing contact
-                    contact_id = existing_contact["id"]
-                    response = self._update_contact(contact_id, properties)
-                    if response:
-                        logger.info(f"Updated HubSpot contact: {contact_id}")
-                        
-                        # Create note with business context
-                        note_content = self._build_contact_notes(contact_data)
-                        self._create_note(contact_id, note_content)
-                        
-                        return {"success": True, "contact_id": contact_id, "action": "updated"}
-                
+            if not contact_id:
+                existing_contact = self._find_contact(contact_data.get("email"), contact_data.get("phone"))
+                contact_id = existing_contact["id"] if existing_contact else None
+            
+            if contact_id:
+                # Update existing contact
+                response = self._update_contact(contact_id, properties)
+                if response:
+                    logger.info(f"Updated HubSpot contact: {contact_id}")
+                    
+                    # Create note with business context
+                    note_content = self._build_contact_notes(contact_data)
+                    self._call_with_requeue(self._create_note, contact_id, note_content)
+                    
+                    return {"success": True, "contact_id": contact_id, "action": "updated"}
+            
+            if not create_missing:
+                logger.info("No matching HubSpot contact - update skipped")
+                return {"success": False, "error": "Contact not found"}
+            
             # Create new contact
             response = self._create_contact(properties)
             if response:
@@ -92,10 +190,12 @@ class HubSpotService:
                 
                 # Create note with business context
                 note_content = self._build_contact_notes(contact_data)
-                self._create_note(contact_id, note_content)
+                self._call_with_requeue(self._create_note, contact_id, note_content)
                 
                 return {"success": True, "contact_id": contact_id, "action": "created"}
                 
+        except HubSpotRateLimitError:
+            raise
         except Exception as e:
             logger.error(f"Error creating/updating HubSpot contact: {str(e)}")
             return {"success": False, "error": str(e)}
@@ -109,6 +209,11 @@ class HubSpotService:
             logger.info("HubSpot disabled - would create deal: %s", deal_data)
             return {"success": False, "error": "HubSpot API key not configured"}
         
+        return self._call_with_requeue(self._create_deal_for_contact, contact_id, deal_data)
+    
+    def _create_deal_for_contact(self, contact_id: str, deal_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a deal and associate it (raises HubSpotRateLimitError so callers can requeue)"""
+        
         # Calculate deal value
         deal_value = self._estimate_deal_value(
             deal_data.get("services", []),
@@ -133,8 +238,8 @@ class HubSpotService:
             if response:
                 deal_id = response.get("id")
                 
-                # Associate deal with contact
-                self._associate_deal_with_contact(deal_id, contact_id)
+                # Associate deal with contact - retried on its own so the deal is never duplicated
+                self._call_with_requeue(self._associate_deal_with_contact, deal_id, contact_id)
                 
                 logger.info(f"Created HubSpot deal: {deal_id} with value ${deal_value}")
                 return {
@@ -143,6 +248,8 @@ class HubSpotService:
                     "estimated_value": deal_value
                 }
                 
+        except HubSpotRateLimitError:
+            raise
         except Exception as e:
             logger.error(f"Error creating HubSpot deal: {str(e)}")
             return {"success": False, "error": str(e)}
@@ -177,21 +284,143 @@ class HubSpotService:
         
         return {"success": False, "error": "Contact not found"}
     
+    def get_rate_limit_status(self) -> Dict[str, Any]:
+        """Current HubSpot rate-limit budget and requeue backlog (for admin stats)"""
+        return {
+            "enabled": bool(self.api_key and self.api_key != "your_hubspot_api_key_here"),
+            **self.client.get_budget(),
+            "requeue": dict(self.requeue_stats)
+        }
+    
+    def _call_with_requeue(self, func: Callable, *args, attempt: int = 0) -> Any:
+        """Run a HubSpot operation, queueing it for the retry worker if rate limited"""
+        with self._requeue_lock:
+            # Don't jump ahead of operations already waiting for a token
+            backlog = bool(self._requeue) or self._paused_until > time.monotonic()
+        if backlog:
+            e = HubSpotRateLimitError(self._next_requeue_delay(), "HubSpot requeue backlog", local=True)
+            self._requeue_after(func, args, attempt, e, front=False)
+            return {"success": False, "queued": True, "retry_after": e.retry_after}
+        
+        try:
+            return func(*args)
+        except HubSpotRateLimitError as e:
+            if not self._requeue_after(func, args, attempt, e, front=False):
+                return {"success": False, "error": "HubSpot rate limit - requeue attempts exhausted"}
+            
+            logger.warning(f"HubSpot {func.__name__} requeued ({str(e)})")
+            return {"success": False, "queued": True, "retry_after": e.retry_after}
+    
+    def _requeue_after(
+        self,
+        func: Callable,
+        args: tuple,
+        attempt: int,
+        error: HubSpotRateLimitError,
+        front: bool
+    ) -> bool:
+        """
+        Put a rate-limited operation on the retry queue
+        
+        Returns:
+            False if HubSpot has rejected it too many times and it was dropped
+        """
+        if not error.local:
+            if attempt >= self.max_requeue_attempts:
+                with self._requeue_lock:
+                    self.requeue_stats["exhausted_total"] += 1
+                logger.error(f"HubSpot {func.__name__} dropped after {attempt} requeue attempts: {str(error)}")
+                return False
+            attempt += 1
+        
+        # Timer-free retries still run under the caller's trace ID
+        item = (func, args, attempt, contextvars.copy_context())
+        with self._requeue_ready:
+            # A 429 pauses everything; a retry that still hit the local bucket waits it out too
+            if not error.local or front:
+                self._paused_until = max(self._paused_until, time.monotonic() + error.retry_after)
+            if front:
+                self._requeue.appendleft(item)
+            else:
+                self._requeue.append(item)
+                self.requeue_stats["requeued_total"] += 1
+            self.requeue_stats["pending"] = len(self._requeue)
+            
+            if self._requeue_worker is None or not self._requeue_worker.is_alive():
+                self._requeue_worker = threading.Thread(
+                    target=self._run_requeue_worker, name="hubspot-requeue", daemon=True
+                )
+                self._requeue_worker.start()
+            self._requeue_ready.notify()
+        return True
+    
+    def _next_requeue_delay(self) -> float:
+        """Seconds until the worker may send again (Retry-After pause and local bucket)"""
+        return max(self._paused_until - time.monotonic(), self.client.bucket.wait_time())
+    
+    def _run_requeue_worker(self):
+        """Retry queued operations oldest first, each once a token is available"""
+        while True:
+            with self._requeue_ready:
+                while not self._requeue:
+                    self._requeue_ready.wait()
+                delay = self._next_requeue_delay()
+                if delay > 0:
+                    # Re-checked on wake-up - a new 429 may have extended the pause
+                    self._requeue_ready.wait(timeout=delay)
+                    continue
+                func, args, attempt, context = self._requeue.popleft()
+                self.requeue_stats["pending"] = len(self._requeue)
+            
+            try:
+                context.run(func, *args)
+            except HubSpotRateLimitError as e:
+                # Goes back to the head of the queue, so FIFO order is kept
+                self._requeue_after(func, args, attempt, e, front=True)
+            except Exception as e:
+                logger.error(f"Requeued HubSpot {func.__name__} failed: {str(e)}")
+    
+    def _find_contact(self, email: Optional[str], phone: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Existing contact for an email, or for a phone number when there is no email"""
+        if email:
+            return self._get_contact_by_email(email)
+        if phone:
+            return self._get_contact_by_phone(phone)
+        return None
+    
+    def _get_contact_by_phone(self, phone: str) -> Optional[Dict[str, Any]]:
+        """Get contact by phone number (search API)"""
+        
+        if not phone or not self.api_key:
+            return None
+        
+        try:
+            response = self.client.post("/crm/v3/objects/contacts/search", json={
+                "filterGroups": [{"filters": [{"propertyName": "phone", "operator": "EQ", "value": phone}]}],
+                "limit": 1
+            })
+            
+            if response.status_code == 200:
+                results = response.json().get("results") or []
+                return results[0] if results else None
+            else:
+                logger.error(f"Error searching contact by phone: {response.status_code} - {response.text}")
+                return None
+        except HubSpotRateLimitError:
+            raise
+        except Exception as e:
+            logger.error(f"Error fetching contact by phone: {str(e)}")
+            return None
+    
     def _get_contact_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """Get contact by email address"""
         
         if not email or not self.api_key:
             return None
         
-        url = f"{self.base_url}/crm/v3/objects/contacts/{email}?idProperty=email"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         try:
             logger.debug(f"Fetching contact by email: {email}")
-            response = requests.get(url, headers=headers)
+            response = self.client.get(f"/crm/v3/objects/contacts/{email}", params={"idProperty": "email"})
             logger.debug(f"HubSpot API response status: {response.status_code}")
             
             if response.status_code == 200:
@@ -202,6 +431,8 @@ class HubSpotService:
             else:
                 logger.error(f"Error fetching contact: {response.status_code} - {response.text}")
                 return None
+        except HubSpotRateLimitError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching contact by email: {str(e)}")
             return None
@@ -209,18 +440,12 @@ class HubSpotService:
     def _create_contact(self, properties: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create new contact in HubSpot"""
         
-        url = f"{self.base_url}/crm/v3/objects/contacts"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {"properties": properties}
         
         logger.info(f"Creating new contact in HubSpot with email: {properties.get('email')}")
-        logger.debug(f"Contact properties: {properties}")
+        logger.debug("Contact properties", extra={"properties": properties})
         
-        response = requests.post(url, headers=headers, json=payload)
+        response = self.client.post("/crm/v3/objects/contacts", json=payload)
         logger.debug(f"HubSpot API response status: {response.status_code}")
         
         if response.status_code == 201:
@@ -234,15 +459,9 @@ class HubSpotService:
     def _update_contact(self, contact_id: str, properties: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update existing contact in HubSpot"""
         
-        url = f"{self.base_url}/crm/v3/objects/contacts/{contact_id}"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {"properties": properties}
         
-        response = requests.patch(url, headers=headers, json=payload)
+        response = self.client.patch(f"/crm/v3/objects/contacts/{contact_id}", json=payload)
         if response.status_code == 200:
             return response.json()
         else:
@@ -252,15 +471,9 @@ class HubSpotService:
     def _create_deal(self, properties: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create deal in HubSpot"""
         
-        url = f"{self.base_url}/crm/v3/objects/deals"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {"properties": properties}
         
-        response = requests.post(url, headers=headers, json=payload)
+        response = self.client.post("/crm/v3/objects/deals", json=payload)
         if response.status_code == 201:
             return response.json()
         else:
@@ -270,15 +483,11 @@ class HubSpotService:
     def _associate_deal_with_contact(self, deal_id: str, contact_id: str) -> bool:
         """Associate deal with contact"""
         
-        url = f"{self.base_url}/crm/v3/objects/deals/{deal_id}/associations/contacts/{contact_id}/3"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         try:
-            response = requests.put(url, headers=headers)
+            response = self.client.put(f"/crm/v3/objects/deals/{deal_id}/associations/contacts/{contact_id}/3")
             return response.status_code == 200
+        except HubSpotRateLimitError:
+            raise
         except Exception as e:
             logger.error(f"Error associating deal with contact: {str(e)}")
             return False
@@ -434,12 +643,6 @@ Generated from authentic Hawaiian business conversation."""
         
         try:
             # Create note using the Notes API
-            url = f"{self.base_url}/crm/v3/objects/notes"
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             payload = {
                 "properties": {
                     "hs_note_body": note_content,
@@ -458,7 +661,7 @@ Generated from authentic Hawaiian business conversation."""
                 ]
             }
             
-            response = requests.post(url, headers=headers, json=payload)
+            response = self.client.post("/crm/v3/objects/notes", json=payload)
             
             if response.status_code == 201:
                 logger.info(f"Created note for contact {contact_id}")
@@ -467,6 +670,8 @@ Generated from authentic Hawaiian business conversation."""
                 logger.error(f"Failed to create note: {response.status_code} - {response.text}")
                 return False
                 
+        except HubSpotRateLimitError:
+            raise
         except Exception as e:
             logger.error(f"Error creating note: {str(e)}")
             return False
@@ -3,17 +3,26 @@ Lead Capture Service - Sends qualified leads to Reno via email and HubSpot
 """
 import os
 import logging
+import asyncio
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Dict, Any, Optional
-from datetime import datetime
+from typing import Dict, Any, Optional, Set, Tuple
+from datetime import datetime, timedelta
 import pytz
 import requests
 import json
 
+from api_backend.services.tracing import trace_headers
+
 logger = logging.getLogger(__name__)
 
+# Fields that describe the capture itself rather than the person - never treated as new information
+MERGE_IGNORED_FIELDS = {
+    "lead_id", "captured_at", "updated_at", "conversation_summary", "message_count",
+    "qualification_score", "lead_quality", "session_count", "hubspot_contact_id"
+}
+
 
 class LeadCaptureService:
     """Captures and sends qualified leads to Reno"""
@@ -34,13 +43,23 @@ class LeadCaptureService:
         # Hawaii timezone
         self.hawaii_tz = pytz.timezone('Pacific/Honolulu')
         
+        # Leads with the same email/phone captured within this window are merged (0 disables)
+        self.dedup_window_days = float(os.getenv("LEAD_DEDUP_WINDOW_DAYS", "30"))
+        
+        # Post-capture field updates are coalesced per lead into one CRM sync after a quiet period
+        self.update_debounce_seconds = float(os.getenv("LEAD_UPDATE_DEBOUNCE_SECONDS", "30"))
+        self._pending_updates: Dict[str, Dict[str, Any]] = {}
+        self._update_timers: Dict[str, asyncio.TimerHandle] = {}
+        self._flush_tasks: Set[asyncio.Task] = set()
+        
         logger.info("Lead Capture Service initialized")
     
     async def capture_lead(
         self,
         lead_data: Dict[str, Any],
         conversation_summary: str,
-        qualification_score: int = 0
+        qualification_score: int = 0,
+        session_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Capture and send lead information
@@ -49,16 +68,28 @@ class LeadCaptureService:
             lead_data: Dictionary containing lead information
             conversation_summary: Summary of the chat conversation
             qualification_score: Lead quality score (0-100)
+            session_id: Chat session the lead came from
         
         Returns:
             Status of lead capture
         """
         try:
-            logger.info(f"Attempting to capture lead with data: {lead_data}")
+            logger.info("Attempting to capture lead", extra={"lead": lead_data})
             
             # Enrich lead data
             enriched_lead = self._enrich_lead_data(lead_data, conversation_summary, qualification_score)
-            logger.info(f"Enriched lead data: {enriched_lead}")
+            logger.debug("Enriched lead data", extra={"lead": enriched_lead})
+            
+            # Same person from another session - merge instead of creating a second lead
+            existing_lead = self._find_existing_lead(enriched_lead)
+            if existing_lead:
+                return await self._merge_lead(existing_lead, enriched_lead)
+            
+            # Store first so the dedup index sees this lead before any other session does
+            self._log_lead(enriched_lead)
+            
+            from api_backend.services.postgres_store import postgres_store
+            postgres_store.record_lead(enriched_lead, session_id)
             
             # Send via email
             email_sent = await self._send_email_notification(enriched_lead)
@@ -76,19 +107,15 @@ class LeadCaptureService:
             # Send to webhook if configured
             webhook_sent = False
             try:
-                from .webhook_lead_capture import WebhookLeadCapture, create_zapier_friendly_lead
-                webhook_service = WebhookLeadCapture()
+                from api_backend.services.webhook_lead_capture import webhook_lead_capture, create_zapier_friendly_lead
                 zapier_lead = create_zapier_friendly_lead(enriched_lead)
-                webhook_result = await webhook_service.send_lead(zapier_lead)
+                webhook_result = await webhook_lead_capture.send_lead(zapier_lead)
                 webhook_sent = webhook_result.get("success", False)
                 if webhook_sent:
                     logger.info("Lead sent to webhook successfully")
             except Exception as e:
                 logger.warning(f"Webhook send failed: {str(e)}")
             
-            # Log the lead locally
-            self._log_lead(enriched_lead)
-            
             return {
                 "success": True,
                 "email_sent": email_sent,
@@ -105,6 +132,237 @@ class LeadCaptureService:
                 "message": "Failed to capture lead, but don't worry - we'll follow up!"
             }
     
+    def _find_existing_lead(self, lead_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Look up an earlier lead for the same email or phone inside the merge window"""
+        if self.dedup_window_days <= 0:
+            return None
+        
+        try:
+            from api_backend.services.lead_store import lead_store
+            
+            since = (datetime.now(self.hawaii_tz) - timedelta(days=self.dedup_window_days)).timestamp()
+            return lead_store.find_duplicate(lead_data.get("email"), lead_data.get("phone"), since=since)
+        except Exception as e:
+            logger.error(f"Lead dedup lookup failed: {str(e)}")
+            return None
+    
+    def _merge_fields(
+        self,
+        existing: Dict[str, Any],
+        incoming: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Fold a new capture into an existing lead
+        
+        Returns:
+            (merged lead, delta of fields that are new or changed)
+        """
+        from api_backend.services.lead_store import normalize_email, normalize_phone
+        
+        delta = {
+            k: v for k, v in incoming.items()
+            if k not in MERGE_IGNORED_FIELDS and v not in (None, "") and existing.get(k) != v
+        }
+        # Contact details on file identify the lead (and its CRM contact) - only missing ones are filled in
+        for key, normalize in (("email", normalize_email), ("phone", normalize_phone)):
+            if key in delta and existing.get(key):
+                if normalize(delta[key]) != normalize(existing[key]):
+                    logger.info(f"Lead {existing.get('lead_id')} captured with a different {key} - keeping the one on file")
+                del delta[key]
+        
+        merged = {**existing, **delta}
+        merged["conversation_summary"] = incoming.get("conversation_summary") or existing.get("conversation_summary", "")
+        merged["message_count"] = existing.get("message_count", 0) + incoming.get("message_count", 0)
+        merged["session_count"] = existing.get("session_count", 1) + 1
+        merged["updated_at"] = datetime.now(self.hawaii_tz).isoformat()
+        
+        # Quality only ever goes up
+        if incoming.get("qualification_score", 0) > existing.get("qualification_score", 0):
+            for key in ("qualification_score", "lead_quality"):
+                merged[key] = incoming[key]
+                delta[key] = incoming[key]
+        
+        return merged, delta
+    
+    async def _merge_lead(self, existing: Dict[str, Any], incoming: Dict[str, Any]) -> Dict[str, Any]:
+        """Update the existing lead and send only what changed downstream"""
+        from api_backend.services.lead_store import lead_store
+        
+        from api_backend.services.postgres_store import postgres_store
+        
+        merged, delta = self._merge_fields(existing, incoming)
+        lead_store.update_lead(merged)
+        postgres_store.record_lead_update(merged)
+        logger.info(f"Merged capture into existing lead {merged['lead_id']} - changed fields: {list(delta)}")
+        
+        hubspot_sent = False
+        if delta:
+            hubspot_sent = await self._send_lead_delta(merged, delta, existing.get("qualification_score", 0))
+        
+        return {
+            "success": True,
+            "email_sent": False,
+            "hubspot_sent": hubspot_sent,
+            "lead_id": merged["lead_id"],
+            "merged": True,
+            "changed_fields": list(delta),
+            "message": "Lead updated successfully!"
+        }
+    
+    async def _send_lead_delta(self, lead: Dict[str, Any], delta: Dict[str, Any], previous_score: int) -> bool:
+        """Push changed fields to HubSpot and the webhooks (no repeat email notification)"""
+        hubspot_sent = False
+        if self.hubspot_api_key and self.hubspot_api_key != "your_hubspot_api_key_here":
+            # Update the contact this lead was synced to; without one, match on email or phone
+            update = {**delta, "email": lead.get("email"), "phone": lead.get("phone"), "lead_id": lead["lead_id"]}
+            
+            # Only create a deal the first time the lead crosses the deal threshold
+            create_deal = previous_score < 70 <= lead.get("qualification_score", 0)
+            if create_deal:
+                for key in ("company", "location", "business_type", "timeline"):
+                    update.setdefault(key, lead.get(key))
+            hubspot_sent = await self._create_hubspot_contact(
+                update,
+                create_deal=create_deal,
+                contact_id=lead.get("hubspot_contact_id"),
+                # A phone-only lead that can't be matched is skipped rather than created again
+                create_missing=bool(lead.get("email"))
+            )
+        
+        try:
+            from api_backend.services.webhook_lead_capture import webhook_lead_capture
+            webhook_result = await webhook_lead_capture.send_lead({
+                "event": "lead_updated",
+                "lead_id": lead["lead_id"],
+                "name": lead.get("name", ""),
+                "email": lead.get("email", ""),
+                "phone": lead.get("phone", ""),
+                "changes": delta
+            })
+            if webhook_result.get("success"):
+                logger.info(f"Lead update sent to webhook: {lead['lead_id']}")
+        except Exception as e:
+            logger.warning(f"Webhook update send failed: {str(e)}")
+        
+        return hubspot_sent
+    
+    def queue_lead_update(
+        self,
+        lead_id: str,
+        fields: Dict[str, Any],
+        qualification_score: Optional[int] = None
+    ) -> bool:
+        """
+        Apply fields learned after capture to the stored lead right away and
+        (re)start the lead's debounce timer for the downstream sync
+        
+        Returns:
+            True if anything changed
+        """
+        try:
+            from api_backend.services.lead_store import lead_store
+            
+            lead = lead_store.get_lead(lead_id)
+            if lead is None:
+                logger.warning(f"Lead update for unknown lead {lead_id} ignored")
+                return False
+            
+            changes = {
+                k: v for k, v in fields.items()
+                if k not in MERGE_IGNORED_FIELDS and v not in (None, "") and lead.get(k) != v
+            }
+            # The email/phone on file keys the CRM contact - later mentions only fill in missing ones
+            for key in ("email", "phone"):
+                if key in changes and lead.get(key):
+                    del changes[key]
+            if qualification_score is not None and qualification_score > lead.get("qualification_score", 0):
+                changes["qualification_score"] = qualification_score
+                changes["lead_quality"] = self._quality_label(qualification_score)
+            if not changes:
+                return False
+            
+            # First change in this burst remembers the score the CRM last saw
+            pending = self._pending_updates.setdefault(lead_id, {
+                "changes": {},
+                "previous_score": lead.get("qualification_score", 0)
+            })
+            pending["changes"].update(changes)
+            
+            lead.update(changes)
+            lead["updated_at"] = datetime.now(self.hawaii_tz).isoformat()
+            lead_store.update_lead(lead)
+            
+            from api_backend.services.postgres_store import postgres_store
+            postgres_store.record_lead_update(lead)
+            logger.info(f"Lead {lead_id} updated with {list(changes)} - CRM sync in {self.update_debounce_seconds}s")
+            
+            self._schedule_update_flush(lead_id)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to update lead {lead_id}: {str(e)}", exc_info=True)
+            return False
+    
+    def _schedule_update_flush(self, lead_id: str):
+        """Restart the per-lead quiet-period timer"""
+        handle = self._update_timers.pop(lead_id, None)
+        if handle:
+            handle.cancel()
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop - left pending for flush_pending_updates()
+            return
+        
+        def fire():
+            self._update_timers.pop(lead_id, None)
+            task = loop.create_task(self.flush_lead_update(lead_id))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        
+        self._update_timers[lead_id] = loop.call_later(self.update_debounce_seconds, fire)
+    
+    async def flush_lead_update(self, lead_id: str) -> bool:
+        """Send a lead's accumulated changes downstream now"""
+        handle = self._update_timers.pop(lead_id, None)
+        if handle:
+            handle.cancel()
+        
+        pending = self._pending_updates.pop(lead_id, None)
+        if not pending:
+            return False
+        
+        try:
+            from api_backend.services.lead_store import lead_store
+            
+            lead = lead_store.get_lead(lead_id)
+            if lead is None:
+                return False
+            
+            logger.info(f"Syncing coalesced update for lead {lead_id}: {list(pending['changes'])}")
+            await self._send_lead_delta(lead, pending["changes"], pending["previous_score"])
+            return True
+        except Exception as e:
+            logger.error(f"Failed to sync update for lead {lead_id}: {str(e)}", exc_info=True)
+            return False
+    
+    async def flush_pending_updates(self):
+        """Sync every debounced update immediately (used at shutdown)"""
+        for lead_id in list(self._pending_updates):
+            await self.flush_lead_update(lead_id)
+    
+    def _quality_label(self, qualification_score: int) -> str:
+        """Display quality for a qualification score"""
+        if qualification_score >= 80:
+            return "🔥 HOT - Ready to buy"
+        elif qualification_score >= 60:
+            return "🌟 WARM - High interest"
+        elif qualification_score >= 40:
+            return "💫 COOL - Needs nurturing"
+        else:
+            return "❄️ COLD - Early stage"
+    
     def _enrich_lead_data(
         self,
         lead_data: Dict[str, Any],
@@ -112,10 +370,13 @@ class LeadCaptureService:
         qualification_score: int
     ) -> Dict[str, Any]:
         """Enrich lead data with additional information"""
+        from api_backend.services.lead_ids import new_lead_id
+        
         hawaii_time = datetime.now(self.hawaii_tz)
         
         enriched = {
-            "lead_id": f"lead_{hawaii_time.strftime('%Y%m%d_%H%M%S')}",
+            # Unique even for bursts of captures in the same second, and sorts by capture time
+            "lead_id": new_lead_id(int(hawaii_time.timestamp() * 1000)),
             "captured_at": hawaii_time.isoformat(),
             "qualification_score": qualification_score,
             "conversation_summary": conversation_summary,
@@ -123,14 +384,7 @@ class LeadCaptureService:
         }
         
         # Add lead quality rating
-        if qualification_score >= 80:
-            enriched["lead_quality"] = "🔥 HOT - Ready to buy"
-        elif qualification_score >= 60:
-            enriched["lead_quality"] = "🌟 WARM - High interest"
-        elif qualification_score >= 40:
-            enriched["lead_quality"] = "💫 COOL - Needs nurturing"
-        else:
-            enriched["lead_quality"] = "❄️ COLD - Early stage"
+        enriched["lead_quality"] = self._quality_label(qualification_score)
         
         return enriched
     
@@ -216,7 +470,7 @@ class LeadCaptureService:
     async def _send_to_hubspot(self, lead_data: Dict[str, Any]) -> bool:
         """Send lead to HubSpot CRM"""
         try:
-            logger.info(f"_send_to_hubspot called with lead: {lead_data.get('email')}")
+            logger.info("_send_to_hubspot called for lead %s", lead_data.get("lead_id"))
             
             if not self.hubspot_form_guid:
                 logger.info("No HubSpot form GUID - using Contacts API instead")
@@ -243,7 +497,7 @@ class LeadCaptureService:
                 }
             }
             
-            response = requests.post(form_url, json=form_data)
+            response = requests.post(form_url, json=form_data, headers=trace_headers())
             response.raise_for_status()
             
             logger.info(f"Lead sent to HubSpot successfully: {lead_data.get('lead_id')}")
@@ -253,8 +507,14 @@ class LeadCaptureService:
             logger.error(f"Failed to send to HubSpot: {str(e)}")
             return False
     
-    async def _create_hubspot_contact(self, lead_data: Dict[str, Any]) -> bool:
-        """Create HubSpot contact using the HubSpot service"""
+    async def _create_hubspot_contact(
+        self,
+        lead_data: Dict[str, Any],
+        create_deal: Optional[bool] = None,
+        contact_id: Optional[str] = None,
+        create_missing: bool = True
+    ) -> bool:
+        """Create (or update, given its contact ID) the HubSpot contact using the HubSpot service"""
         try:
             logger.info("Creating HubSpot contact via HubSpot service...")
             from api_backend.services.hubspot_service import hubspot_service
@@ -276,33 +536,44 @@ class LeadCaptureService:
                 "community_minded": lead_data.get("community_minded", True),
             }
             
-            # Create or update contact
-            logger.info(f"Calling hubspot_service.create_or_update_contact with email: {contact_data.get('email')}")
-            result = hubspot_service.create_or_update_contact(contact_data)
-            logger.info(f"HubSpot service result: {result}")
+            # If high score, also create a deal
+            if create_deal is None:
+                create_deal = lead_data.get("qualification_score", 0) >= 70
+            deal_data = None
+            if create_deal:
+                deal_data = {
+                    "company_name": lead_data.get("company", "Hawaiian Business"),
+                    "services": ["AI Chatbot", "Consulting"],
+                    "timeline": lead_data.get("timeline", "Not specified"),
+                    "island": lead_data.get("location"),
+                    "business_type": lead_data.get("business_type"),
+                    "primary_service": "AI Solutions"
+                }
+            
+            # Create or update contact (and deal) - rate-limited calls are requeued, not dropped
+            logger.info("Calling hubspot_service.submit_lead for lead %s", lead_data.get("lead_id"))
+            lead_id = lead_data.get("lead_id")
+            result = hubspot_service.submit_lead(
+                contact_data,
+                deal_data,
+                contact_id=contact_id,
+                create_missing=create_missing,
+                on_contact=lambda new_contact_id: self._remember_hubspot_contact(lead_id, new_contact_id)
+            )
+            logger.info("HubSpot service result", extra={"result": result})
             
             if result.get("success"):
                 logger.info(f"Lead sent to HubSpot successfully: {lead_data.get('lead_id')} - Contact ID: {result.get('contact_id')}")
                 
-                # If high score, also create a deal
-                if lead_data.get("qualification_score", 0) >= 70:
-                    deal_data = {
-                        "company_name": lead_data.get("company", "Hawaiian Business"),
-                        "services": ["AI Chatbot", "Consulting"],
-                        "timeline": lead_data.get("timeline", "Not specified"),
-                        "island": lead_data.get("location"),
-                        "business_type": lead_data.get("business_type"),
-                        "primary_service": "AI Solutions"
-                    }
-                    
-                    deal_result = hubspot_service.create_deal(
-                        result.get("contact_id"),
-                        deal_data
-                    )
-                    
-                    if deal_result.get("success"):
-                        logger.info(f"Deal created in HubSpot: {deal_result.get('deal_id')}")
+                deal_result = result.get("deal") or {}
+                if deal_result.get("success"):
+                    logger.info(f"Deal created in HubSpot: {deal_result.get('deal_id')}")
+                elif deal_result.get("queued"):
+                    logger.info(f"HubSpot deal requeued for lead {lead_data.get('lead_id')}")
                 
+                return True
+            elif result.get("queued"):
+                logger.warning(f"HubSpot rate limited - lead {lead_data.get('lead_id')} requeued in {result.get('retry_after', 0):.1f}s")
                 return True
             else:
                 logger.error(f"Failed to create HubSpot contact: {result.get('error')}")
@@ -312,6 +583,22 @@ class LeadCaptureService:
             logger.error(f"Error creating HubSpot contact: {str(e)}", exc_info=True)
             return False
     
+    def _remember_hubspot_contact(self, lead_id: Optional[str], contact_id: Optional[str]):
+        """Store the lead's HubSpot contact ID so later updates go to the same contact"""
+        if not lead_id or not contact_id:
+            return
+        
+        try:
+            from api_backend.services.lead_store import lead_store
+            
+            lead = lead_store.get_lead(lead_id)
+            if lead is None or lead.get("hubspot_contact_id") == contact_id:
+                return
+            lead["hubspot_contact_id"] = contact_id
+            lead_store.update_lead(lead)
+        except Exception as e:
+            logger.error(f"Failed to store HubSpot contact for lead {lead_id}: {str(e)}")
+    
     def _get_follow_up_recommendation(self, lead_data: Dict[str, Any]) -> str:
         """Get follow-up recommendation based on lead quality"""
         score = lead_data.get("qualification_score", 0)
@@ -326,49 +613,15 @@ class LeadCaptureService:
             return "Add to nurture campaign. Not ready for direct sales."
     
     def _log_lead(self, lead_data: Dict[str, Any]):
-        """Log lead information locally"""
+        """Persist lead information in the local lead store"""
         try:
-            log_dir = "logs/leads"
+            from api_backend.services.lead_store import lead_store
             
-            # Try to create directory with detailed error handling
-            try:
-                os.makedirs(log_dir, exist_ok=True)
-                logger.info(f"Directory ensured: {log_dir}")
-            except Exception as mkdir_error:
-                logger.error(f"Failed to create directory {log_dir}: {str(mkdir_error)}")
-                # Try alternative approach
-                try:
-                    # Create parent first
-                    os.makedirs("logs", exist_ok=True)
-                    os.makedirs(log_dir, exist_ok=True)
-                except Exception as alt_error:
-                    logger.error(f"Alternative directory creation failed: {str(alt_error)}")
-                    raise
-            
-            # Verify directory exists
-            if not os.path.exists(log_dir):
-                logger.error(f"Directory {log_dir} does not exist after creation attempt")
-                raise Exception(f"Directory {log_dir} could not be created")
-            
-            log_file = os.path.join(log_dir, f"{lead_data.get('lead_id')}.json")
-            
-            # Write file with explicit error handling
-            try:
-                with open(log_file, 'w') as f:
-                    json.dump(lead_data, f, indent=2)
-                logger.info(f"Lead successfully logged to {log_file}")
-                
-                # Verify file was written
-                if os.path.exists(log_file):
-                    file_size = os.path.getsize(log_file)
-                    logger.info(f"Lead file created: {log_file} (size: {file_size} bytes)")
-                else:
-                    logger.error(f"Lead file not found after write: {log_file}")
-                    
-            except Exception as write_error:
-                logger.error(f"Failed to write lead file {log_file}: {str(write_error)}")
-                raise
+            if lead_store.save_lead(lead_data):
+                logger.info(f"Lead successfully stored: {lead_data.get('lead_id')}")
+            else:
+                logger.error(f"Lead {lead_data.get('lead_id')} already exists in the lead store - not overwritten")
                 
         except Exception as e:
             logger.error(f"Failed to log lead: {str(e)}", exc_info=True)
-            # Don't re-raise - we don't want to fail the whole lead capture just because of logging
\ No newline at end of file
+            # Don't re-raise - we don't want to fail the whole lead capture just because of logging
@@ -0,0 +1,107 @@
+"""
+Lead Export - Streaming CSV / NDJSON / JSON renderers for the admin export
+Each renderer pulls leads from an iterator and yields encoded chunks as it goes,
+so memory use stays flat no matter how many leads are exported
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator
+
+CSV_FIELDNAMES = [
+    'lead_id', 'captured_at', 'name', 'email', 'phone',
+    'company', 'business_type', 'location', 'main_challenge',
+    'budget_range', 'qualification_score', 'lead_quality',
+    'conversation_summary'
+]
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "json": ("application/json", "json"),
+}
+
+# Flush rendered rows to the response roughly this often
+CHUNK_SIZE = 64 * 1024
+
+
+def _chunked(pieces: Iterable[str]) -> Iterator[bytes]:
+    """Coalesce small strings into CHUNK_SIZE byte chunks"""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def _csv_rows(leads: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    # One small reusable buffer per export instead of the whole file in memory
+    line = io.StringIO()
+    writer = csv.DictWriter(line, fieldnames=CSV_FIELDNAMES, extrasaction="ignore")
+
+    writer.writeheader()
+    for lead in leads:
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+        writer.writerow({k: lead.get(k, '') for k in CSV_FIELDNAMES})
+    yield line.getvalue()
+
+
+def _ndjson_rows(leads: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for lead in leads:
+        yield json.dumps(lead, default=str) + "\n"
+
+
+def _json_rows(leads: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Same document shape as the old buffered export, with the total written last"""
+    yield '{"exported_at": ' + json.dumps(datetime.now().isoformat()) + ', "leads": ['
+    total = 0
+    for lead in leads:
+        yield ("," if total else "") + json.dumps(lead, default=str)
+        total += 1
+    yield '], "total": ' + str(total) + '}'
+
+
+RENDERERS = {
+    "csv": _csv_rows,
+    "ndjson": _ndjson_rows,
+    "json": _json_rows,
+}
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Incrementally gzip a byte stream"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        # Sync-flush each chunk so the client receives data as it is rendered
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def stream_leads(leads: Iterable[Dict[str, Any]], format: str, compress: bool = False) -> Iterator[bytes]:
+    """
+    Render leads in the requested export format
+
+    Args:
+        leads: Lead iterator, typically lead_store.iter_leads()
+        format: csv, ndjson or json
+        compress: Gzip the output
+
+    Raises:
+        ValueError: Unknown format
+    """
+    renderer = RENDERERS.get(format)
+    if renderer is None:
+        raise ValueError(f"Unsupported export format: {format}")
+
+    chunks = _chunked(renderer(leads))
+    return gzip_stream(chunks) if compress else chunks
@@ -0,0 +1,83 @@
+"""
+Lead IDs - ULID-style identifiers that sort by capture time
+48-bit millisecond timestamp + 80 random bits, Crockford base32 encoded (26 chars)
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+# Crockford's base32 alphabet (no I, L, O, U)
+ENCODING = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+DECODING = {c: i for i, c in enumerate(ENCODING)}
+
+LEAD_ID_PREFIX = "lead_"
+RANDOM_BITS = 80
+MAX_RANDOM = (1 << RANDOM_BITS) - 1
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        chars.append(ENCODING[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+class LeadIdGenerator:
+    """
+    Monotonic ULID generator
+
+    IDs created within the same millisecond reuse the timestamp and increment
+    the random part, so a burst of captures still yields unique, ordered IDs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def new_id(self, timestamp_ms: Optional[int] = None) -> str:
+        if timestamp_ms is None:
+            timestamp_ms = time.time_ns() // 1_000_000
+
+        with self._lock:
+            if timestamp_ms <= self._last_ms:
+                # Same (or an earlier, clock-skewed) millisecond - stay monotonic
+                timestamp_ms = self._last_ms
+                random_part = self._last_random + 1
+                if random_part > MAX_RANDOM:
+                    timestamp_ms += 1
+                    random_part = int.from_bytes(os.urandom(10), "big")
+            else:
+                random_part = int.from_bytes(os.urandom(10), "big")
+
+            self._last_ms = timestamp_ms
+            self._last_random = random_part
+
+        return LEAD_ID_PREFIX + _encode(timestamp_ms, 10) + _encode(random_part, 16)
+
+
+def lead_id_timestamp(lead_id: str) -> Optional[datetime]:
+    """Capture time embedded in a ULID lead ID (None for legacy timestamp IDs)"""
+    ulid = lead_id[len(LEAD_ID_PREFIX):] if lead_id.startswith(LEAD_ID_PREFIX) else lead_id
+    if len(ulid) != 26:
+        return None
+
+    try:
+        timestamp_ms = 0
+        for char in ulid[:10].upper():
+            timestamp_ms = timestamp_ms * 32 + DECODING[char]
+    except KeyError:
+        return None
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+
+
+# Create global instance
+lead_id_generator = LeadIdGenerator()
+
+
+def new_lead_id(timestamp_ms: Optional[int] = None) -> str:
+    """Generate a unique, time-sortable lead ID"""
+    return lead_id_generator.new_id(timestamp_ms)
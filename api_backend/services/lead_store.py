@@ -0,0 +1,666 @@
+"""
+Lead Store - Indexed SQLite (WAL) storage for captured leads
+Replaces the one-JSON-file-per-lead layout under logs/leads
+"""
+import os
+import re
+import json
+import base64
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    lead_id TEXT PRIMARY KEY,
+    captured_at TEXT NOT NULL,
+    captured_ts REAL NOT NULL,
+    quality TEXT NOT NULL,
+    qualification_score INTEGER NOT NULL DEFAULT 0,
+    location TEXT,
+    business_type TEXT,
+    email TEXT,
+    phone TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_leads_captured ON leads (captured_ts, lead_id);
+DROP INDEX IF EXISTS idx_leads_quality;
+DROP INDEX IF EXISTS idx_leads_location;
+DROP INDEX IF EXISTS idx_leads_business_type;
+CREATE INDEX IF NOT EXISTS idx_leads_quality_time ON leads (quality, captured_ts, lead_id);
+CREATE INDEX IF NOT EXISTS idx_leads_location_time ON leads (location COLLATE NOCASE, captured_ts, lead_id);
+CREATE INDEX IF NOT EXISTS idx_leads_business_type_time ON leads (business_type COLLATE NOCASE, captured_ts, lead_id);
+CREATE INDEX IF NOT EXISTS idx_leads_email ON leads (email, captured_ts);
+CREATE INDEX IF NOT EXISTS idx_leads_phone ON leads (phone, captured_ts);
+
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS lead_aggregates (
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (dimension, key)
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts USING fts5(
+    lead_id UNINDEXED,
+    name,
+    company,
+    email,
+    phone,
+    main_challenge,
+    conversation_summary,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+# bm25 weights per leads_fts column (lead_id first) - a hit on the name or company
+# outranks the same word somewhere in a conversation summary
+SEARCH_WEIGHTS = (0.0, 10.0, 8.0, 6.0, 6.0, 3.0, 1.0)
+
+# Dimensions kept as materialized counters: (dimension, leads column)
+AGGREGATE_DIMENSIONS = (
+    ("quality", "quality"),
+    ("location", "location"),
+    ("business_type", "business_type"),
+)
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """Dedup key for an email address"""
+    email = (email or "").strip().lower()
+    return email or None
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Dedup key for a phone number: digits only, with the US country code"""
+    digits = re.sub(r"\D", "", phone or "")
+    if len(digits) == 10:
+        digits = "1" + digits
+    # Too short to identify anyone reliably
+    return digits if len(digits) >= 7 else None
+
+
+def normalize_quality(lead_quality: Optional[str]) -> str:
+    """Map the display quality ("🔥 HOT - Ready to buy") to an indexable key"""
+    quality = (lead_quality or "").upper()
+    for key in ("HOT", "WARM", "COOL"):
+        if key in quality:
+            return key.lower()
+    return "cold"
+
+
+def encode_cursor(captured_ts: float, lead_id: str) -> str:
+    """Opaque page token pointing just past (captured_ts, lead_id)"""
+    raw = json.dumps([captured_ts, lead_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Inverse of encode_cursor; raises ValueError for tokens we did not issue"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        captured_ts, lead_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return float(captured_ts), str(lead_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into a safe FTS5 query: every word must match as a prefix"""
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _parse_timestamp(captured_at: Optional[str], fallback: Optional[float] = None) -> float:
+    """Epoch seconds for an ISO captured_at value"""
+    if captured_at:
+        try:
+            return datetime.fromisoformat(captured_at).timestamp()
+        except ValueError:
+            pass
+    return fallback if fallback is not None else datetime.now().timestamp()
+
+
+class LeadStore:
+    """Embedded lead storage with indexes on captured_at, quality, location and business_type"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.getenv("LEAD_STORE_PATH", "logs/leads/leads.db")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        
+        # In-memory copy of the aggregates, invalidated on local writes and
+        # whenever another connection (e.g. another worker) commits
+        self._stats_cache: Optional[Dict[str, Any]] = None
+        self._stats_data_version: Optional[int] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                    conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+                    conn.row_factory = sqlite3.Row
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.executescript(SCHEMA)
+                    self._normalize_contact_keys(conn)
+                    self._build_search_index(conn)
+                    self._conn = conn
+                    logger.info(f"Lead store opened at {self.db_path}")
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        """Serialize writes and wrap them in a single transaction"""
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def save_lead(self, lead: Dict[str, Any], fallback_ts: Optional[float] = None) -> bool:
+        """
+        Insert a lead
+
+        Returns:
+            False if a lead with the same lead_id already exists
+        """
+        row = self._to_row(lead, fallback_ts)
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                """
+                INSERT OR IGNORE INTO leads (
+                    lead_id, captured_at, captured_ts, quality, qualification_score,
+                    location, business_type, email, phone, data
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                row
+            )
+            if cursor.rowcount != 1:
+                return False
+            
+            self._apply_aggregates(conn, {"quality": row[3], "location": row[5], "business_type": row[6]}, 1)
+            self._index_lead(conn, lead)
+            last = self._get_meta(conn, "last_captured_ts")
+            if last is None or row[2] >= float(last):
+                self._set_meta(conn, "last_captured_ts", str(row[2]))
+                self._set_meta(conn, "last_captured", row[1])
+            self._stats_cache = None
+            return True
+
+    def get_lead(self, lead_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM leads WHERE lead_id = ?", (lead_id,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def delete_lead(self, lead_id: str) -> bool:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT quality, location, business_type, captured_ts FROM leads WHERE lead_id = ?",
+                (lead_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            
+            conn.execute("DELETE FROM leads WHERE lead_id = ?", (lead_id,))
+            conn.execute("DELETE FROM leads_fts WHERE lead_id = ?", (lead_id,))
+            self._apply_aggregates(conn, dict(row), -1)
+            if str(row["captured_ts"]) == self._get_meta(conn, "last_captured_ts"):
+                self._refresh_last_captured(conn)
+            self._stats_cache = None
+            return True
+
+    def list_leads(self, limit: int = 100, quality: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent leads first, with the quality filter applied in the index"""
+        leads, _ = self.query_leads(limit=limit, quality=quality)
+        return leads
+
+    def query_leads(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        quality: Optional[str] = None,
+        location: Optional[str] = None,
+        business_type: Optional[str] = None,
+        min_score: Optional[int] = None,
+        max_score: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of leads, most recent first
+
+        Filters are evaluated in SQL and the page starts right after the cursor
+        position, so every page costs the same regardless of how deep it is.
+
+        Returns:
+            (leads, next_cursor) - next_cursor is None on the last page
+        """
+        sql, params = self._filtered_query(
+            "SELECT captured_ts, lead_id, data FROM leads",
+            quality=quality,
+            location=location,
+            business_type=business_type,
+            min_score=min_score,
+            max_score=max_score,
+            since=since,
+            until=until,
+            after=decode_cursor(cursor) if cursor else None
+        )
+        sql += " ORDER BY captured_ts DESC, lead_id DESC LIMIT ?"
+        # One extra row tells us whether there is another page
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["captured_ts"], rows[-1]["lead_id"])
+        return [json.loads(row["data"]) for row in rows], next_cursor
+
+    def iter_leads(self, batch_size: int = 500, **filters) -> Iterator[Dict[str, Any]]:
+        """Yield every matching lead, most recent first, without loading them all at once"""
+        cursor = None
+        while True:
+            leads, cursor = self.query_leads(limit=batch_size, cursor=cursor, **filters)
+            yield from leads
+            if cursor is None:
+                return
+
+    def _filtered_query(
+        self,
+        select: str,
+        quality: Optional[str] = None,
+        location: Optional[str] = None,
+        business_type: Optional[str] = None,
+        min_score: Optional[int] = None,
+        max_score: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        after: Optional[Tuple[float, str]] = None
+    ) -> Tuple[str, List[Any]]:
+        """Append WHERE clauses for the supported filters"""
+        clauses: List[str] = []
+        params: List[Any] = []
+
+        if quality:
+            quality = quality.lower()
+            # Cool leads are reported as cold everywhere in the admin
+            if quality == "cold":
+                clauses.append("quality IN ('cold', 'cool')")
+            else:
+                clauses.append("quality = ?")
+                params.append(quality)
+        if location:
+            clauses.append("location = ? COLLATE NOCASE")
+            params.append(location)
+        if business_type:
+            clauses.append("business_type = ? COLLATE NOCASE")
+            params.append(business_type)
+        if min_score is not None:
+            clauses.append("qualification_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append("qualification_score <= ?")
+            params.append(max_score)
+        if since is not None:
+            clauses.append("captured_ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("captured_ts < ?")
+            params.append(until)
+        if after is not None:
+            clauses.append("(captured_ts, lead_id) < (?, ?)")
+            params.extend(after)
+
+        if clauses:
+            select += " WHERE " + " AND ".join(clauses)
+        return select, params
+
+    def find_duplicate(
+        self,
+        email: Optional[str] = None,
+        phone: Optional[str] = None,
+        since: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Most recent lead with the same normalized email or phone
+
+        Args:
+            email: Email address as captured
+            phone: Phone number as captured
+            since: Only consider leads captured at or after this epoch time
+        """
+        keys = [("email", normalize_email(email)), ("phone", normalize_phone(phone))]
+        clauses = [f"{column} = ?" for column, value in keys if value]
+        if not clauses:
+            return None
+
+        sql = "SELECT data FROM leads WHERE (" + " OR ".join(clauses) + ")"
+        params: List[Any] = [value for _, value in keys if value]
+        if since is not None:
+            sql += " AND captured_ts >= ?"
+            params.append(since)
+        sql += " ORDER BY captured_ts DESC LIMIT 1"
+
+        with self._lock:
+            row = self.conn.execute(sql, params).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def update_lead(self, lead: Dict[str, Any]) -> bool:
+        """
+        Replace a stored lead's data, keeping its original capture time
+
+        Returns:
+            False if the lead does not exist
+        """
+        with self._transaction() as conn:
+            old = conn.execute(
+                "SELECT captured_at, captured_ts, quality, location, business_type FROM leads WHERE lead_id = ?",
+                (lead["lead_id"],)
+            ).fetchone()
+            if old is None:
+                return False
+
+            lead = {**lead, "captured_at": old["captured_at"]}
+            row = self._to_row(lead, old["captured_ts"])
+            conn.execute(
+                """
+                UPDATE leads SET quality = ?, qualification_score = ?, location = ?,
+                    business_type = ?, email = ?, phone = ?, data = ?
+                WHERE lead_id = ?
+                """,
+                row[3:] + (row[0],)
+            )
+            self._apply_aggregates(conn, dict(old), -1)
+            self._apply_aggregates(conn, {"quality": row[3], "location": row[5], "business_type": row[6]}, 1)
+            conn.execute("DELETE FROM leads_fts WHERE lead_id = ?", (lead["lead_id"],))
+            self._index_lead(conn, lead)
+            self._stats_cache = None
+            return True
+
+    def search_leads(self, query: str, limit: int = 25, offset: int = 0) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Ranked full-text search over name, company, email, phone, challenge and summary
+
+        Every word in the query must match (as a prefix), so "maui gri" finds "Maui Grindz".
+
+        Returns:
+            (leads, has_more) - each lead carries a "search_snippet" with the matched text
+        """
+        match = fts_query(query)
+        if not match:
+            return [], False
+
+        weights = ", ".join(str(w) for w in SEARCH_WEIGHTS)
+        sql = f"""
+            SELECT l.data, snippet(leads_fts, -1, '[', ']', '…', 12) AS snippet
+            FROM leads_fts JOIN leads l ON l.lead_id = leads_fts.lead_id
+            WHERE leads_fts MATCH ?
+            ORDER BY bm25(leads_fts, {weights}), l.captured_ts DESC
+            LIMIT ? OFFSET ?
+        """
+        with self._lock:
+            rows = self.conn.execute(sql, (match, limit + 1, offset)).fetchall()
+
+        leads = []
+        for row in rows[:limit]:
+            lead = json.loads(row["data"])
+            lead["search_snippet"] = row["snippet"]
+            leads.append(lead)
+        return leads, len(rows) > limit
+
+    def _index_lead(self, conn: sqlite3.Connection, lead: Dict[str, Any]):
+        phone = lead.get("phone") or ""
+        # Digits-only forms too, so "8085551234", "18085551234" and "808-555-1234" all match
+        phone_terms = " ".join(dict.fromkeys(t for t in (phone, re.sub(r"\D", "", phone), normalize_phone(phone)) if t))
+        conn.execute(
+            """
+            INSERT INTO leads_fts (lead_id, name, company, email, phone, main_challenge, conversation_summary)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                lead["lead_id"],
+                lead.get("name") or "",
+                lead.get("company") or "",
+                lead.get("email") or "",
+                phone_terms,
+                lead.get("main_challenge") or "",
+                lead.get("conversation_summary") or ""
+            )
+        )
+
+    def _build_search_index(self, conn: sqlite3.Connection):
+        """One-time full-text indexing of leads stored before the search index existed"""
+        if self._get_meta(conn, "search_index_built"):
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM leads_fts")
+            for row in conn.execute("SELECT data FROM leads").fetchall():
+                self._index_lead(conn, json.loads(row["data"]))
+            self._set_meta(conn, "search_index_built", datetime.now().isoformat())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Quality, location and business-type counts from the materialized aggregates"""
+        with self._lock:
+            data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._stats_cache is None or data_version != self._stats_data_version:
+                self._stats_cache = self._read_aggregates(self.conn)
+                self._stats_data_version = data_version
+            stats = self._stats_cache
+
+        return {
+            "total": stats["total"],
+            "by_quality": dict(stats["by_quality"]),
+            "by_location": dict(stats["by_location"]),
+            "by_business_type": dict(stats["by_business_type"]),
+            "last_captured": stats["last_captured"]
+        }
+
+    def ensure_aggregates(self) -> bool:
+        """
+        Rebuild the aggregates if they were never built or have drifted from the leads table
+
+        Returns:
+            True if a rebuild happened
+        """
+        with self._lock:
+            conn = self.conn
+            built = self._get_meta(conn, "aggregates_built_at")
+            total = conn.execute(
+                "SELECT count FROM lead_aggregates WHERE dimension = 'total' AND key = 'all'"
+            ).fetchone()
+            actual = conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+        if built and total is not None and total[0] == actual:
+            return False
+
+        self.rebuild_aggregates()
+        return True
+
+    def rebuild_aggregates(self):
+        """Recompute every counter from the leads table"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM lead_aggregates")
+            conn.execute(
+                "INSERT INTO lead_aggregates (dimension, key, count) SELECT 'total', 'all', COUNT(*) FROM leads"
+            )
+            for dimension, column in AGGREGATE_DIMENSIONS:
+                conn.execute(
+                    f"""
+                    INSERT INTO lead_aggregates (dimension, key, count)
+                    SELECT ?, COALESCE({column}, 'Unknown'), COUNT(*) FROM leads
+                    GROUP BY COALESCE({column}, 'Unknown')
+                    """,
+                    (dimension,)
+                )
+            self._refresh_last_captured(conn)
+            self._set_meta(conn, "aggregates_built_at", datetime.now().isoformat())
+            self._stats_cache = None
+        logger.info("Lead aggregates rebuilt from the lead store")
+
+    def _apply_aggregates(self, conn: sqlite3.Connection, values: Dict[str, Any], delta: int):
+        """Bump the counters touched by one lead inside the caller's transaction"""
+        keys = [("total", "all")] + [
+            (dimension, values.get(column) or "Unknown")
+            for dimension, column in AGGREGATE_DIMENSIONS
+        ]
+        for dimension, key in keys:
+            conn.execute(
+                """
+                INSERT INTO lead_aggregates (dimension, key, count) VALUES (?, ?, ?)
+                ON CONFLICT (dimension, key) DO UPDATE SET count = count + excluded.count
+                """,
+                (dimension, key, delta)
+            )
+        conn.execute("DELETE FROM lead_aggregates WHERE count <= 0 AND dimension != 'total'")
+
+    def _refresh_last_captured(self, conn: sqlite3.Connection):
+        """Look up the newest lead through the captured-time index"""
+        row = conn.execute(
+            "SELECT captured_at, captured_ts FROM leads ORDER BY captured_ts DESC, lead_id DESC LIMIT 1"
+        ).fetchone()
+        if row is None:
+            conn.execute("DELETE FROM store_meta WHERE key IN ('last_captured', 'last_captured_ts')")
+        else:
+            self._set_meta(conn, "last_captured", row["captured_at"])
+            self._set_meta(conn, "last_captured_ts", str(row["captured_ts"]))
+
+    def _read_aggregates(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        rows = conn.execute("SELECT dimension, key, count FROM lead_aggregates").fetchall()
+
+        stats = {
+            "total": 0,
+            "by_quality": {"hot": 0, "warm": 0, "cold": 0},
+            "by_location": {},
+            "by_business_type": {},
+            "last_captured": self._get_meta(conn, "last_captured")
+        }
+        for dimension, key, count in rows:
+            if dimension == "total":
+                stats["total"] = count
+            elif dimension == "quality":
+                # Cool leads have always been reported alongside cold ones
+                bucket = key if key in ("hot", "warm") else "cold"
+                stats["by_quality"][bucket] += count
+            else:
+                stats[f"by_{dimension}"][key] = count
+        return stats
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get_meta(self.conn, key)
+
+    def set_meta(self, key: str, value: str):
+        with self._transaction() as conn:
+            self._set_meta(conn, key, value)
+
+    def _get_meta(self, conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: str):
+        conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)", (key, value))
+
+    def migrate_json_files(self, leads_dir: str = "logs/leads", force: bool = False) -> int:
+        """
+        One-shot import of legacy logs/leads/lead_*.json files
+
+        The original files are left in place. Returns the number of leads imported.
+        """
+        if self.get_meta("json_migrated_at") and not force:
+            return 0
+
+        imported = 0
+        for lead_file in sorted(Path(leads_dir).glob("lead_*.json")):
+            try:
+                with open(lead_file, 'r') as f:
+                    lead = json.load(f)
+                lead.setdefault("lead_id", lead_file.stem)
+                if self.save_lead(lead, fallback_ts=lead_file.stat().st_mtime):
+                    imported += 1
+            except Exception as e:
+                logger.warning(f"Skipping unreadable lead file {lead_file}: {str(e)}")
+
+        self.set_meta("json_migrated_at", datetime.now().isoformat())
+        logger.info(f"Migrated {imported} legacy lead files into {self.db_path}")
+        return imported
+
+    def _normalize_contact_keys(self, conn: sqlite3.Connection):
+        """One-time rewrite of email/phone columns written before they held dedup keys"""
+        if self._get_meta(conn, "contact_keys_normalized"):
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT lead_id, email, phone FROM leads").fetchall()
+            conn.executemany(
+                "UPDATE leads SET email = ?, phone = ? WHERE lead_id = ?",
+                [(normalize_email(r["email"]), normalize_phone(r["phone"]), r["lead_id"]) for r in rows]
+            )
+            self._set_meta(conn, "contact_keys_normalized", datetime.now().isoformat())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _to_row(self, lead: Dict[str, Any], fallback_ts: Optional[float] = None) -> tuple:
+        captured_at = lead.get("captured_at") or datetime.fromtimestamp(
+            fallback_ts if fallback_ts is not None else datetime.now().timestamp()
+        ).isoformat()
+        try:
+            score = int(lead.get("qualification_score") or 0)
+        except (TypeError, ValueError):
+            score = 0
+        return (
+            lead["lead_id"],
+            captured_at,
+            _parse_timestamp(captured_at, fallback_ts),
+            normalize_quality(lead.get("lead_quality")),
+            score,
+            lead.get("location"),
+            lead.get("business_type"),
+            normalize_email(lead.get("email")),
+            normalize_phone(lead.get("phone")),
+            json.dumps(lead, default=str)
+        )
+
+
+# Create global instance
+lead_store = LeadStore()
@@ -0,0 +1,437 @@
+"""
+Postgres Store - Write-behind persistence of conversations, messages and leads
+Writes into the chatbot.* tables from deployment/init-db.sql. The chat path only
+appends to an in-memory queue; a background task flushes it in multi-row batches.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+# Enum values from init-db.sql - anything else is stored as NULL / 'other'
+ISLANDS = {"oahu", "maui", "big_island", "kauai", "molokai", "lanai"}
+ISLAND_ALIASES = {"hawaii_island": "big_island", "hawaii": "big_island"}
+BUSINESS_TYPES = {
+    "tourism", "restaurant", "agriculture", "retail", "hospitality",
+    "technology", "real_estate", "healthcare", "education"
+}
+BUSINESS_TYPE_ALIASES = {
+    "tour": "tourism", "food truck": "restaurant", "cafe": "restaurant", "coffee shop": "restaurant",
+    "hotel": "hospitality", "resort": "hospitality", "vacation rental": "hospitality",
+    "farm": "agriculture", "coffee farm": "agriculture", "produce": "agriculture",
+    "store": "retail", "shop": "retail", "boutique": "retail",
+}
+
+# Sessions whose conversation row id we remember, so messages skip the lookup
+CONVERSATION_CACHE_SIZE = 10000
+
+# An operation the database rejects this many times is dropped (connection failures don't count)
+MAX_WRITE_ATTEMPTS = 3
+
+# Longest pause between flushes while the database is unreachable
+MAX_RETRY_DELAY_SECONDS = 30.0
+
+# Lead updates look rows up by lead_id - created on start for databases that predate init-db.sql's index
+LEAD_ID_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_leads_lead_id ON chatbot.leads ((metadata->>'lead_id'))"
+
+# Challenges travel as one delimited string per row - unnest() cannot take ragged 2-D arrays
+CHALLENGE_SEPARATOR = "\x1f"
+
+
+def to_island(location: Optional[str]) -> Optional[str]:
+    key = (location or "").strip().lower().replace(" ", "_")
+    key = ISLAND_ALIASES.get(key, key)
+    return key if key in ISLANDS else None
+
+
+def to_business_type(business_type: Optional[str]) -> Optional[str]:
+    if not business_type:
+        return None
+    key = business_type.strip().lower()
+    key = BUSINESS_TYPE_ALIASES.get(key, key).replace(" ", "_")
+    return key if key in BUSINESS_TYPES else "other"
+
+
+class PostgresStore:
+    """Pooled asyncpg writer with a bounded write-behind queue"""
+
+    def __init__(self):
+        self.database_url = os.getenv("DATABASE_URL", "")
+        self.enabled = (
+            os.getenv("POSTGRES_PERSISTENCE_ENABLED", "false").lower() == "true"
+            and self.database_url.startswith(("postgres://", "postgresql://"))
+        )
+        self.min_pool_size = int(os.getenv("POSTGRES_POOL_MIN_SIZE", "1"))
+        self.max_pool_size = int(os.getenv("POSTGRES_POOL_MAX_SIZE", "5"))
+        self.batch_size = int(os.getenv("POSTGRES_BATCH_SIZE", "200"))
+        self.flush_interval = float(os.getenv("POSTGRES_FLUSH_INTERVAL_SECONDS", "1.0"))
+        self.max_queue_size = int(os.getenv("POSTGRES_MAX_QUEUE_SIZE", "10000"))
+
+        self.pool = None
+        self._queue: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._conversation_ids: "OrderedDict[str, Any]" = OrderedDict()
+        # Grows while the database is unreachable, 0 once writes succeed again
+        self._retry_delay = 0.0
+
+        self.stats = {
+            "queued_total": 0,
+            "written_total": 0,
+            "dropped_total": 0,
+            "failed_batches": 0,
+            "last_flush_ms": None,
+            "last_error": None
+        }
+
+        if self.enabled and asyncpg is None:
+            logger.warning("POSTGRES_PERSISTENCE_ENABLED is set but asyncpg is not installed - persistence disabled")
+            self.enabled = False
+
+        logger.info(f"Postgres Store initialized. Enabled: {self.enabled}")
+
+    async def start(self):
+        """Open the connection pool and start the background flusher"""
+        if not self.enabled or self.pool is not None:
+            return
+
+        try:
+            self.pool = await asyncpg.create_pool(
+                self.database_url,
+                min_size=self.min_pool_size,
+                max_size=self.max_pool_size,
+                command_timeout=10
+            )
+            await self._ensure_indexes()
+            self._flush_task = asyncio.create_task(self._flush_loop())
+            logger.info(f"Postgres persistence connected (pool {self.min_pool_size}-{self.max_pool_size})")
+        except Exception as e:
+            logger.error(f"Postgres persistence unavailable: {str(e)}")
+            self.pool = None
+
+    async def _ensure_indexes(self):
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.execute(LEAD_ID_INDEX_SQL)
+        except Exception as e:
+            logger.warning(f"Could not create the lead_id index: {str(e)}")
+
+    async def stop(self):
+        """Write out whatever is queued and close the pool"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        if self.pool is not None:
+            await self.flush()
+            await self.pool.close()
+            self.pool = None
+
+    # Hot-path API: these only enqueue and never touch the network
+
+    def record_conversation(self, session_id: str, user_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None):
+        self._enqueue("conversation", {"session_id": session_id, "user_id": user_id, "metadata": metadata or {}})
+
+    def end_conversation(self, session_id: str, status: str = "completed"):
+        self._enqueue("conversation_end", {"session_id": session_id, "status": status})
+
+    def record_message(
+        self,
+        session_id: str,
+        sender: str,
+        message: str,
+        intent: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self._enqueue("message", {
+            "session_id": session_id,
+            "sender": sender,
+            "message": message,
+            "intent": intent,
+            "metadata": metadata or {}
+        })
+
+    def record_lead(self, lead: Dict[str, Any], session_id: Optional[str] = None):
+        self._enqueue("lead", {"session_id": session_id, "lead": dict(lead)})
+
+    def record_lead_update(self, lead: Dict[str, Any]):
+        self._enqueue("lead_update", {"lead": dict(lead)})
+
+    def _enqueue(self, kind: str, payload: Dict[str, Any]):
+        if not self.enabled or self.pool is None:
+            return
+
+        if len(self._queue) >= self.max_queue_size:
+            self.stats["dropped_total"] += 1
+            return
+
+        self._queue.append({"kind": kind, "attempts": 0, **payload})
+        self.stats["queued_total"] += 1
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _flush_loop(self):
+        while True:
+            if self._retry_delay:
+                # Database is down - a full queue shouldn't turn into a reconnect storm
+                await asyncio.sleep(self._retry_delay)
+            else:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Postgres flush loop error: {str(e)}")
+
+    async def flush(self):
+        """Write queued operations in batches of up to batch_size"""
+        if self.pool is None:
+            return
+
+        async with self._flush_lock:
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                started = time.perf_counter()
+                try:
+                    await self._write(batch)
+                except Exception as e:
+                    self.stats["failed_batches"] += 1
+                    self.stats["last_error"] = str(e)
+                    logger.error(f"Postgres batch of {len(batch)} failed: {str(e)}")
+                    if self._is_transient(e):
+                        # Nothing wrong with the rows - keep them all and back off until the pool recovers
+                        self._requeue(batch)
+                        self._back_off()
+                        return
+
+                    if len(batch) > 1:
+                        # One bad row fails the whole statement - split the batch to isolate it
+                        rejected, unwritten = await self._write_bisected(batch)
+                    else:
+                        rejected, unwritten = batch, []
+                    retry = {id(op) for op in rejected + unwritten}
+                    self._requeue([op for op in batch if id(op) in retry], rejected)
+                    if unwritten:
+                        self._back_off()
+                    return
+
+                self._retry_delay = 0.0
+                self.stats["written_total"] += len(batch)
+                self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        """Write a batch in one transaction"""
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    await self._write_batch(conn, batch)
+        except Exception:
+            # Ids cached during the failed transaction may have been rolled back
+            self._conversation_ids.clear()
+            raise
+
+    async def _write_bisected(self, batch: List[Dict[str, Any]]):
+        """
+        Write each half of a failed batch on its own, splitting again until
+        the failing operations are isolated
+
+        Returns:
+            (operations the database rejected, operations not tried because the connection failed)
+        """
+        rejected: List[Dict[str, Any]] = []
+        unwritten: List[Dict[str, Any]] = []
+        middle = len(batch) // 2
+        for half in (batch[:middle], batch[middle:]):
+            if unwritten:
+                unwritten.extend(half)
+                continue
+            try:
+                await self._write(half)
+                self.stats["written_total"] += len(half)
+            except Exception as e:
+                if self._is_transient(e):
+                    unwritten.extend(half)
+                elif len(half) > 1:
+                    half_rejected, half_unwritten = await self._write_bisected(half)
+                    rejected.extend(half_rejected)
+                    unwritten.extend(half_unwritten)
+                else:
+                    logger.error(f"Postgres {half[0]['kind']} write failed: {str(e)}")
+                    rejected.extend(half)
+        return rejected, unwritten
+
+    def _is_transient(self, error: Exception) -> bool:
+        """Connection problems fail every row alike - only data errors are worth bisecting"""
+        if isinstance(error, (OSError, asyncio.TimeoutError)):
+            return True
+        return asyncpg is not None and isinstance(error, (asyncpg.PostgresConnectionError, asyncpg.InterfaceError))
+
+    def _requeue(self, batch: List[Dict[str, Any]], rejected: Optional[List[Dict[str, Any]]] = None):
+        """
+        Put unwritten operations back at the front in their original order.
+        Only rejected ones use up an attempt and are dropped once they run out.
+        """
+        rejected_ids = {id(op) for op in rejected or []}
+        for op in reversed(batch):
+            if id(op) in rejected_ids:
+                op["attempts"] += 1
+                if op["attempts"] >= MAX_WRITE_ATTEMPTS:
+                    self.stats["dropped_total"] += 1
+                    continue
+            self._queue.appendleft(op)
+
+    def _back_off(self):
+        self._retry_delay = min(max(self._retry_delay * 2, self.flush_interval), MAX_RETRY_DELAY_SECONDS)
+        logger.warning(f"Postgres unreachable - next flush in {self._retry_delay:.1f}s")
+
+    async def _write_batch(self, conn, batch: List[Dict[str, Any]]):
+        """One round trip per table: conversations, then messages and leads"""
+        by_kind: Dict[str, List[Dict[str, Any]]] = {}
+        for op in batch:
+            by_kind.setdefault(op["kind"], []).append(op)
+
+        await self._upsert_conversations(conn, batch, by_kind.get("conversation", []))
+
+        messages = by_kind.get("message", [])
+        if messages:
+            await conn.execute(
+                """
+                INSERT INTO chatbot.messages (conversation_id, sender, message, intent, metadata)
+                SELECT * FROM unnest($1::uuid[], $2::varchar[], $3::text[], $4::varchar[], $5::jsonb[])
+                """,
+                [self._conversation_id(m["session_id"]) for m in messages],
+                [m["sender"] for m in messages],
+                [m["message"] for m in messages],
+                [m["intent"] for m in messages],
+                [json.dumps(m["metadata"], default=str) for m in messages]
+            )
+
+        leads = by_kind.get("lead", [])
+        if leads:
+            rows = [self._lead_row(op["lead"]) for op in leads]
+            await conn.execute(
+                """
+                INSERT INTO chatbot.leads (
+                    conversation_id, email, phone, name, company_name, island, business_type,
+                    challenges, budget_range, timeline, qualification_status, metadata
+                )
+                SELECT c, e, p, n, co, i, b, string_to_array(ch, E'\\x1f'), br, t, q, m FROM unnest(
+                    $1::uuid[], $2::varchar[], $3::varchar[], $4::varchar[], $5::varchar[],
+                    $6::chatbot.island[], $7::chatbot.business_type[], $8::text[], $9::varchar[],
+                    $10::varchar[], $11::varchar[], $12::jsonb[]
+                ) AS rows (c, e, p, n, co, i, b, ch, br, t, q, m)
+                """,
+                [self._conversation_id(op["session_id"]) for op in leads],
+                *[list(column) for column in zip(*rows)]
+            )
+
+        updates = by_kind.get("lead_update", [])
+        if updates:
+            await conn.executemany(
+                """
+                UPDATE chatbot.leads SET
+                    email = $2, phone = $3, name = $4, company_name = $5, island = $6::chatbot.island,
+                    business_type = $7::chatbot.business_type, challenges = string_to_array($8, E'\\x1f'),
+                    budget_range = $9, timeline = $10, qualification_status = $11, metadata = $12::jsonb
+                WHERE metadata->>'lead_id' = $1
+                """,
+                [(op["lead"].get("lead_id"), *self._lead_row(op["lead"])) for op in updates]
+            )
+
+        ended = by_kind.get("conversation_end", [])
+        if ended:
+            await conn.executemany(
+                """
+                UPDATE chatbot.conversations SET status = $2::chatbot.conversation_status, ended_at = CURRENT_TIMESTAMP
+                WHERE session_id = $1
+                """,
+                [(op["session_id"], op["status"]) for op in ended]
+            )
+
+    async def _upsert_conversations(self, conn, batch: List[Dict[str, Any]], explicit: List[Dict[str, Any]]):
+        """Make sure every session referenced in the batch has a conversation row id"""
+        sessions: Dict[str, Dict[str, Any]] = {}
+        for op in explicit:
+            sessions[op["session_id"]] = op
+        for op in batch:
+            session_id = op.get("session_id")
+            if session_id and session_id not in sessions and self._conversation_id(session_id) is None:
+                sessions[session_id] = {"session_id": session_id, "user_id": None, "metadata": {}}
+
+        if not sessions:
+            return
+
+        ops = list(sessions.values())
+        rows = await conn.fetch(
+            """
+            INSERT INTO chatbot.conversations (session_id, user_id, metadata)
+            SELECT * FROM unnest($1::varchar[], $2::varchar[], $3::jsonb[])
+            ON CONFLICT (session_id) DO UPDATE
+                SET user_id = COALESCE(EXCLUDED.user_id, chatbot.conversations.user_id)
+            RETURNING id, session_id
+            """,
+            [op["session_id"] for op in ops],
+            [op["user_id"] for op in ops],
+            [json.dumps(op["metadata"], default=str) for op in ops]
+        )
+        for row in rows:
+            self._conversation_ids[row["session_id"]] = row["id"]
+            self._conversation_ids.move_to_end(row["session_id"])
+        while len(self._conversation_ids) > CONVERSATION_CACHE_SIZE:
+            self._conversation_ids.popitem(last=False)
+
+    def _conversation_id(self, session_id: Optional[str]) -> Any:
+        """Cached conversation row id, refreshed as most recently used"""
+        conversation_id = self._conversation_ids.get(session_id)
+        if conversation_id is not None:
+            self._conversation_ids.move_to_end(session_id)
+        return conversation_id
+
+    def _lead_row(self, lead: Dict[str, Any]) -> tuple:
+        challenge = lead.get("main_challenge")
+        return (
+            lead.get("email"),
+            lead.get("phone"),
+            lead.get("name"),
+            lead.get("company"),
+            to_island(lead.get("location")),
+            to_business_type(lead.get("business_type")),
+            CHALLENGE_SEPARATOR.join([challenge] if challenge else []),
+            lead.get("budget_range"),
+            lead.get("timeline"),
+            lead.get("lead_quality"),
+            json.dumps(lead, default=str)
+        )
+
+    def get_status(self) -> Dict[str, Any]:
+        """Queue depth and write counters (for admin stats)"""
+        return {
+            "enabled": self.enabled,
+            "connected": self.pool is not None,
+            "queue_depth": len(self._queue),
+            "retry_delay_seconds": self._retry_delay,
+            **self.stats
+        }
+
+
+# Create global instance
+postgres_store = PostgresStore()
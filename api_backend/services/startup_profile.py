@@ -0,0 +1,58 @@
+"""
+Startup Profile - Where a cold start spends its time
+Phases are marked once, relative to the moment this module was first imported
+(the top of main.py), plus how long the interpreter had already been running.
+For a per-module import breakdown run: python -X importtime -c "import main"
+"""
+import os
+import time
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _process_age() -> Optional[float]:
+    """Seconds since this process started (Linux only)"""
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name may contain spaces - fields after it are fixed
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupProfile:
+    """Records the first time each startup phase completes"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.interpreter_seconds = _process_age()
+        self.phases: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> Optional[float]:
+        """Record a phase (only its first completion counts)"""
+        if phase in self.phases:
+            return None
+        elapsed = time.perf_counter() - self.started
+        self.phases[phase] = elapsed
+        return elapsed
+
+    def summary(self) -> str:
+        parts = [f"{phase} +{seconds * 1000:.0f}ms" for phase, seconds in self.phases.items()]
+        if self.interpreter_seconds is not None:
+            parts.insert(0, f"interpreter {self.interpreter_seconds * 1000:.0f}ms")
+        return ", ".join(parts)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "interpreter_ms": round(self.interpreter_seconds * 1000, 1) if self.interpreter_seconds is not None else None,
+            "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in self.phases.items()}
+        }
+
+
+# Create global instance
+startup_profile = StartupProfile()
@@ -41,8 +41,33 @@ def ensure_directories_exist():
                 logger.error(f"Debug error: {str(debug_e)}")
 
 
+def migrate_legacy_lead_files():
+    """Import logs/leads/lead_*.json files into the lead store (runs once)"""
+    try:
+        from api_backend.services.lead_store import lead_store
+        imported = lead_store.migrate_json_files("logs/leads")
+        if imported:
+            logger.info(f"✅ Migrated {imported} legacy lead files into the lead store")
+    except Exception as e:
+        logger.error(f"❌ Error migrating legacy lead files: {str(e)}")
+
+
+def ensure_lead_aggregates():
+    """Rebuild the materialized lead statistics if they are missing or out of date"""
+    try:
+        from api_backend.services.lead_store import lead_store
+        if lead_store.ensure_aggregates():
+            logger.info("✅ Rebuilt lead statistics from the lead store")
+        else:
+            logger.info("✅ Lead statistics loaded from the lead store")
+    except Exception as e:
+        logger.error(f"❌ Error preparing lead statistics: {str(e)}")
+
+
 def run_startup_tasks():
     """Run all startup tasks"""
     logger.info("🚀 Running startup tasks...")
     ensure_directories_exist()
+    migrate_legacy_lead_files()
+    ensure_lead_aggregates()
     logger.info("✅ Startup tasks completed")
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+Static Assets - In-memory cache of the landing page, widget, logo and admin pages
+Files are read and precompressed once (gzip, plus brotli when installed) and served
+with strong ETags, Cache-Control and 304s for conditional requests
+"""
+import os
+import gzip
+import asyncio
+import hashlib
+import logging
+from email.utils import formatdate
+from typing import Dict, Any, Callable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Only text formats benefit from compression - images are already compressed
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+# Variants smaller than this are not worth the Content-Encoding overhead
+MIN_COMPRESS_SIZE = 512
+
+
+class StaticAsset:
+    """One file held in memory with its precompressed variants"""
+
+    def __init__(
+        self,
+        path: Optional[str],
+        media_type: str,
+        cache_control: str,
+        transform: Optional[Callable[[bytes], bytes]] = None
+    ):
+        self.path = path
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.transform = transform
+        self.body = b""
+        self.variants: Dict[str, bytes] = {}
+        self.etag = ""
+        self.last_modified = ""
+        self.mtime = 0.0
+
+    def load(self):
+        with open(self.path, "rb") as f:
+            body = f.read()
+        # e.g. minification - the ETag and variants are built from the result
+        self.set_body(self.transform(body) if self.transform else body)
+        self.mtime = os.path.getmtime(self.path)
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+
+    def set_body(self, body: bytes):
+        """Replace the content and rebuild compressed variants and ETag"""
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.variants = {}
+
+        if self.media_type.startswith(COMPRESSIBLE_TYPES) and len(body) >= MIN_COMPRESS_SIZE:
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body, quality=11)
+
+    def is_stale(self) -> bool:
+        if self.path is None:
+            return False
+        try:
+            return os.path.getmtime(self.path) != self.mtime
+        except OSError:
+            return False
+
+
+def _accepted_encodings(request: Request) -> set:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        if token and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(token.lower())
+    return accepted
+
+
+class StaticAssetCache:
+    """Named static assets served from memory"""
+
+    def __init__(self):
+        self.assets: Dict[str, StaticAsset] = {}
+        self.watch_interval = float(os.getenv("STATIC_ASSET_WATCH_INTERVAL", "0"))
+        self._watch_task: Optional[asyncio.Task] = None
+        self.stats = {"hits": 0, "not_modified": 0, "reloads": 0}
+
+    def register(
+        self,
+        name: str,
+        path: str,
+        media_type: str,
+        cache_control: str = "no-cache",
+        transform: Optional[Callable[[bytes], bytes]] = None
+    ) -> bool:
+        """Load a file into the cache under a name; returns False if it does not exist"""
+        if not os.path.exists(path):
+            logger.warning(f"Static asset '{name}' not found at {path}")
+            return False
+
+        asset = StaticAsset(path, media_type, cache_control, transform)
+        try:
+            asset.load()
+        except OSError as e:
+            logger.error(f"Error loading static asset '{name}': {str(e)}")
+            return False
+
+        self.assets[name] = asset
+        variants = ", ".join(f"{k} {len(v)}" for k, v in asset.variants.items()) or "uncompressed"
+        logger.info(f"Cached static asset '{name}' ({len(asset.body)} bytes; {variants})")
+        return True
+
+    def register_content(self, name: str, body: bytes, media_type: str, cache_control: str = "no-cache"):
+        """Cache generated content that has no backing file"""
+        asset = StaticAsset(None, media_type, cache_control)
+        asset.set_body(body)
+        asset.last_modified = formatdate(usegmt=True)
+        self.assets[name] = asset
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        return self.assets.get(name)
+
+    def response(self, request: Request, name: str, cache_control: Optional[str] = None) -> Optional[Response]:
+        """
+        Serve a cached asset, honouring If-None-Match and Accept-Encoding
+
+        Returns:
+            None if no asset is registered under that name
+        """
+        asset = self.assets.get(name)
+        if asset is None:
+            return None
+
+        headers = {
+            "ETag": asset.etag,
+            "Last-Modified": asset.last_modified,
+            "Cache-Control": cache_control or asset.cache_control,
+        }
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match and (if_none_match.strip() == "*" or asset.etag in [t.strip() for t in if_none_match.split(",")]):
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        self.stats["hits"] += 1
+        body = asset.body
+        accepted = _accepted_encodings(request)
+        for encoding in ("br", "gzip"):
+            if encoding in asset.variants and encoding in accepted:
+                body = asset.variants[encoding]
+                headers["Content-Encoding"] = encoding
+                break
+
+        if request.method == "HEAD":
+            headers["Content-Length"] = str(len(body))
+            return Response(status_code=200, headers=headers, media_type=asset.media_type)
+        return Response(content=body, headers=headers, media_type=asset.media_type)
+
+    def reload_changed(self) -> int:
+        """Reload any asset whose file changed on disk"""
+        reloaded = 0
+        for name, asset in self.assets.items():
+            if asset.is_stale():
+                try:
+                    asset.load()
+                    reloaded += 1
+                    logger.info(f"Reloaded static asset '{name}'")
+                except OSError as e:
+                    logger.error(f"Error reloading static asset '{name}': {str(e)}")
+        self.stats["reloads"] += reloaded
+        return reloaded
+
+    async def start_watching(self):
+        """Poll for edits every STATIC_ASSET_WATCH_INTERVAL seconds (0 disables - the default)"""
+        if self.watch_interval > 0 and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            await asyncio.to_thread(self.reload_changed)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "assets": {
+                name: {"bytes": len(a.body), "variants": {k: len(v) for k, v in a.variants.items()}}
+                for name, a in self.assets.items()
+            },
+            **self.stats
+        }
+
+
+# Create global instance
+static_assets = StaticAssetCache()
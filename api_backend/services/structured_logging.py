@@ -0,0 +1,222 @@
+"""
+Structured Logging - JSON logs written by a background thread
+Request handlers only build a LogRecord and put it on a queue; message
+formatting, JSON encoding, PII redaction and the actual write happen on the
+listener thread. High-volume events (records logged with extra={"event": ...})
+can be sampled, and warnings and errors are always kept.
+"""
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import re
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "[redacted]"
+
+# Keys whose values are personal data wherever they appear in extra={...}
+PII_FIELDS = {
+    "email", "phone", "name", "first_name", "last_name", "firstname", "lastname",
+    "contact_name", "contact_email", "contact_phone", "mobilephone", "address"
+}
+EMAIL_PATTERN = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+# Needs separators, (808) or a +1 prefix - bare 10-digit runs are timestamps and HubSpot IDs far more often
+PHONE_PATTERN = re.compile(
+    r"(?<!\d)(?:\+1[-.\s]?\d{3}[-.\s]?\d{3}[-.\s]?\d{4}"
+    r"|(?:1[-.\s])?(?:\(\d{3}\)\s*|\d{3}[-.\s])\d{3}[-.\s]\d{4})(?!\d)"
+)
+
+# Fraction of records kept per event name (overridable with LOG_SAMPLE_RATES)
+DEFAULT_SAMPLE_RATES = {
+    "chat_request": 1.0,
+    "lead_extraction": 0.1,
+    "lead_field_found": 0.1,
+}
+
+# Attributes every LogRecord has - anything else came from extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "trace_id"}
+_IMMUTABLE_ARGS = (str, int, float, bool, type(None))
+
+
+def redact_text(text: str) -> str:
+    """Mask email addresses and phone numbers in free text"""
+    return PHONE_PATTERN.sub(REDACTED, EMAIL_PATTERN.sub(REDACTED, text))
+
+
+def redact_value(value: Any, key: Optional[str] = None) -> Any:
+    """Mask PII fields (by key) and PII-looking strings in nested data"""
+    if key is not None and key.lower() in PII_FIELDS and value:
+        return REDACTED
+    if isinstance(value, dict):
+        return {k: redact_value(v, str(k)) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [redact_value(v) for v in value]
+    if isinstance(value, str):
+        return redact_text(value)
+    return value
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "event=rate,event=rate" on top of the defaults"""
+    rates = dict(DEFAULT_SAMPLE_RATES)
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        event, _, rate = part.partition("=")
+        try:
+            rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of INFO/DEBUG records for each sampled event"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        if event is None or record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(event, 1.0)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.dropped += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, trace_id, message and extras"""
+
+    def __init__(self, redact: bool = True):
+        super().__init__()
+        self.redact = redact
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", None),
+            "message": redact_text(message) if self.redact else message,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = redact_value(value, key) if self.redact else value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The original human-readable format, with PII masked"""
+
+    def __init__(self, redact: bool = True):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s')
+        self.redact = redact
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "trace_id"):
+            record.trace_id = "-"
+        text = super().format(record)
+        return redact_text(text) if self.redact else text
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that defers formatting to the listener thread
+
+    The stock handler formats every message on the calling thread. Here only
+    things that can't safely cross threads are resolved up front: exception
+    tracebacks, %-args that are mutable objects, and dicts passed as extras
+    (snapshotted). A full queue drops the record instead of blocking.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int = 10000):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if record.args and not all(isinstance(arg, _IMMUTABLE_ARGS) for arg in record.args):
+            record.msg = record.getMessage()
+            record.args = None
+        for key, value in record.__dict__.items():
+            if type(value) is dict and key not in _RECORD_ATTRS:
+                record.__dict__[key] = dict(value)
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    log_format: Optional[str] = None,
+    stream=None
+) -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a queue to a background writer
+
+    LOG_LEVEL, LOG_FORMAT (json or text), LOG_REDACT_PII, LOG_SAMPLE_RATES and
+    LOG_QUEUE_SIZE configure it. Safe to call more than once.
+    """
+    global _listener
+
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_format = (log_format or os.getenv("LOG_FORMAT", "json")).lower()
+    redact = os.getenv("LOG_REDACT_PII", "true").lower() == "true"
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter(redact) if log_format == "json" else TextFormatter(redact))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = NonBlockingQueueHandler(log_queue, max_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))))
+
+    if _listener is not None:
+        _listener.stop()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
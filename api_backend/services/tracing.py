@@ -0,0 +1,157 @@
+"""
+Tracing - Per-request trace IDs and Server-Timing breakdowns
+The current trace lives in a context variable, so it follows the request into
+logs, asyncio tasks spawned from it (lead capture) and outbound HubSpot/webhook
+calls without being passed around. Chat stages timed by StageTimer are folded
+into the queue/context/llm/post/total breakdown sent back as Server-Timing.
+"""
+import re
+import time
+import uuid
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "X-Trace-ID"
+# Client-supplied IDs (the widget sends X-Request-ID) are reused when they look sane
+INCOMING_TRACE_HEADERS = (b"x-trace-id", b"x-request-id")
+TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{8,64}$")
+
+# Pipeline stage (see StageTimer laps) -> Server-Timing metric
+STAGE_GROUPS = {
+    "admission": "queue",
+    "session": "context",
+    "cultural_context": "context",
+    "context": "context",
+    "claude": "llm",
+    "post": "post",
+    "lead_extraction": "post",
+    "post_processing": "post",
+    "serialization": "post",
+}
+TIMING_ORDER = ("queue", "context", "llm", "post")
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+class RequestTrace:
+    """Trace ID and stage timings for one HTTP request or WebSocket message"""
+
+    __slots__ = ("trace_id", "started", "timings", "handler_started")
+
+    def __init__(self, trace_id: Optional[str] = None, started: Optional[float] = None):
+        self.trace_id = trace_id or new_trace_id()
+        self.started = started if started is not None else time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.handler_started = False
+
+    def mark_handler_started(self, at: float):
+        """Time until the first stage began counts as queueing"""
+        if not self.handler_started:
+            self.handler_started = True
+            self.timings["queue"] = max(0.0, at - self.started)
+
+    def record(self, stage: str, seconds: float):
+        group = STAGE_GROUPS.get(stage, stage)
+        self.timings[group] = self.timings.get(group, 0.0) + seconds
+
+    def timing_ms(self) -> Dict[str, float]:
+        """Breakdown in milliseconds, including the total so far"""
+        timing = {name: round(self.timings[name] * 1000, 1) for name in TIMING_ORDER if name in self.timings}
+        timing["total"] = round((time.perf_counter() - self.started) * 1000, 1)
+        return timing
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={duration}" for name, duration in self.timing_ms().items())
+
+
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+def trace_headers() -> Dict[str, str]:
+    """Headers that carry the current trace ID to outbound calls"""
+    trace_id = current_trace_id()
+    return {TRACE_HEADER: trace_id} if trace_id else {}
+
+
+def clean_trace_id(value: Optional[str]) -> Optional[str]:
+    if value and TRACE_ID_PATTERN.match(value):
+        return value
+    return None
+
+
+@contextmanager
+def traced(trace_id: Optional[str] = None, started: Optional[float] = None):
+    """Run a block (or a background job) under a trace"""
+    trace = RequestTrace(clean_trace_id(trace_id), started)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+class TraceMiddleware:
+    """
+    Give every HTTP request a trace and return it as X-Trace-ID and Server-Timing
+
+    Plain ASGI middleware: headers are added to the response start message, so
+    streaming responses are not buffered. WebSocket messages are traced
+    individually by the connection manager.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope.get("headers", []):
+            if name in INCOMING_TRACE_HEADERS:
+                incoming = clean_trace_id(value.decode("latin-1"))
+                if incoming:
+                    break
+
+        with traced(incoming) as trace:
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-trace-id", trace.trace_id.encode("latin-1")))
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                    headers.append((b"timing-allow-origin", b"*"))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
+
+
+_record_factory = logging.getLogRecordFactory()
+
+
+def _trace_record_factory(*args, **kwargs):
+    record = _record_factory(*args, **kwargs)
+    record.trace_id = current_trace_id() or "-"
+    return record
+
+
+def install_log_trace_ids():
+    """Add %(trace_id)s to every log record"""
+    if logging.getLogRecordFactory() is not _trace_record_factory:
+        logging.setLogRecordFactory(_trace_record_factory)
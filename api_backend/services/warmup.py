@@ -0,0 +1,73 @@
+"""
+Warm-up - Get the first chat response off the cold path
+Runs in the background once the app is listening: finishes any deferred
+service initialization, imports modules the first request would otherwise
+load, and opens pooled TLS connections to Anthropic and HubSpot so the first
+real call skips the handshake.
+"""
+import os
+import asyncio
+import importlib
+import logging
+from typing import Any, Dict
+
+from api_backend.services.startup_profile import startup_profile
+
+logger = logging.getLogger(__name__)
+
+# Imported lazily inside the chat path - load them before the first request does
+FIRST_REQUEST_MODULES = (
+    "api_backend.config.business_categories",
+    "api_backend.services.postgres_store",
+)
+
+
+def _hubspot_configured() -> bool:
+    api_key = os.getenv("HUBSPOT_API_KEY", "")
+    return bool(api_key) and api_key != "your_hubspot_api_key_here"
+
+
+def _warm_anthropic(router) -> bool:
+    client = router.claude_client
+    return bool(client) and client.warm_connection()
+
+
+def _warm_hubspot() -> bool:
+    if not _hubspot_configured():
+        return False
+    from api_backend.services.hubspot_service import hubspot_service
+    return hubspot_service.client.warm_connection()
+
+
+def _import_first_request_modules():
+    for name in FIRST_REQUEST_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning(f"Warm-up could not import {name}: {str(e)}")
+
+
+async def warm_up(router) -> Dict[str, Any]:
+    """Initialize deferred services and pre-open outbound connections"""
+    results: Dict[str, Any] = {}
+    try:
+        await router.ensure_ready()
+        startup_profile.mark("services_ready")
+
+        # Lead capture isn't needed for the first reply - build it alongside the connections
+        anthropic, hubspot, _, _ = await asyncio.gather(
+            asyncio.to_thread(_warm_anthropic, router),
+            asyncio.to_thread(_warm_hubspot),
+            asyncio.to_thread(_import_first_request_modules),
+            router.ensure_lead_capture(),
+            return_exceptions=True
+        )
+        results = {
+            "anthropic": anthropic is True,
+            "hubspot": hubspot is True,
+        }
+        startup_profile.mark("warmup")
+        logger.info(f"Warm-up done ({startup_profile.summary()}) - connections: {results}")
+    except Exception as e:
+        logger.error(f"Warm-up failed: {str(e)}")
+    return results
@@ -1,84 +1,320 @@
 """
-Webhook-based Lead Capture - Send leads to any webhook URL (Zapier, Make, etc.)
+Webhook-based Lead Capture - Send leads to any webhook URL (Zapier, Make, Slack, CRMs, etc.)
 """
 import os
 import logging
-import requests
+import asyncio
+import hashlib
+import heapq
+import hmac
+import itertools
 import json
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional
 from datetime import datetime
+
+import httpx
 import pytz
 
+from api_backend.services.metrics import WEBHOOK_RETRIES
+from api_backend.services.tracing import current_trace_id, trace_headers, traced
+
 logger = logging.getLogger(__name__)
 
+# Status codes worth retrying - anything else is a permanent failure for that payload
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class WebhookDestination:
+    """One configured webhook endpoint with its own retry queue and metrics"""
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        secret: str = "",
+        timeout: float = 10.0,
+        max_retries: int = 5,
+        max_queue_size: int = 500
+    ):
+        self.name = name
+        self.url = url
+        self.secret = secret
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.payload_format = "slack" if "hooks.slack.com" in url else "json"
+
+        # Pending retries, a heap ordered by due time: (due_monotonic, sequence, lead_data, attempt, trace_id)
+        self.retry_queue: List[tuple] = []
+        self.max_queue_size = max_queue_size
+        self._retry_sequence = itertools.count()
+        self._retry_wakeup = asyncio.Event()
+        self._retry_task: Optional[asyncio.Task] = None
+
+        self.metrics = {
+            "sent_total": 0,
+            "failed_total": 0,
+            "retried_total": 0,
+            "dropped_total": 0,
+            "last_status": None,
+            "last_error": None,
+            "last_latency_ms": None,
+            "avg_latency_ms": None
+        }
+
+    def record_latency(self, latency_ms: float):
+        """Keep an exponentially weighted moving average of delivery latency"""
+        self.metrics["last_latency_ms"] = round(latency_ms, 1)
+        previous = self.metrics["avg_latency_ms"]
+        self.metrics["avg_latency_ms"] = round(
+            latency_ms if previous is None else previous * 0.8 + latency_ms * 0.2, 1
+        )
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "url": self.url[:50],
+            "signed": bool(self.secret),
+            "retry_queue_depth": len(self.retry_queue),
+            **self.metrics
+        }
+
 
 class WebhookLeadCapture:
-    """Send leads to webhook URLs for easy integration"""
-    
+    """Fan leads out to every configured webhook concurrently over a pooled client"""
+
     def __init__(self):
-        # Webhook URL from environment or use RequestBin for testing
-        self.webhook_url = os.getenv("LEAD_WEBHOOK_URL", "")
-        logger.info(f"Webhook URL from env: {self.webhook_url[:50]}..." if self.webhook_url else "No webhook URL found")
-        
+        self.destinations = self._load_destinations()
+
         self.webhook_headers = {
             "Content-Type": "application/json",
             "User-Agent": "LeniLani-Chatbot/1.0"
         }
-        
-        # Optional webhook secret for security
-        self.webhook_secret = os.getenv("LEAD_WEBHOOK_SECRET", "")
-        if self.webhook_secret:
-            self.webhook_headers["X-Webhook-Secret"] = self.webhook_secret
-        
+
         self.hawaii_tz = pytz.timezone('Pacific/Honolulu')
-        
-        logger.info(f"Webhook Lead Capture initialized. URL configured: {bool(self.webhook_url)}")
-    
+        self._client: Optional[httpx.AsyncClient] = None
+
+        logger.info(f"Webhook Lead Capture initialized. Destinations: {[d.name for d in self.destinations]}")
+
+    def _load_destinations(self) -> List[WebhookDestination]:
+        """
+        Read destinations from the environment
+
+        LEAD_WEBHOOK_DESTINATIONS is a comma-separated list of name=url pairs, e.g.
+        "zapier=https://hooks.zapier.com/...,slack=https://hooks.slack.com/...".
+        The legacy LEAD_WEBHOOK_URL is kept as a destination named "default".
+        Secrets come from LEAD_WEBHOOK_SECRET_<NAME>, falling back to LEAD_WEBHOOK_SECRET.
+        """
+        entries = []
+        legacy_url = os.getenv("LEAD_WEBHOOK_URL", "")
+        if legacy_url:
+            entries.append(("default", legacy_url))
+
+        for entry in os.getenv("LEAD_WEBHOOK_DESTINATIONS", "").split(","):
+            if "=" not in entry:
+                continue
+            name, url = entry.split("=", 1)
+            if name.strip() and url.strip():
+                entries.append((name.strip().lower(), url.strip()))
+
+        default_secret = os.getenv("LEAD_WEBHOOK_SECRET", "")
+        default_timeout = float(os.getenv("LEAD_WEBHOOK_TIMEOUT", "10"))
+        max_retries = int(os.getenv("LEAD_WEBHOOK_MAX_RETRIES", "5"))
+
+        destinations = []
+        for name, url in entries:
+            env_name = name.upper().replace("-", "_")
+            destinations.append(WebhookDestination(
+                name=name,
+                url=url,
+                secret=os.getenv(f"LEAD_WEBHOOK_SECRET_{env_name}", default_secret),
+                timeout=float(os.getenv(f"LEAD_WEBHOOK_TIMEOUT_{env_name}", default_timeout)),
+                max_retries=max_retries
+            ))
+        return destinations
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared connection pool for all destinations"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                headers=self.webhook_headers
+            )
+        return self._client
+
+    async def close(self):
+        """Stop retry workers and close the connection pool"""
+        for destination in self.destinations:
+            if destination._retry_task and not destination._retry_task.done():
+                destination._retry_task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
     async def send_lead(self, lead_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Send lead to webhook"""
-        if not self.webhook_url:
-            logger.warning("No webhook URL configured. Set LEAD_WEBHOOK_URL in .env")
+        """Send lead to every configured webhook"""
+        if not self.destinations:
+            logger.warning("No webhook URL configured. Set LEAD_WEBHOOK_URL or LEAD_WEBHOOK_DESTINATIONS in .env")
             return {
                 "success": False,
                 "error": "No webhook URL configured"
             }
-        
+
+        # Add timestamp and source
+        lead_data["captured_at"] = datetime.now(self.hawaii_tz).isoformat()
+        lead_data["source"] = "Leni Begonia Chatbot"
+        lead_data["source_url"] = "https://hawaii.lenilani.com"
+
+        # Each destination has its own timeout, so a slow endpoint only costs its own delivery
+        results = await asyncio.gather(*[
+            self._deliver(destination, lead_data, attempt=0)
+            for destination in self.destinations
+        ])
+
+        by_destination = {d.name: r for d, r in zip(self.destinations, results)}
+        return {
+            "success": any(r["success"] for r in results),
+            "destinations": by_destination
+        }
+
+    async def _deliver(
+        self,
+        destination: WebhookDestination,
+        lead_data: Dict[str, Any],
+        attempt: int
+    ) -> Dict[str, Any]:
+        """Deliver one payload to one destination, queueing a retry on transient failure"""
+        body = self._build_body(destination, lead_data)
+        headers = {**trace_headers(), **self._sign(destination, body)}
+
+        started = time.perf_counter()
         try:
-            # Add timestamp and source
-            lead_data["captured_at"] = datetime.now(self.hawaii_tz).isoformat()
-            lead_data["source"] = "Leni Begonia Chatbot"
-            lead_data["source_url"] = "https://hawaii.lenilani.com"
-            
-            # Send to webhook
-            response = requests.post(
-                self.webhook_url,
-                headers=self.webhook_headers,
-                json=lead_data,
-                timeout=10
+            response = await self._get_client().post(
+                destination.url,
+                content=body,
+                headers=headers,
+                timeout=destination.timeout
             )
-            
-            response.raise_for_status()
-            
-            logger.info(f"Lead sent to webhook successfully. Status: {response.status_code}")
-            
-            return {
-                "success": True,
-                "webhook_response": response.text[:200],
-                "status_code": response.status_code
-            }
-            
-        except requests.exceptions.Timeout:
-            logger.error("Webhook timeout")
-            return {
-                "success": False,
-                "error": "Webhook timeout"
-            }
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Webhook error: {str(e)}")
-            return {
-                "success": False,
-                "error": str(e)
+            destination.record_latency((time.perf_counter() - started) * 1000)
+            destination.metrics["last_status"] = response.status_code
+
+            if response.is_success:
+                destination.metrics["sent_total"] += 1
+                logger.info(f"Lead sent to webhook '{destination.name}'. Status: {response.status_code}")
+                return {
+                    "success": True,
+                    "webhook_response": response.text[:200],
+                    "status_code": response.status_code
+                }
+
+            error = f"HTTP {response.status_code}"
+            retryable = response.status_code in RETRYABLE_STATUS_CODES
+
+        except httpx.TimeoutException:
+            destination.record_latency((time.perf_counter() - started) * 1000)
+            error = "Webhook timeout"
+            retryable = True
+        except httpx.HTTPError as e:
+            error = str(e) or e.__class__.__name__
+            retryable = True
+
+        destination.metrics["failed_total"] += 1
+        destination.metrics["last_error"] = error
+        logger.error(f"Webhook '{destination.name}' error: {error}")
+
+        queued = retryable and self._queue_retry(destination, lead_data, attempt + 1)
+        return {
+            "success": False,
+            "error": error,
+            "queued": queued
+        }
+
+    def _queue_retry(self, destination: WebhookDestination, lead_data: Dict[str, Any], attempt: int) -> bool:
+        """Put a failed payload on the destination's own retry queue"""
+        if attempt > destination.max_retries:
+            destination.metrics["dropped_total"] += 1
+            logger.error(f"Webhook '{destination.name}' gave up on lead {lead_data.get('lead_id')} after {attempt - 1} retries")
+            return False
+
+        if len(destination.retry_queue) >= destination.max_queue_size:
+            # Make room by dropping the retry that is due furthest in the future
+            destination.retry_queue.remove(max(destination.retry_queue))
+            heapq.heapify(destination.retry_queue)
+            destination.metrics["dropped_total"] += 1
+
+        delay = min(300, 2 ** attempt)
+        heapq.heappush(destination.retry_queue, (
+            time.monotonic() + delay, next(destination._retry_sequence), lead_data, attempt, current_trace_id()
+        ))
+        destination._retry_wakeup.set()
+
+        if destination._retry_task is None or destination._retry_task.done():
+            destination._retry_task = asyncio.create_task(self._retry_worker(destination))
+        return True
+
+    async def _retry_worker(self, destination: WebhookDestination):
+        """Drain one destination's retry queue in due-time order without touching the others"""
+        while destination.retry_queue:
+            due, _, lead_data, attempt, trace_id = destination.retry_queue[0]
+            wait = due - time.monotonic()
+            if wait > 0:
+                # Woken early if a retry that is due sooner gets queued
+                destination._retry_wakeup.clear()
+                try:
+                    await asyncio.wait_for(destination._retry_wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(destination.retry_queue)
+            destination.metrics["retried_total"] += 1
+            WEBHOOK_RETRIES.inc(destination=destination.name)
+            # Retries keep the trace of the request that captured the lead
+            with traced(trace_id):
+                try:
+                    await self._deliver(destination, lead_data, attempt)
+                except Exception as e:
+                    logger.error(f"Webhook '{destination.name}' retry failed: {str(e)}")
+
+    def _build_body(self, destination: WebhookDestination, lead_data: Dict[str, Any]) -> bytes:
+        """Serialize the payload in the shape the destination expects"""
+        if destination.payload_format == "slack" and lead_data.get("event") == "lead_updated":
+            changes = "\n".join(
+                f"• {field}: {str(value)[:80]}" for field, value in (lead_data.get("changes") or {}).items()
+            )
+            who = lead_data.get("name") or lead_data.get("email") or lead_data.get("phone") or lead_data.get("lead_id")
+            payload = {"text": f"✏️ Lead updated: {who}\n{changes}"}
+        elif destination.payload_format == "slack":
+            payload = {
+                "text": (
+                    f"🌺 New lead: {lead_data.get('name') or 'Unknown'} "
+                    f"({lead_data.get('company') or lead_data.get('business_type') or 'Unknown business'}) - "
+                    f"{lead_data.get('lead_quality', '')} | {lead_data.get('email', '')} {lead_data.get('phone', '')}\n"
+                    f"{lead_data.get('recommended_action', '')}"
+                )
             }
+        else:
+            payload = lead_data
+        return json.dumps(payload, default=str).encode("utf-8")
+
+    def _sign(self, destination: WebhookDestination, body: bytes) -> Dict[str, str]:
+        """HMAC-SHA256 over "<timestamp>.<body>" so receivers can verify and reject replays"""
+        if not destination.secret:
+            return {}
+
+        timestamp = str(int(time.time()))
+        signature = hmac.new(
+            destination.secret.encode("utf-8"),
+            timestamp.encode("utf-8") + b"." + body,
+            hashlib.sha256
+        ).hexdigest()
+        return {
+            "X-LeniLani-Timestamp": timestamp,
+            "X-LeniLani-Signature": f"sha256={signature}"
+        }
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-destination latency, error and retry queue metrics (for admin stats)"""
+        return {d.name: d.get_metrics() for d in self.destinations}
 
 
 def create_zapier_friendly_lead(lead_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -124,4 +360,8 @@ def _get_recommended_action(score: int) -> str:
     elif score >= 40:
         return "MEDIUM: Follow up in 2-3 days"
     else:
-        return "LOW: Add to nurture campaign"
\ No newline at end of file
+        return "LOW: Add to nurture campaign"
+
+
+# Create global instance
+webhook_lead_capture = WebhookLeadCapture()
@@ -0,0 +1,508 @@
+"""
+WebSocket Manager - JSON frame protocol for real-time chat
+Every server frame is a JSON object with a "type". Content frames (welcome,
+response, broadcast) also carry a per-session "seq" and are kept in a bounded
+replay buffer, so a client that reconnects with ?last_seq=N gets whatever it
+missed instead of re-sending (and regenerating) its message. Control frames
+(ping, pong, error, resumed) are not sequenced.
+
+Frames go through a bounded per-connection send queue drained by its own task,
+so one slow client never holds up a broadcast or another client's replies.
+
+With a backplane attached (WS_BACKPLANE=redis), sends for clients connected to
+another worker and all broadcasts are fanned out over pub/sub.
+
+Each chat message is handled under its own trace, timed from the moment the
+frame was read.
+"""
+import os
+import json
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, Awaitable, Callable, Optional
+
+import pytz
+from fastapi import WebSocket, WebSocketDisconnect
+
+from api_backend.services.fast_json import dumps
+from api_backend.services.tracing import traced
+from api_backend.services.ws_backplane import DEFAULT_CHANNEL, create_backplane
+
+logger = logging.getLogger(__name__)
+
+hawaii_tz = pytz.timezone('Pacific/Honolulu')
+
+# Close codes
+CLOSE_SLOW_CONSUMER = 1013  # Try again later
+CLOSE_HEARTBEAT_TIMEOUT = 1001  # Going away
+CLOSE_REPLACED = 4000  # Same client_id connected again
+
+# Client message IDs remembered per session to ignore re-sends
+RECENT_MESSAGE_IDS = 50
+
+
+def _frame_body(frame_type: str, payload: Dict[str, Any]) -> bytes:
+    """Serialize a frame without its seq (spliced in per session)"""
+    return dumps({
+        "type": frame_type,
+        **payload,
+        "timestamp": datetime.now(hawaii_tz).isoformat()
+    })
+
+
+class Connection:
+    """One accepted WebSocket and its send queue"""
+
+    def __init__(self, websocket: WebSocket, client_id: str, max_queue: int, send_timeout: float):
+        self.websocket = websocket
+        self.client_id = client_id
+        self.send_timeout = send_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.stream: Optional["SessionStream"] = None
+        self.resumed = False
+        self.last_seen = time.monotonic()
+        self.closed = False
+        self.close_code: Optional[int] = None
+        self._tasks: list = []
+
+    def send_control(self, frame_type: str, **payload) -> bool:
+        """Unsequenced frame for this connection only (not replayed)"""
+        return self.enqueue(_frame_body(frame_type, payload).decode("utf-8"))
+
+    def enqueue(self, text: str) -> bool:
+        """Queue an encoded frame; returns False if closed or dropped as too slow"""
+        if self.closed or self.close_code is not None:
+            return False
+
+        try:
+            self.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            # Slow consumer - drop the connection rather than buffer without bound
+            # (the session's replay buffer still has the frames for a resume)
+            logger.warning(f"WebSocket client {self.client_id} is not keeping up; disconnecting")
+            self.close_code = CLOSE_SLOW_CONSUMER
+            asyncio.create_task(self.close(CLOSE_SLOW_CONSUMER))
+            return False
+        return True
+
+    async def _sender(self):
+        try:
+            # Checked each turn as well - wait_for can swallow a cancel that races a completed send
+            while not self.closed:
+                text = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_text(text), timeout=self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"WebSocket send to {self.client_id} timed out; disconnecting")
+            await self.close(CLOSE_SLOW_CONSUMER)
+        except Exception as e:
+            logger.info(f"WebSocket send to {self.client_id} failed: {str(e)}")
+            await self.close()
+
+    async def close(self, code: int = 1000):
+        if self.closed:
+            return
+        self.closed = True
+        if self.close_code is None:
+            self.close_code = code
+
+        current = asyncio.current_task()
+        for task in self._tasks:
+            if task is not current:
+                task.cancel()
+        try:
+            await self.websocket.close(code=self.close_code)
+        except Exception:
+            pass
+
+
+class SessionStream:
+    """
+    Sequenced frames for one client_id, independent of any single socket
+
+    Replies generated while the client is disconnected still land in the
+    replay buffer and are delivered when it resumes.
+    """
+
+    def __init__(self, client_id: str, replay_buffer_size: int, max_pending_messages: int):
+        self.client_id = client_id
+        self.seq = 0
+        self.buffer: deque = deque(maxlen=replay_buffer_size)
+        self.connection: Optional[Connection] = None
+        # (message, perf_counter when it was read) waiting for the worker
+        self.inbound: asyncio.Queue = asyncio.Queue(maxsize=max_pending_messages)
+        self.worker: Optional[asyncio.Task] = None
+        self.detached_at: Optional[float] = None
+        self._recent_ids: deque = deque(maxlen=RECENT_MESSAGE_IDS)
+
+    def send(self, frame_type: str, **payload) -> int:
+        """Sequence, buffer and (if connected) deliver a frame; returns its seq"""
+        return self.send_body(_frame_body(frame_type, payload))
+
+    def send_body(self, body: bytes) -> int:
+        self.seq += 1
+        text = (b'{"seq":%d,' % self.seq + body[1:]).decode("utf-8")
+        self.buffer.append((self.seq, text))
+        if self.connection is not None:
+            self.connection.enqueue(text)
+        return self.seq
+
+    def ack(self, seq: int):
+        """Forget frames the client has confirmed"""
+        while self.buffer and self.buffer[0][0] <= seq:
+            self.buffer.popleft()
+
+    def replay(self, connection: Connection, after_seq: int) -> int:
+        """Deliver buffered frames after after_seq; returns how many were sent"""
+        oldest = self.buffer[0][0] if self.buffer else self.seq + 1
+        connection.send_control(
+            "resumed",
+            last_seq=self.seq,
+            # Frames older than the buffer are gone - the client should refetch state
+            complete=after_seq >= oldest - 1
+        )
+        replayed = 0
+        for seq, text in list(self.buffer):
+            if seq > after_seq and connection.enqueue(text):
+                replayed += 1
+        return replayed
+
+    def is_duplicate(self, message_id: Optional[str]) -> bool:
+        """True if this client message ID was already accepted"""
+        if not message_id:
+            return False
+        if message_id in self._recent_ids:
+            return True
+        self._recent_ids.append(message_id)
+        return False
+
+
+class ConnectionManager:
+    """Active WebSocket connections, resumable sessions, heartbeats and broadcast"""
+
+    def __init__(
+        self,
+        max_queue: int = 100,
+        send_timeout: float = 10.0,
+        heartbeat_interval: float = 25.0,
+        max_pending_messages: int = 10,
+        replay_buffer_size: int = 50,
+        resume_ttl: float = 300.0,
+        backplane=None,
+        channel: str = DEFAULT_CHANNEL
+    ):
+        self.active_connections: Dict[str, Connection] = {}
+        self.streams: Dict[str, SessionStream] = {}
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.max_pending_messages = max_pending_messages
+        self.replay_buffer_size = replay_buffer_size
+        self.resume_ttl = resume_ttl
+        self.backplane = backplane
+        self.channel = channel
+        self.instance_id = uuid.uuid4().hex
+        self._backplane_started = False
+        self._expiry_task: Optional[asyncio.Task] = None
+        self.stats = {
+            "connections_total": 0,
+            "slow_disconnects": 0,
+            "heartbeat_timeouts": 0,
+            "resumes": 0,
+            "replayed_frames": 0,
+            "duplicate_messages": 0,
+            "backplane_published": 0,
+            "backplane_received": 0,
+            "backplane_errors": 0
+        }
+
+    async def start(self):
+        """Start expiring detached sessions and subscribe to the backplane (if any)"""
+        if self._expiry_task is None:
+            self._expiry_task = asyncio.create_task(self._expire_loop())
+        if self.backplane is None or self._backplane_started:
+            return
+        try:
+            await self.backplane.start()
+            await self.backplane.subscribe(self.channel, self._on_backplane_message)
+            self._backplane_started = True
+            logger.info(f"WebSocket backplane ({self.backplane.name}) subscribed to {self.channel}")
+        except Exception as e:
+            # Fall back to local-only delivery rather than failing startup
+            self.stats["backplane_errors"] += 1
+            logger.error(f"WebSocket backplane unavailable, delivering locally only: {str(e)}")
+
+    async def stop(self):
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            try:
+                await self._expiry_task
+            except asyncio.CancelledError:
+                pass
+            self._expiry_task = None
+
+        if self._backplane_started:
+            self._backplane_started = False
+            try:
+                await self.backplane.stop()
+            except Exception as e:
+                logger.warning(f"Error stopping WebSocket backplane: {str(e)}")
+
+    async def _publish(self, message: Dict[str, Any]) -> bool:
+        if not self._backplane_started:
+            return False
+        try:
+            await self.backplane.publish(self.channel, {"origin": self.instance_id, **message})
+            self.stats["backplane_published"] += 1
+            return True
+        except Exception as e:
+            self.stats["backplane_errors"] += 1
+            logger.error(f"WebSocket backplane publish failed: {str(e)}")
+            return False
+
+    async def _on_backplane_message(self, message: Dict[str, Any]):
+        """Deliver a frame published by another worker to local sessions"""
+        if message.get("origin") == self.instance_id:
+            return
+        self.stats["backplane_received"] += 1
+
+        if message.get("kind") == "broadcast":
+            self._broadcast_local(message["message"], message["frame_type"])
+        elif message.get("kind") == "direct":
+            stream = self.streams.get(message.get("client_id"))
+            if stream is not None:
+                stream.send(message["frame_type"], **message["message"])
+
+    async def connect(self, websocket: WebSocket, client_id: str, last_seq: Optional[int] = None) -> Connection:
+        """
+        Accept a socket, resuming the client's session when last_seq is given
+
+        connection.resumed tells the caller whether to skip its welcome frame.
+        """
+        await websocket.accept()
+        self._expire_streams()
+
+        previous = self.active_connections.get(client_id)
+        if previous is not None:
+            await previous.close(CLOSE_REPLACED)
+
+        connection = Connection(websocket, client_id, self.max_queue, self.send_timeout)
+        connection._tasks.append(asyncio.create_task(connection._sender()))
+        if self.heartbeat_interval > 0:
+            connection._tasks.append(asyncio.create_task(self._heartbeat(connection)))
+
+        stream = self.streams.get(client_id)
+        if stream is not None and last_seq is not None:
+            stream.ack(last_seq)
+            replayed = stream.replay(connection, last_seq)
+            connection.resumed = True
+            self.stats["resumes"] += 1
+            self.stats["replayed_frames"] += replayed
+            logger.info(f"🌺 Client {client_id} resumed after seq {last_seq} ({replayed} frames replayed)")
+        else:
+            if stream is not None:
+                self._drop_stream(stream)
+            stream = SessionStream(client_id, self.replay_buffer_size, self.max_pending_messages)
+            self.streams[client_id] = stream
+            logger.info(f"🌺 New connection from client: {client_id}")
+
+        stream.connection = connection
+        stream.detached_at = None
+        connection.stream = stream
+
+        self.active_connections[client_id] = connection
+        self.stats["connections_total"] += 1
+        return connection
+
+    async def disconnect(self, connection: Connection):
+        if connection.close_code == CLOSE_SLOW_CONSUMER:
+            self.stats["slow_disconnects"] += 1
+        await connection.close()
+
+        stream = connection.stream
+        if stream is not None and stream.connection is connection:
+            # Keep the session (and any in-flight reply) around for a resume
+            stream.connection = None
+            stream.detached_at = time.monotonic()
+
+        if self.active_connections.get(connection.client_id) is connection:
+            del self.active_connections[connection.client_id]
+            logger.info(f"🌙 Client disconnected: {connection.client_id}")
+
+    def _drop_stream(self, stream: SessionStream):
+        if stream.worker is not None:
+            stream.worker.cancel()
+        if self.streams.get(stream.client_id) is stream:
+            del self.streams[stream.client_id]
+
+    def _expire_streams(self):
+        """Forget sessions that have been disconnected longer than the resume TTL"""
+        cutoff = time.monotonic() - self.resume_ttl
+        for stream in list(self.streams.values()):
+            if stream.detached_at is not None and stream.detached_at < cutoff:
+                self._drop_stream(stream)
+
+    async def _expire_loop(self):
+        """Sweep detached sessions even when no new clients are connecting"""
+        while True:
+            await asyncio.sleep(min(self.resume_ttl, 60.0))
+            self._expire_streams()
+
+    async def send_message(self, message: Dict[str, Any], client_id: str, frame_type: str = "message") -> bool:
+        """
+        Send a frame to one client's session, wherever it is connected
+
+        A session that is detached here is kept for a possible resume, but the
+        client may already have reconnected to another worker - the frame is
+        buffered for the resume and published as well.
+
+        Returns False only if the client has no session here and there is no
+        backplane to reach other workers.
+        """
+        stream = self.streams.get(client_id)
+        if stream is not None:
+            stream.send(frame_type, **message)
+            if stream.connection is not None:
+                return True
+        published = await self._publish({
+            "kind": "direct",
+            "client_id": client_id,
+            "frame_type": frame_type,
+            "message": message
+        })
+        return published or stream is not None
+
+    async def broadcast(self, message: Dict[str, Any], frame_type: str = "broadcast") -> int:
+        """Queue a frame on every session (on all workers); returns the local count"""
+        delivered = self._broadcast_local(message, frame_type)
+        await self._publish({"kind": "broadcast", "frame_type": frame_type, "message": message})
+        return delivered
+
+    def _broadcast_local(self, message: Dict[str, Any], frame_type: str) -> int:
+        """Serialize once and enqueue on every local session without waiting on any socket"""
+        body = _frame_body(frame_type, message)
+        streams = list(self.streams.values())
+        for stream in streams:
+            stream.send_body(body)
+        return len(streams)
+
+    async def _heartbeat(self, connection: Connection):
+        """Ping idle clients and drop ones that stop answering"""
+        while not connection.closed:
+            await asyncio.sleep(self.heartbeat_interval)
+            idle = time.monotonic() - connection.last_seen
+            if idle > self.heartbeat_interval * 2:
+                logger.info(f"WebSocket client {connection.client_id} missed heartbeats; disconnecting")
+                self.stats["heartbeat_timeouts"] += 1
+                await connection.close(CLOSE_HEARTBEAT_TIMEOUT)
+                return
+            if idle >= self.heartbeat_interval:
+                connection.send_control("ping")
+
+    def _ensure_worker(
+        self,
+        stream: SessionStream,
+        handler: Callable[[SessionStream, Dict[str, Any]], Awaitable[None]]
+    ):
+        """
+        Chat messages are handled one at a time per session, so the next message
+        is read (and pings answered) while a reply is still generating, and
+        replies still come back in order. The worker outlives the socket.
+        """
+        if stream.worker is not None and not stream.worker.done():
+            return
+
+        async def worker():
+            while True:
+                data, received_at = await stream.inbound.get()
+                # Time spent waiting behind earlier messages shows up as "queue"
+                with traced(data.get("trace_id"), started=received_at) as trace:
+                    try:
+                        await handler(stream, data)
+                    except Exception as e:
+                        logger.error(f"Error handling WebSocket message from {stream.client_id}: {str(e)}")
+                        stream.send("error", error="message_failed", reply_to=data.get("id"), trace_id=trace.trace_id)
+
+        stream.worker = asyncio.create_task(worker())
+
+    async def serve(
+        self,
+        connection: Connection,
+        handler: Callable[[SessionStream, Dict[str, Any]], Awaitable[None]]
+    ):
+        """Read frames until the client goes away"""
+        stream = connection.stream
+        self._ensure_worker(stream, handler)
+
+        try:
+            while not connection.closed:
+                message = await connection.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                connection.last_seen = time.monotonic()
+
+                raw = message.get("text")
+                if raw is None:
+                    # The protocol is JSON text only
+                    connection.send_control("error", error="binary_not_supported")
+                    continue
+
+                try:
+                    data = json.loads(raw)
+                    if not isinstance(data, dict):
+                        raise ValueError("frame must be an object")
+                except ValueError:
+                    connection.send_control("error", error="invalid_json")
+                    continue
+
+                # Frames without a type are plain chat messages (original protocol)
+                frame_type = data.get("type", "message")
+                if frame_type == "ping":
+                    connection.send_control("pong")
+                elif frame_type == "pong":
+                    continue
+                elif frame_type == "ack":
+                    if isinstance(data.get("seq"), int):
+                        stream.ack(data["seq"])
+                elif frame_type == "message":
+                    if stream.is_duplicate(data.get("id")):
+                        # Already answered or in progress - the reply is (or will be) in the stream
+                        self.stats["duplicate_messages"] += 1
+                        continue
+                    try:
+                        stream.inbound.put_nowait((data, time.perf_counter()))
+                    except asyncio.QueueFull:
+                        connection.send_control("error", error="too_many_pending_messages", reply_to=data.get("id"))
+                else:
+                    connection.send_control("error", error="unknown_type", reply_to=data.get("id"))
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            await self.disconnect(connection)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.active_connections),
+            "sessions": len(self.streams),
+            "queued_frames": sum(c.queue.qsize() for c in self.active_connections.values()),
+            "buffered_frames": sum(len(s.buffer) for s in self.streams.values()),
+            "backplane": self.backplane.name if self._backplane_started else None,
+            **self.stats
+        }
+
+
+# Create global instance
+connection_manager = ConnectionManager(
+    max_queue=int(os.getenv("WS_SEND_QUEUE_SIZE", "100")),
+    send_timeout=float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10")),
+    heartbeat_interval=float(os.getenv("WS_HEARTBEAT_SECONDS", "25")),
+    max_pending_messages=int(os.getenv("WS_MAX_PENDING_MESSAGES", "10")),
+    replay_buffer_size=int(os.getenv("WS_REPLAY_BUFFER_SIZE", "50")),
+    resume_ttl=float(os.getenv("WS_RESUME_TTL_SECONDS", "300")),
+    backplane=create_backplane(os.getenv("WS_BACKPLANE", "none"))
+)
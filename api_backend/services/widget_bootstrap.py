@@ -0,0 +1,100 @@
+"""
+Widget Bootstrap - Everything the chat widget needs to open, in one request
+Config, time-of-day greeting, starter suggestions and the logo are cached for a
+short TTL; only the session ID is generated per request
+"""
+import os
+import time
+import uuid
+import base64
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+from api_backend.services.static_assets import static_assets
+
+logger = logging.getLogger(__name__)
+
+# Greetings shown to bootstrapped sessions, kept until the session's first message
+ISSUED_GREETING_TTL_SECONDS = 3600
+MAX_ISSUED_GREETINGS = 10000
+
+
+def new_session_id() -> str:
+    return f"web-{uuid.uuid4().hex}"
+
+
+def logo_data_uri(name: str = "logo") -> Optional[str]:
+    """Inline the cached logo so the widget header needs no extra request"""
+    asset = static_assets.get(name)
+    if asset is None:
+        return None
+    media_type = asset.media_type.split(";")[0]
+    return f"data:{media_type};base64,{base64.b64encode(asset.body).decode('ascii')}"
+
+
+class WidgetBootstrap:
+    """Short-TTL cache of the shared part of the bootstrap payload"""
+
+    def __init__(self, ttl_seconds: float = 60.0):
+        self.ttl_seconds = ttl_seconds
+        self._payload: Optional[Dict[str, Any]] = None
+        self._expires_at = 0.0
+        self._issued: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.stats = {"hits": 0, "builds": 0}
+
+    def get_payload(self, build: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Shared payload, rebuilt at most once per TTL"""
+        now = time.monotonic()
+        if self._payload is None or now >= self._expires_at:
+            self._payload = build()
+            self._expires_at = now + self.ttl_seconds
+            self.stats["builds"] += 1
+        else:
+            self.stats["hits"] += 1
+        return self._payload
+
+    def invalidate(self):
+        self._payload = None
+
+    def response(self, build: Callable[[], Dict[str, Any]]) -> JSONResponse:
+        """
+        Bootstrap response with a fresh session ID
+
+        Not cacheable by browsers or CDNs - each open gets its own session.
+        """
+        payload = {**self.get_payload(build), "session_id": new_session_id()}
+        if payload.get("greeting"):
+            self._remember_greeting(payload["session_id"], payload["greeting"])
+        return JSONResponse(content=payload, headers={"Cache-Control": "no-store"})
+
+
+    def _remember_greeting(self, session_id: str, greeting: str):
+        self._issued[session_id] = (greeting, time.monotonic() + ISSUED_GREETING_TTL_SECONDS)
+        while len(self._issued) > MAX_ISSUED_GREETINGS:
+            self._issued.popitem(last=False)
+
+    def claim_greeting(self, session_id: str, shown: Optional[str] = None) -> Optional[str]:
+        """
+        Greeting this server showed the session (at most once)
+
+        The widget echoes the greeting it displayed, but that text is never
+        trusted: only a greeting issued with the session ID is returned, or -
+        when the session was bootstrapped by another worker - the current
+        shared greeting if the echoed text matches it exactly.
+        """
+        issued = self._issued.pop(session_id, None)
+        if issued is not None and time.monotonic() < issued[1]:
+            return issued[0]
+        current = (self._payload or {}).get("greeting")
+        if shown and current and shown == current:
+            return current
+        return None
+
+
+# Create global instance
+widget_bootstrap = WidgetBootstrap(
+    ttl_seconds=float(os.getenv("WIDGET_BOOTSTRAP_TTL_SECONDS", "60"))
+)
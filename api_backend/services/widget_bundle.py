@@ -0,0 +1,118 @@
+"""
+Widget Bundle - Content-hashed delivery of the embeddable chat widget
+The minified widget is served at /widget.<hash>.js with an immutable cache policy,
+and /widget.js becomes a tiny short-lived loader that points at the current hash
+"""
+import re
+import logging
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response, RedirectResponse
+
+from api_backend.services.static_assets import static_assets
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_ASSET = "widget"
+LOADER_ASSET = "widget_loader"
+
+# Safe to cache forever - a new build gets a new URL
+BUNDLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Short enough that a deploy reaches embedding sites within minutes
+LOADER_CACHE_CONTROL = "public, max-age=300"
+
+VERSION_LENGTH = 12
+VERSION_PATTERN = re.compile(r"^[0-9a-f]{%d}$" % VERSION_LENGTH)
+
+LOADER_TEMPLATE = """(function(){
+var s=document.currentScript,b=window.LENILANI_CHATBOT_URL;
+if(!b&&s&&s.src){b=s.src.replace(/\\/widget\\.js(\\?.*)?$/,'');window.LENILANI_CHATBOT_URL=b;}
+var w=document.createElement('script');
+w.src=(b||'').replace(/\\/+$/,'')+'/widget.%s.js';
+w.async=true;
+(document.head||document.documentElement).appendChild(w);
+})();
+"""
+
+
+def minify_js(source: bytes) -> bytes:
+    """
+    Conservative minification for the hand-written widget
+
+    Drops whole-line // comments, indentation and blank lines outside template
+    literals. Template literal contents (the widget's CSS and HTML) and line
+    breaks are kept, so ASI and string contents are never affected.
+    """
+    text = source.decode("utf-8")
+    out = []
+    in_template = False
+
+    for line in text.split("\n"):
+        if in_template:
+            out.append(line)
+        else:
+            stripped = line.strip()
+            if not stripped or stripped.startswith("//"):
+                continue
+            out.append(stripped)
+
+        # An odd number of unescaped backticks toggles template state
+        if (line.count("`") - line.count("\\`")) % 2:
+            in_template = not in_template
+
+    return ("\n".join(out) + "\n").encode("utf-8")
+
+
+def current_version() -> Optional[str]:
+    """Hash of the currently cached widget bundle"""
+    asset = static_assets.get(BUNDLE_ASSET)
+    if asset is None:
+        return None
+    return asset.etag.strip('"')[:VERSION_LENGTH]
+
+
+def bundle_url(version: str) -> str:
+    return f"/widget.{version}.js"
+
+
+# Bundle version the cached loader currently points at
+_loader_version: Optional[str] = None
+
+
+def _ensure_loader(version: str):
+    """(Re)build the loader when the bundle hash changes"""
+    global _loader_version
+    if _loader_version != version or static_assets.get(LOADER_ASSET) is None:
+        static_assets.register_content(
+            LOADER_ASSET,
+            (LOADER_TEMPLATE % version).encode("utf-8"),
+            "application/javascript; charset=utf-8",
+            LOADER_CACHE_CONTROL
+        )
+        _loader_version = version
+        logger.info(f"Widget loader now points at {bundle_url(version)}")
+
+
+def loader_response(request: Request) -> Optional[Response]:
+    """Serve /widget.js - returns None if no widget bundle is loaded"""
+    version = current_version()
+    if version is None:
+        return None
+    _ensure_loader(version)
+    return static_assets.response(request, LOADER_ASSET)
+
+
+def bundle_response(request: Request, version: str) -> Optional[Response]:
+    """
+    Serve /widget.<version>.js
+
+    Stale versions (a loader cached before a deploy) are redirected to the
+    current bundle rather than served under an immutable URL they don't match.
+    """
+    current = current_version()
+    if current is None or not VERSION_PATTERN.match(version):
+        return None
+    if version != current:
+        return RedirectResponse(bundle_url(current), status_code=302, headers={"Cache-Control": "no-cache"})
+    return static_assets.response(request, BUNDLE_ASSET)
@@ -0,0 +1,115 @@
+"""
+WebSocket Backplane - Pub/sub fan-out of WebSocket frames across workers and instances
+Each ConnectionManager publishes sends it can't deliver locally (and every
+broadcast); all managers subscribed to the channel deliver to their own sockets.
+Redis is used in production, the in-process backplane for tests and single workers.
+"""
+import os
+import json
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = "lenilani:ws"
+
+Handler = Callable[[Dict], Awaitable[None]]
+
+
+class InProcessBackplane:
+    """Delivers published messages to subscribers in the same process"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Handler]] = {}
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        self._subscribers.clear()
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self._subscribers.setdefault(channel, []).append(handler)
+
+    async def publish(self, channel: str, message: Dict):
+        # Round-trip through JSON so tests see exactly what Redis would carry
+        payload = json.loads(json.dumps(message, default=str))
+        for handler in list(self._subscribers.get(channel, [])):
+            try:
+                await handler(payload)
+            except Exception as e:
+                logger.error(f"Backplane handler error on {channel}: {str(e)}")
+
+
+class RedisBackplane:
+    """Redis PUBLISH/SUBSCRIBE backplane"""
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    async def start(self):
+        if aioredis is None:
+            raise RuntimeError("redis package is not installed")
+        self._client = aioredis.from_url(self.url)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        logger.info("WebSocket backplane connected to Redis")
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def subscribe(self, channel: str, handler: Handler):
+        self._handlers.setdefault(channel, []).append(handler)
+        await self._pubsub.subscribe(channel)
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def publish(self, channel: str, message: Dict):
+        await self._client.publish(channel, json.dumps(message, default=str))
+
+    async def _listen(self):
+        while True:
+            try:
+                async for item in self._pubsub.listen():
+                    channel = item["channel"].decode() if isinstance(item["channel"], bytes) else item["channel"]
+                    payload = json.loads(item["data"])
+                    for handler in self._handlers.get(channel, []):
+                        try:
+                            await handler(payload)
+                        except Exception as e:
+                            logger.error(f"Backplane handler error on {channel}: {str(e)}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Connection dropped - redis-py reconnects on the next listen()
+                logger.error(f"Redis backplane listener error: {str(e)}")
+                await asyncio.sleep(1)
+
+
+def create_backplane(name: str):
+    """Build the backplane named by WS_BACKPLANE (None when disabled)"""
+    name = (name or "").lower()
+    if name == "redis":
+        return RedisBackplane(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    if name == "memory":
+        return InProcessBackplane()
+    return None
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark the /chat pre-processing stage (cultural context + response enhancement)
+
+"rebuilt" reproduces the old per-request work: read the Hawaii clock, build the
+Pydantic context from the static tables and sample phrases. "precomputed" is
+the current get_cultural_context (cached time period, precomputed context,
+per-request phrase sampling only).
+
+Usage: python benchmarks/bench_chat_preprocessing.py [iterations]
+"""
+import os
+import sys
+import random
+import timeit
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "api_backend"))
+
+from api_backend.services.cultural_tone_manager import CulturalToneManager
+
+RESPONSE_TEXT = "Shoots, we can help your restaurant with inventory forecasting and online ordering."
+
+manager = CulturalToneManager()
+
+
+def rebuilt(business_type=None, island=None):
+    time_of_day = manager._time_of_day_for_hour(datetime.now(manager.hawaii_tz).hour)
+    context = manager._build_context(time_of_day, business_type, island, "mixed")
+    context = context.model_copy(update={"suggested_phrases": random.sample(manager.business_pidgin, 3)})
+    manager.enhance_response(RESPONSE_TEXT, context)
+    return context
+
+
+def precomputed(business_type=None, island=None):
+    context = manager.get_cultural_context(business_type, island)
+    manager.enhance_response(RESPONSE_TEXT, context)
+    return context
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{iterations} iterations\n")
+
+    for label, args in [("default", ()), ("restaurant / maui", ("restaurant", "maui"))]:
+        before = min(timeit.repeat(lambda: rebuilt(*args), number=iterations, repeat=3)) / iterations * 1e6
+        after = min(timeit.repeat(lambda: precomputed(*args), number=iterations, repeat=3)) / iterations * 1e6
+        print(f"{label:20} rebuilt {before:7.2f} us   precomputed {after:7.2f} us   {before / after:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
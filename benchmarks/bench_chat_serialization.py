@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark /chat response serialization
+
+Compares the old path (ChatResponse model + response-model validation +
+jsonable_encoder + json.dumps) against the FastJSONResponse path with cached
+cultural context fragments, and the lean metadata mode.
+
+Usage: python benchmarks/bench_chat_serialization.py [iterations]
+"""
+import os
+import sys
+import timeit
+from datetime import datetime
+
+import pytz
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "api_backend"))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api_backend.main import ChatResponse
+from api_backend.services import fast_json
+from api_backend.services.cultural_tone_manager import CulturalToneManager
+
+RESPONSE_TEXT = (
+    "Aloha! Shoots, we can help with that. For one restaurant on Maui, we usually "
+    "start with inventory forecasting and online ordering - want me to walk you through pricing?"
+)
+SUGGESTIONS = ["Restaurant AI solutions", "Inventory optimization", "Customer analytics", "Schedule consultation"]
+
+manager = CulturalToneManager()
+hawaii_tz = pytz.timezone("Pacific/Honolulu")
+
+
+def legacy():
+    context = manager.get_cultural_context()
+    content = ChatResponse(
+        response=RESPONSE_TEXT,
+        metadata={
+            "cultural_context": context,
+            "timestamp": datetime.now(hawaii_tz).isoformat(),
+            "intent": None,
+            "confidence": None
+        },
+        suggestions=SUGGESTIONS,
+        quick_replies=[]
+    )
+    # What FastAPI does with response_model: validate, encode, then json.dumps
+    validated = ChatResponse.model_validate(content.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def fast(lean: bool = False):
+    context = manager.get_cultural_context()
+    if lean:
+        metadata = {"time_context": context.time_context.value}
+    else:
+        metadata = {"cultural_context": manager.serialize_context(context)}
+    metadata.update({
+        "timestamp": datetime.now(hawaii_tz).isoformat(),
+        "intent": None,
+        "confidence": None
+    })
+    return fast_json.FastJSONResponse({
+        "response": RESPONSE_TEXT,
+        "metadata": metadata,
+        "suggestions": SUGGESTIONS,
+        "quick_replies": []
+    }).body
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print(f"orjson: {'yes' if fast_json.orjson else 'no (stdlib json fallback)'}; {iterations} iterations\n")
+
+    cases = [
+        ("legacy (model + validation)", legacy),
+        ("fast (orjson + fragments)", fast),
+        ("fast lean", lambda: fast(lean=True)),
+    ]
+    baseline = None
+    for name, func in cases:
+        size = len(func())
+        best = min(timeit.repeat(func, number=iterations, repeat=3)) / iterations * 1e6
+        baseline = baseline or best
+        print(f"{name:30} {best:8.1f} us/response  {size:6} bytes  {baseline / best:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
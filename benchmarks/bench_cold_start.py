@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark a cold start: fresh interpreter -> app ready -> first /chat response
+
+Each run starts a new process that imports main, runs the lifespan startup and
+sends one /chat message, with LAZY_INIT off and on. ANTHROPIC_API_KEY is unset
+so the first reply is the local fallback and no network time is included -
+the TLS warm-up saves a further handshake on real deployments.
+
+Usage: python benchmarks/bench_cold_start.py [runs]
+"""
+import os
+import sys
+import json
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {api!r})
+from fastapi.testclient import TestClient
+from main import app
+from api_backend.services.startup_profile import startup_profile
+with TestClient(app) as client:
+    ready = time.perf_counter()
+    client.post("/chat", json={{"message": "Aloha!", "session_id": "bench"}})
+    first = time.perf_counter()
+print(json.dumps({{
+    "ready_ms": (ready - startup_profile.started) * 1000 + (startup_profile.interpreter_seconds or 0) * 1000,
+    "first_response_ms": (first - startup_profile.started) * 1000 + (startup_profile.interpreter_seconds or 0) * 1000,
+}}))
+"""
+
+
+def run(lazy: bool) -> dict:
+    env = {
+        **os.environ,
+        "LAZY_INIT": "true" if lazy else "false",
+        "ANTHROPIC_API_KEY": "",
+        "ANALYTICS_SINK": "none",
+        "LEAD_STORE_PATH": "/tmp/bench_cold_start.db",
+        "LOG_LEVEL": "WARNING",
+    }
+    script = CHILD.format(root=ROOT, api=os.path.join(ROOT, "api_backend"))
+    output = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    for lazy in (False, True):
+        results = [run(lazy) for _ in range(runs)]
+        ready = statistics.median(r["ready_ms"] for r in results)
+        first = statistics.median(r["first_response_ms"] for r in results)
+        print(f"LAZY_INIT={str(lazy).lower():5}  ready {ready:7.0f} ms   first response {first:7.0f} ms")
+
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove("/tmp/bench_cold_start.db" + suffix)
+        except OSError:
+            pass
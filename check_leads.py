@@ -1,37 +1,31 @@
 #!/usr/bin/env python3
-"""Check and analyze lead files"""
+"""Check and analyze stored leads"""
 import os
-import json
-import glob
-from datetime import datetime
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api_backend.services.lead_store import lead_store, normalize_email, normalize_phone
 
 def check_leads():
-    """Check lead files and analyze for duplicates"""
-    lead_dir = "logs/leads"
-    
-    if not os.path.exists(lead_dir):
-        print("No leads directory found")
-        return
-    
-    lead_files = sorted(glob.glob(os.path.join(lead_dir, "*.json")))
+    """Check stored leads and analyze for duplicates"""
+    # Most recent first
+    stored_leads = list(lead_store.iter_leads())
     
-    print(f"Found {len(lead_files)} lead files\n")
+    print(f"Found {len(stored_leads)} leads in {lead_store.db_path}\n")
     
     # Group leads by contact info to find duplicates
     leads_by_email = {}
     leads_by_phone = {}
     leads_by_name = {}
     
-    for lead_file in lead_files:
+    for lead_data in stored_leads:
         try:
-            with open(lead_file, 'r') as f:
-                lead_data = json.load(f)
-                
-            # Extract key info
-            email = lead_data.get('email')
-            phone = lead_data.get('phone')
+            # Extract key info (contact details compared the way lead dedup does)
+            email = normalize_email(lead_data.get('email'))
+            phone = normalize_phone(lead_data.get('phone'))
             name = lead_data.get('name')
-            lead_id = lead_data.get('lead_id', os.path.basename(lead_file))
+            lead_id = lead_data.get('lead_id')
             
             # Group by email
             if email:
@@ -52,7 +46,7 @@ def check_leads():
                 leads_by_name[name].append((lead_id, lead_data))
                 
         except Exception as e:
-            print(f"Error reading {lead_file}: {e}")
+            print(f"Error reading {lead_data.get('lead_id')}: {e}")
     
     # Report duplicates
     print("=== DUPLICATE ANALYSIS ===\n")
@@ -75,14 +69,9 @@ def check_leads():
     
     # Show recent leads
     print("\n=== RECENT LEADS (Last 5) ===")
-    recent_files = sorted(lead_files, key=lambda x: os.path.getmtime(x), reverse=True)[:5]
-    
-    for lead_file in recent_files:
+    for lead_data in stored_leads[:5]:
         try:
-            with open(lead_file, 'r') as f:
-                lead_data = json.load(f)
-            
-            print(f"\nLead: {os.path.basename(lead_file)}")
+            print(f"\nLead: {lead_data.get('lead_id')}")
             print(f"  Name: {lead_data.get('name', 'Not provided')}")
             print(f"  Email: {lead_data.get('email', 'Not provided')}")
             print(f"  Phone: {lead_data.get('phone', 'Not provided')}")
@@ -90,7 +79,7 @@ def check_leads():
             print(f"  Captured: {lead_data.get('captured_at', 'Unknown')}")
             
         except Exception as e:
-            print(f"Error reading {lead_file}: {e}")
+            print(f"Error reading {lead_data.get('lead_id')}: {e}")
 
 if __name__ == "__main__":
     check_leads()
\ No newline at end of file
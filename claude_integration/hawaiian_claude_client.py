@@ -4,7 +4,7 @@ Hawaiian Claude Client - Integrates Anthropic Claude API with Hawaiian cultural
 import os
 import logging
 from typing import Dict, List, Optional, Any
-from anthropic import Anthropic
+from anthropic import Anthropic, DefaultHttpxClient
 from tenacity import retry, stop_after_attempt, wait_exponential
 import json
 from datetime import datetime
@@ -16,6 +16,16 @@ from .aloha_spirit_injector import AlohaSpiritInjector
 
 logger = logging.getLogger(__name__)
 
+
+def _count_retry(retry_state):
+    """Record a Claude retry in /metrics (when running inside the API)"""
+    try:
+        from api_backend.services.metrics import CLAUDE_RETRIES
+        CLAUDE_RETRIES.inc()
+    except ImportError:
+        pass
+    logger.warning(f"Retrying Claude call (attempt {retry_state.attempt_number + 1})")
+
 HAWAIIAN_CLAUDE_PROMPT = """
 You are Leni Begonia, an AI assistant for LeniLani Consulting, a Hawaii-based AI and technology consulting firm that specializes in helping local Hawaiian businesses thrive using cutting-edge technology while respecting island culture and values. You represent the company with warmth and aloha spirit.
 
@@ -166,7 +176,9 @@ class HawaiianClaudeClient:
         
         try:
             logger.info(f"Initializing Anthropic client with anthropic version: {Anthropic.__module__}")
-            self.client = Anthropic(api_key=self.api_key)
+            # Own the HTTP client so its connection pool can be warmed at startup
+            self.http_client = DefaultHttpxClient()
+            self.client = Anthropic(api_key=self.api_key, http_client=self.http_client)
             logger.info("Anthropic client initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Anthropic client: {e}")
@@ -204,9 +216,19 @@ class HawaiianClaudeClient:
             "hour": hour
         }
     
+    def warm_connection(self) -> bool:
+        """Open a pooled TLS connection to the API before the first message needs it"""
+        try:
+            self.http_client.head(str(self.client.base_url), timeout=5)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not pre-connect to Anthropic: {str(e)}")
+            return False
+    
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        before_sleep=_count_retry
     )
     def generate_response(
         self,
@@ -5,49 +5,52 @@ Run this in Render Shell to remove all existing leads
 """
 
 import os
-import glob
-import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api_backend.services.lead_store import lead_store
 
 print("🌺 Hawaiian Chatbot - Lead Cleanup")
 print("="*60)
 
-# Check if leads directory exists
-if not os.path.exists('logs/leads'):
-    print("❌ No leads directory found")
-    exit()
+# Import any legacy lead_*.json files first so they don't reappear on the next startup
+if os.path.exists('logs/leads'):
+    lead_store.migrate_json_files('logs/leads')
 
 # Count existing leads
-lead_files = glob.glob('logs/leads/lead_*.json')
-count = len(lead_files)
+count = lead_store.count()
 
 if count == 0:
     print("✅ No leads to remove")
     exit()
 
-print(f"⚠️  Found {count} lead files")
-print("\nThis will DELETE all lead files permanently!")
+print(f"⚠️  Found {count} leads in {lead_store.db_path}")
+print("\nThis will DELETE all leads permanently!")
 response = input("\nType 'DELETE ALL' to confirm: ")
 
 if response == "DELETE ALL":
-    # Remove all lead files
+    # Collect ids first - deleting while paging would shift the pages
+    lead_ids = [lead["lead_id"] for lead in lead_store.iter_leads()]
+    
     removed = 0
-    for lead_file in lead_files:
+    for lead_id in lead_ids:
         try:
-            os.remove(lead_file)
-            removed += 1
-            print(f"❌ Deleted: {os.path.basename(lead_file)}")
+            if lead_store.delete_lead(lead_id):
+                removed += 1
+                print(f"❌ Deleted: {lead_id}")
         except Exception as e:
-            print(f"⚠️  Error deleting {lead_file}: {e}")
+            print(f"⚠️  Error deleting {lead_id}: {e}")
     
-    print(f"\n✅ Removed {removed} lead files")
+    print(f"\n✅ Removed {removed} leads")
     
     # Verify empty
-    remaining = len(glob.glob('logs/leads/lead_*.json'))
+    remaining = lead_store.count()
     if remaining == 0:
         print("✅ All leads cleared successfully!")
     else:
-        print(f"⚠️  {remaining} files could not be removed")
+        print(f"⚠️  {remaining} leads could not be removed")
 else:
-    print("\n❌ Cancelled - no files were deleted")
+    print("\n❌ Cancelled - no leads were deleted")
 
-print("="*60)
\ No newline at end of file
+print("="*60)
@@ -1,13 +1,20 @@
 #!/usr/bin/env python3
 """
-Debug script to check leads directory on the server
+Debug script to check the lead store on the server
 Run this in the Render shell to diagnose issues
 """
 import os
 import sys
-import json
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api_backend.services.lead_store import lead_store
+
+
+def leads_dir():
+    return os.path.dirname(lead_store.db_path) or "."
+
 
 def check_directory_status():
     """Check the status of various directories"""
@@ -30,46 +37,50 @@ def check_directory_status():
         logs_contents = os.listdir("logs")
         print(f"logs/ contents: {logs_contents}")
     
-    # Check if logs/leads directory exists
-    leads_dir = "logs/leads"
-    leads_exists = os.path.exists(leads_dir)
-    print(f"\nlogs/leads/ directory exists: {leads_exists}")
+    # Check the lead store database
+    print(f"\nLead store: {lead_store.db_path}")
+    store_dir = leads_dir()
+    dir_exists = os.path.exists(store_dir)
+    print(f"{store_dir}/ directory exists: {dir_exists}")
     
-    if leads_exists:
+    if dir_exists:
         # Check permissions
-        leads_stat = os.stat(leads_dir)
-        print(f"logs/leads/ permissions: {oct(leads_stat.st_mode)}")
-        
-        # List contents
-        leads_contents = os.listdir(leads_dir)
-        print(f"Number of lead files: {len(leads_contents)}")
+        dir_stat = os.stat(store_dir)
+        print(f"{store_dir}/ permissions: {oct(dir_stat.st_mode)}")
+    
+    if os.path.exists(lead_store.db_path):
+        print(f"Database size: {os.path.getsize(lead_store.db_path)} bytes")
+        print(f"Number of leads: {lead_store.count()}")
         
-        if leads_contents:
-            print("\nRecent lead files:")
-            for file in sorted(leads_contents)[-5:]:  # Show last 5
-                file_path = os.path.join(leads_dir, file)
-                file_size = os.path.getsize(file_path)
-                print(f"  - {file} ({file_size} bytes)")
+        recent = lead_store.list_leads(limit=5)
+        if recent:
+            print("\nRecent leads:")
+            for lead in recent:
+                print(f"  - {lead.get('lead_id')} ({lead.get('captured_at', 'Unknown time')})")
+    else:
+        print("❌ Lead database does not exist yet")
+    
+    # Legacy per-lead JSON files (imported into the store once at startup)
+    legacy_files = list(Path("logs/leads").glob("lead_*.json"))
+    if legacy_files:
+        print(f"\nLegacy lead JSON files: {len(legacy_files)} (imported at: {lead_store.get_meta('json_migrated_at') or 'not yet'})")
 
 
 def try_create_directories():
     """Try to create the directories"""
     print("\n🔨 Attempting to create directories...\n")
     
+    store_dir = leads_dir()
     try:
-        # Try to create logs directory
-        os.makedirs("logs", exist_ok=True)
-        print("✅ Created/verified logs/ directory")
-        
-        # Try to create logs/leads directory
-        os.makedirs("logs/leads", exist_ok=True)
-        print("✅ Created/verified logs/leads/ directory")
+        # Try to create the lead store directory
+        os.makedirs(store_dir, exist_ok=True)
+        print(f"✅ Created/verified {store_dir}/ directory")
         
-        # Verify they exist
-        if os.path.exists("logs/leads"):
-            print("✅ Confirmed logs/leads/ directory exists")
+        # Verify it exists
+        if os.path.exists(store_dir):
+            print(f"✅ Confirmed {store_dir}/ directory exists")
         else:
-            print("❌ logs/leads/ directory does not exist after creation")
+            print(f"❌ {store_dir}/ directory does not exist after creation")
             
     except Exception as e:
         print(f"❌ Error creating directories: {str(e)}")
@@ -84,38 +95,34 @@ def try_create_directories():
 
 
 def test_write_lead():
-    """Test writing a lead file"""
-    print("\n📝 Testing lead file write...\n")
+    """Test writing a lead to the store"""
+    print("\n📝 Testing lead store write...\n")
     
     test_lead = {
         "lead_id": "test_debug_lead",
         "name": "Debug Test",
         "email": "debug@test.com",
-        "timestamp": "2025-01-15T12:00:00"
+        "captured_at": "2025-01-15T12:00:00"
     }
     
     try:
-        # Ensure directory exists
-        os.makedirs("logs/leads", exist_ok=True)
-        
-        # Write test file
-        test_file = "logs/leads/test_debug_lead.json"
-        with open(test_file, 'w') as f:
-            json.dump(test_lead, f, indent=2)
-        
-        print(f"✅ Successfully wrote test file: {test_file}")
+        # Write test lead
+        lead_store.delete_lead(test_lead["lead_id"])
+        if lead_store.save_lead(test_lead):
+            print(f"✅ Successfully wrote test lead to {lead_store.db_path}")
+        else:
+            print("❌ Test lead was not written")
         
-        # Verify it exists
-        if os.path.exists(test_file):
-            file_size = os.path.getsize(test_file)
-            print(f"✅ Confirmed file exists, size: {file_size} bytes")
-            
-            # Read it back
-            with open(test_file, 'r') as f:
-                content = json.load(f)
-            print(f"✅ Successfully read file back: {content.get('name')}")
+        # Read it back
+        content = lead_store.get_lead(test_lead["lead_id"])
+        if content:
+            print(f"✅ Successfully read lead back: {content.get('name')}")
         else:
-            print("❌ Test file does not exist after write")
+            print("❌ Test lead does not exist after write")
+        
+        # Clean up so the test lead doesn't show up in reports
+        lead_store.delete_lead(test_lead["lead_id"])
+        print("✅ Removed test lead")
             
     except Exception as e:
         print(f"❌ Error writing test lead: {str(e)}")
@@ -172,4 +179,4 @@ if __name__ == "__main__":
     print("\nNext steps:")
     print("1. If directories were created, restart the app")
     print("2. Check application logs for lead capture attempts")
-    print("3. Monitor the logs/leads/ directory for new files")
\ No newline at end of file
+    print(f"3. Monitor {lead_store.db_path} for new leads (python quick_lead_viewer.py)")
\ No newline at end of file
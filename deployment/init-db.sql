@@ -153,6 +153,7 @@ CREATE INDEX idx_leads_email ON chatbot.leads(email);
 CREATE INDEX idx_leads_island ON chatbot.leads(island);
 CREATE INDEX idx_leads_business_type ON chatbot.leads(business_type);
 CREATE INDEX idx_leads_created_at ON chatbot.leads(created_at);
+CREATE INDEX idx_leads_lead_id ON chatbot.leads((metadata->>'lead_id'));
 
 CREATE INDEX idx_appointments_scheduled_at ON chatbot.appointments(scheduled_at);
 CREATE INDEX idx_appointments_lead_id ON chatbot.appointments(lead_id);
@@ -22,22 +22,14 @@ print("4. Run these commands:\n")
 
 commands = """
 # First, check if leads exist:
-ls logs/leads/*.json 2>/dev/null | wc -l
+python -c "from api_backend.services.lead_store import lead_store; print(lead_store.count())"
 
 # If you have leads, create a combined file:
 cat > export_leads.py << 'EOF'
 import json
-import glob
+from api_backend.services.lead_store import lead_store
 
-leads = []
-for file in sorted(glob.glob('logs/leads/*.json')):
-    try:
-        with open(file, 'r') as f:
-            leads.append(json.load(f))
-    except:
-        pass
-
-print(json.dumps(leads, indent=2))
+print(json.dumps(list(lead_store.iter_leads()), indent=2, default=str))
 EOF
 
 # Run the export script:
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+One-shot migration of legacy logs/leads/lead_*.json files into the lead store
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api_backend.services.lead_store import LeadStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import legacy lead JSON files into the lead store")
+    parser.add_argument("--leads-dir", default="logs/leads", help="Directory containing lead_*.json files")
+    parser.add_argument("--db", default=None, help="Lead store path (defaults to LEAD_STORE_PATH or logs/leads/leads.db)")
+    parser.add_argument("--force", action="store_true", help="Run again even if a migration was already recorded")
+    args = parser.parse_args()
+
+    store = LeadStore(args.db)
+    print(f"🌺 Migrating leads from {args.leads_dir} into {store.db_path}...")
+
+    imported = store.migrate_json_files(args.leads_dir, force=args.force)
+    print(f"✅ Imported {imported} leads ({store.count()} total in store)")
+
+    if not imported and not args.force:
+        print("ℹ️  Nothing imported - use --force to re-run a migration that already happened")
+
+
+if __name__ == "__main__":
+    main()
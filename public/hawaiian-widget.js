@@ -454,7 +454,7 @@
                 <div class="lenilani-chat-header">
                     <div class="lenilani-header-content">
                         <div class="lenilani-logo">
-                            <img src="${API_URL}/logo" alt="LeniLani" onerror="this.style.display='none'" />
+                            <img id="lenilani-logo-img" alt="LeniLani" onerror="this.style.display='none'" />
                         </div>
                         <div class="lenilani-chat-title">
                             <div class="name">LeniLani Consulting</div>
@@ -554,11 +554,30 @@
         const welcomeScreen = document.getElementById('lenilani-welcome');
         const quickRepliesContainer = document.getElementById('lenilani-quick-replies');
         const notificationDot = bubble.querySelector('.notification-dot');
+        const logoImg = document.getElementById('lenilani-logo-img');
         
         let isOpen = false;
         let conversationId = null;
         let isFirstOpen = true;
         let chatStarted = false;
+        let bootstrap = null;
+        let pendingGreeting = null;
+        
+        // Greeting, suggestions, logo and session in one request
+        fetch(`${API_URL}/widget/bootstrap`, { mode: 'cors' })
+            .then(response => response.ok ? response.json() : null)
+            .then(data => {
+                bootstrap = data;
+                logoImg.src = (data && data.logo) || `${API_URL}/logo`;
+            })
+            .catch(() => {
+                logoImg.src = `${API_URL}/logo`;
+            });
+        
+        // Session ID from the bootstrap, or a local one if it hasn't arrived
+        function newConversationId() {
+            return (bootstrap && bootstrap.session_id) || ('web-' + Date.now());
+        }
         
         // Toggle chat window
         function toggleChat() {
@@ -586,13 +605,21 @@
             
             console.log('Starting new chat session');
             chatStarted = true;
-            conversationId = 'web-' + Date.now();
+            conversationId = newConversationId();
             welcomeScreen.style.display = 'none';
             messagesContainer.style.display = 'flex';
             input.disabled = false;
             sendBtn.disabled = false;
             input.focus();
             
+            // Show the bootstrap greeting without a round trip to the chat API
+            if (bootstrap && bootstrap.greeting) {
+                pendingGreeting = bootstrap.greeting;
+                addMessage(bootstrap.greeting, 'bot');
+                showQuickReplies((bootstrap.suggestions || []).slice(0, 3));
+                return;
+            }
+            
             // Send initial greeting to get conversation started - but only once!
             setTimeout(() => {
                 if (messagesContainer.children.length === 0) {
@@ -685,6 +712,11 @@
             sendBtn.disabled = true;
             
             const requestId = 'req-' + Date.now() + '-' + Math.random().toString(36).substr(2, 9);
+            const metadata = { request_id: requestId };
+            if (pendingGreeting) {
+                metadata.bootstrap_greeting = pendingGreeting;
+                pendingGreeting = null;
+            }
             console.log('Sending message to API:', message, 'Session:', conversationId, 'Request ID:', requestId);
             
             try {
@@ -699,7 +731,8 @@
                     body: JSON.stringify({
                         message: message,
                         session_id: conversationId,
-                        metadata: { request_id: requestId }
+                        metadata: metadata,
+                        lean: true
                     })
                 });
                 
@@ -719,7 +752,7 @@
                 hideTyping();
                 input.disabled = false;
                 sendBtn.disabled = false;
-                console.error('Failed to send message:', error);
+                console.error('Failed to send message (trace ' + requestId + '):', error);
                 
                 // Check if it's a rate limit error
                 if (error.message && (error.message.includes('429') || error.message.includes('rate'))) {
@@ -741,7 +774,7 @@
                     input.focus();
                 } else {
                     chatStarted = true;
-                    conversationId = 'web-' + Date.now();
+                    conversationId = newConversationId();
                     welcomeScreen.style.display = 'none';
                     messagesContainer.style.display = 'flex';
                     input.disabled = false;
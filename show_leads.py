@@ -4,30 +4,26 @@ Hawaiian Chatbot - Simple Lead Display
 Shows all captured leads
 """
 
-import json
-from pathlib import Path
+import os
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api_backend.services.lead_store import lead_store
+
 def main():
-    leads_dir = Path("logs/leads")
-    
-    if not leads_dir.exists():
-        print("❌ No leads directory found!")
-        return
-    
-    lead_files = sorted(leads_dir.glob("lead_*.json"), reverse=True)
+    # Most recent first
+    leads = list(lead_store.iter_leads())
     
     print("🌺 Hawaiian Chatbot - Lead Report")
     print("="*80)
     print(f"📅 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"📊 Total Leads: {len(lead_files)}")
+    print(f"📊 Total Leads: {len(leads)}")
     print("="*80)
     
-    for i, lead_file in enumerate(lead_files):
+    for i, lead in enumerate(leads):
         try:
-            with open(lead_file, 'r') as f:
-                lead = json.load(f)
-            
             print(f"\n📋 Lead #{i + 1}")
             print("-"*40)
             print(f"ID: {lead.get('lead_id', 'Unknown')}")
@@ -48,16 +44,16 @@ def main():
                 print(f"\nSummary: {lead.get('conversation_summary')}")
                 
         except Exception as e:
-            print(f"⚠️  Error reading {lead_file}: {e}")
+            print(f"⚠️  Error showing {lead.get('lead_id')}: {e}")
     
     print("\n" + "="*80)
     print("✅ Report complete")
     
     # Quick stats
-    hot = sum(1 for f in lead_files if 'HOT' in open(f).read())
+    stats = lead_store.get_stats()
     print(f"\n📊 Quick Stats:")
-    print(f"  🔥 Hot leads: {hot}")
-    print(f"  📧 Total leads: {len(lead_files)}")
+    print(f"  🔥 Hot leads: {stats['by_quality'].get('hot', 0)}")
+    print(f"  📧 Total leads: {len(leads)}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,24 +1,19 @@
 import os
-import json
-import glob
+import sys
 
-# Create directories if needed
-os.makedirs('logs/leads', exist_ok=True)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Find all lead files
-files = glob.glob('logs/leads/*.json')
+from api_backend.services.lead_store import lead_store
 
-print("Total leads:", len(files))
+# Find all leads
+leads = list(lead_store.iter_leads())
+
+print("Total leads:", len(leads))
 
 # Show each lead
-for i, filename in enumerate(files):
+for i, lead in enumerate(leads):
     print(f"\n--- Lead {i+1} ---")
-    try:
-        with open(filename) as f:
-            lead = json.load(f)
-        print("Email:", lead.get('email', 'N/A'))
-        print("Phone:", lead.get('phone', 'N/A'))
-        print("Name:", lead.get('name', 'N/A'))
-        print("Score:", lead.get('qualification_score', 'N/A'))
-    except:
-        print("Error reading file")
\ No newline at end of file
+    print("Email:", lead.get('email', 'N/A'))
+    print("Phone:", lead.get('phone', 'N/A'))
+    print("Name:", lead.get('name', 'N/A'))
+    print("Score:", lead.get('qualification_score', 'N/A'))
@@ -1,19 +1,18 @@
 #!/usr/bin/env python3
 """
-Sync existing leads from logs/leads/ to HubSpot
+Sync existing leads from the lead store to HubSpot
 Run this after deploying the HubSpot fix
 """
 
 import os
 import sys
-import json
-import glob
 from datetime import datetime
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from api_backend.services.hubspot_service import hubspot_service
+from api_backend.services.lead_store import lead_store
 
 
 def sync_existing_leads():
@@ -28,29 +27,25 @@ def sync_existing_leads():
         print("Please set HUBSPOT_API_KEY in your .env file or Render environment")
         return
     
-    # Find all lead files
-    lead_files = sorted(glob.glob('logs/leads/*.json'))
+    # Load all stored leads
+    leads = list(lead_store.iter_leads())
     
-    if not lead_files:
-        print("No leads found in logs/leads/")
+    if not leads:
+        print(f"No leads found in {lead_store.db_path}")
         return
     
-    print(f"\nFound {len(lead_files)} leads to sync")
+    print(f"\nFound {len(leads)} leads to sync")
     
     success_count = 0
     skip_count = 0
     error_count = 0
     
-    for i, lead_file in enumerate(lead_files, 1):
+    for i, lead_data in enumerate(leads, 1):
         try:
-            # Load lead data
-            with open(lead_file, 'r') as f:
-                lead_data = json.load(f)
-            
             email = lead_data.get('email', '')
             name = lead_data.get('name', 'Unknown')
             
-            print(f"\n{i}/{len(lead_files)}: Processing {name} ({email})")
+            print(f"\n{i}/{len(leads)}: Processing {name} ({email})")
             
             # Skip if no email
             if not email:
@@ -82,6 +77,11 @@ def sync_existing_leads():
                 print(f"   ✅ Success - {result.get('action', 'processed')} (ID: {result.get('contact_id')})")
                 success_count += 1
                 
+                # Later merges and updates go to this contact
+                if result.get("contact_id") and lead_data.get("hubspot_contact_id") != result["contact_id"]:
+                    lead_data["hubspot_contact_id"] = result["contact_id"]
+                    lead_store.update_lead(lead_data)
+                
                 # For high-scoring leads, create deals
                 if lead_data.get("qualification_score", 0) >= 70:
                     print("   📊 Creating deal for high-scoring lead...")
@@ -115,7 +115,7 @@ def sync_existing_leads():
     print(f"   ✅ Successful: {success_count}")
     print(f"   ⚠️  Skipped: {skip_count}")
     print(f"   ❌ Errors: {error_count}")
-    print(f"   📁 Total: {len(lead_files)}")
+    print(f"   📁 Total: {len(leads)}")
     
     if success_count > 0:
         print("\n✨ Leads synced to HubSpot successfully!")
@@ -28,12 +28,13 @@ async def test_webhook_direct():
     
     # Test webhook
     webhook_service = WebhookLeadCapture()
-    print(f"Webhook URL configured: {webhook_service.webhook_url}")
+    print(f"Webhook destinations configured: {[d.name for d in webhook_service.destinations]}")
     
-    if webhook_service.webhook_url:
+    if webhook_service.destinations:
         zapier_lead = create_zapier_friendly_lead(test_lead)
         result = await webhook_service.send_lead(zapier_lead)
         print(f"Webhook result: {result}")
+        await webhook_service.close()
     else:
         print("No webhook URL configured in .env")
 
@@ -0,0 +1,87 @@
+"""
+Tests for /chat admission control and load shedding
+"""
+
+import asyncio
+
+import pytest
+
+from api_backend.services.admission import AdmissionController, AdmissionRejected
+
+
+async def hold(controller, release_event, started=None):
+    async with controller.slot():
+        if started is not None:
+            started.append(controller.in_flight)
+        await release_event.wait()
+
+
+class TestAdmissionController:
+    """Test slots, the bounded queue and shedding"""
+
+    def test_waiters_get_slots_in_order(self):
+        """Test messages beyond the limit queue and are admitted as slots free up"""
+        async def scenario():
+            controller = AdmissionController(max_concurrent=1, max_queue=2, max_wait_seconds=5, initial_service_seconds=0)
+            release = asyncio.Event()
+            order = []
+
+            async def worker(name):
+                async with controller.slot():
+                    order.append(name)
+                    await release.wait()
+
+            tasks = [asyncio.create_task(worker(n)) for n in ("a", "b", "c")]
+            await asyncio.sleep(0.01)
+            assert (controller.in_flight, controller.queue_depth) == (1, 2)
+
+            release.set()
+            await asyncio.gather(*tasks)
+            assert order == ["a", "b", "c"]
+            assert (controller.in_flight, controller.queue_depth) == (0, 0)
+
+        asyncio.run(scenario())
+
+    def test_full_queue_is_shed(self):
+        """Test a message is rejected immediately when the wait queue is full"""
+        async def scenario():
+            controller = AdmissionController(max_concurrent=1, max_queue=1, max_wait_seconds=5)
+            release = asyncio.Event()
+            tasks = [asyncio.create_task(hold(controller, release)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.acquire()
+            assert rejected.value.reason == "queue_full"
+            assert rejected.value.retry_after >= 1
+
+            release.set()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(scenario())
+
+    def test_expected_wait_and_timeout_shed(self):
+        """Test slow generations shed newcomers up front, and waiters give up after max_wait"""
+        async def scenario():
+            slow = AdmissionController(max_concurrent=1, max_queue=5, max_wait_seconds=5, initial_service_seconds=8)
+            release = asyncio.Event()
+            task = asyncio.create_task(hold(slow, release))
+            await asyncio.sleep(0.01)
+            with pytest.raises(AdmissionRejected) as rejected:
+                await slow.acquire()
+            assert rejected.value.reason == "expected_wait"
+
+            impatient = AdmissionController(max_concurrent=1, max_queue=5, max_wait_seconds=0.05, initial_service_seconds=0)
+            other = asyncio.create_task(hold(impatient, release))
+            await asyncio.sleep(0.01)
+            with pytest.raises(AdmissionRejected) as rejected:
+                await impatient.acquire()
+            assert rejected.value.reason == "wait_timeout"
+            assert impatient.queue_depth == 0
+
+            release.set()
+            await asyncio.gather(task, other)
+            assert impatient.in_flight == 0
+            assert impatient.get_status()["shed_wait_timeout"] == 1
+
+        asyncio.run(scenario())
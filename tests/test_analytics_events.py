@@ -0,0 +1,93 @@
+"""
+Tests for the buffered analytics event emitter
+"""
+
+import asyncio
+import json
+
+from api_backend.services.analytics_events import EventEmitter, JsonlSink, create_sink
+
+
+class ListSink:
+    name = "list"
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def write(self, events):
+        if self.fail:
+            raise ConnectionError("sink unavailable")
+        self.batches.append(list(events))
+
+
+class TestEventEmitter:
+    """Test events are buffered, batched and bounded"""
+
+    def test_events_flush_in_batches(self):
+        """Test buffered events reach the sink in batch_size chunks"""
+        sink = ListSink()
+        emitter = EventEmitter(sink=sink, batch_size=4)
+        for i in range(10):
+            emitter.emit("message_received", session_id="session_1", message_number=i)
+        assert sink.batches == []
+
+        asyncio.run(emitter.flush())
+
+        assert [len(b) for b in sink.batches] == [4, 4, 2]
+        assert sink.batches[0][0]["event_type"] == "message_received"
+        assert sink.batches[0][0]["data"] == {"message_number": 0}
+        assert emitter.get_status()["flushed_total"] == 10
+
+    def test_full_buffer_drops_and_counts(self):
+        """Test memory stays bounded when the sink falls behind"""
+        emitter = EventEmitter(sink=ListSink(), max_buffer=5)
+        for _ in range(8):
+            emitter.emit("claude_call", latency_ms=900)
+
+        status = emitter.get_status()
+        assert status["buffered"] == 5
+        assert status["dropped_total"] == 3
+
+    def test_failed_flush_keeps_events(self):
+        """Test a sink outage keeps events buffered for the next flush"""
+        sink = ListSink(fail=True)
+        emitter = EventEmitter(sink=sink)
+        emitter.emit("lead_captured", lead_id="lead_1")
+
+        asyncio.run(emitter.flush())
+        assert emitter.get_status()["buffered"] == 1
+        assert emitter.get_status()["failed_flushes"] == 1
+
+        sink.fail = False
+        asyncio.run(emitter.flush())
+        assert sink.batches[0][0]["data"]["lead_id"] == "lead_1"
+
+    def test_jsonl_sink(self, tmp_path):
+        """Test the JSONL sink appends one event per line"""
+        path = tmp_path / "events.jsonl"
+        emitter = EventEmitter(sink=JsonlSink(str(path)))
+        emitter.emit("lead_field_extracted", field="email")
+        emitter.emit("fallback_served", reason="claude_error")
+        asyncio.run(emitter.flush())
+
+        events = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [e["event_type"] for e in events] == ["lead_field_extracted", "fallback_served"]
+
+    def test_jsonl_sink_rotates_by_size(self, tmp_path):
+        """Test the JSONL file is rotated and only the configured backups are kept"""
+        path = tmp_path / "events.jsonl"
+        sink = JsonlSink(str(path), max_bytes=300, backups=2)
+        for i in range(20):
+            asyncio.run(sink.write([{"event_type": "message_received", "n": i}]))
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["events.jsonl", "events.jsonl.1", "events.jsonl.2"]
+        assert all(p.stat().st_size <= 300 for p in tmp_path.iterdir())
+        newest = json.loads(path.read_text().splitlines()[-1])
+        assert newest["n"] == 19
+
+    def test_no_sink_is_a_no_op(self):
+        """Test ANALYTICS_SINK=none disables collection"""
+        emitter = EventEmitter(sink=create_sink("none"))
+        emitter.emit("message_received")
+        assert emitter.get_status()["emitted_total"] == 0
@@ -0,0 +1,52 @@
+"""
+Tests for precomputed cultural contexts
+"""
+
+from datetime import datetime
+
+import pytz
+
+from api_backend.services.cultural_tone_manager import CulturalToneManager
+from models.cultural_context import HawaiianValue, TimeOfDay
+
+hawaii_tz = pytz.timezone('Pacific/Honolulu')
+
+
+class TestPrecomputedContexts:
+    """Cached contexts match what the static tables would build"""
+
+    def test_context_matches_fresh_build(self):
+        """Only the sampled phrases differ from a freshly built context"""
+        manager = CulturalToneManager()
+        context = manager.get_cultural_context("tourism", "maui", "professional")
+        fresh = manager._build_context(manager.get_current_time_of_day(), "tourism", "maui", "professional")
+
+        assert context.model_dump(exclude={"suggested_phrases"}) == fresh.model_dump(exclude={"suggested_phrases"})
+        assert context.primary_value == HawaiianValue.ALOHA
+        assert len(context.suggested_phrases) == 3
+
+    def test_unknown_business_and_island_use_general_context(self):
+        """Types without their own tables share the general context"""
+        manager = CulturalToneManager()
+        general = manager.get_cultural_context()
+        retail = manager.get_cultural_context("retail", "oahu", "pidgin")
+
+        assert retail.model_dump(exclude={"suggested_phrases"}) == general.model_dump(exclude={"suggested_phrases"})
+
+    def test_requests_do_not_share_phrase_lists(self):
+        """Per-request phrase selection never leaks into the cached template"""
+        manager = CulturalToneManager()
+        first = manager.get_cultural_context()
+        first.suggested_phrases.clear()
+
+        assert len(manager.get_cultural_context().suggested_phrases) == 3
+
+    def test_time_period_boundaries(self):
+        """The cached time of day expires exactly at the next period boundary"""
+        seconds = CulturalToneManager._seconds_until_next_period
+        assert seconds(hawaii_tz.localize(datetime(2024, 7, 4, 9, 30))) == 30 * 60
+        assert seconds(hawaii_tz.localize(datetime(2024, 7, 4, 23, 0))) == 6 * 3600
+        assert seconds(hawaii_tz.localize(datetime(2024, 7, 4, 3, 59, 59))) == 3600 + 1
+
+        assert CulturalToneManager._time_of_day_for_hour(9) == TimeOfDay.KAKAHIAKA
+        assert CulturalToneManager._time_of_day_for_hour(23) == TimeOfDay.PO
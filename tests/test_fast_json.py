@@ -0,0 +1,62 @@
+"""
+Tests for the fast JSON response path
+"""
+
+import json
+from datetime import datetime
+
+from api_backend.services.cultural_tone_manager import CulturalToneManager
+from api_backend.services.fast_json import FastJSONResponse, FragmentCache, RawJSON, dumps
+from models.cultural_context import TimeOfDay
+
+
+class TestFastJSON:
+    """Serialization, fragment splicing and caching"""
+
+    def test_raw_fragments_are_spliced(self):
+        """RawJSON is written verbatim inside nested structures"""
+        body = dumps({"a": [1, RawJSON(b'{"b":true}')], "c": {"d": RawJSON(b"null")}})
+        assert json.loads(body) == {"a": [1, {"b": True}], "c": {"d": None}}
+
+    def test_models_enums_and_datetimes(self):
+        """Pydantic models, enums and datetimes serialize like jsonable_encoder"""
+        manager = CulturalToneManager()
+        greeting = manager.greetings[TimeOfDay.AHIAHI]
+        when = datetime(2024, 7, 4, 18, 30)
+
+        data = json.loads(dumps({"greeting": greeting, "time": TimeOfDay.AHIAHI, "at": when}))
+        assert data["greeting"] == greeting.model_dump(mode="json")
+        assert data["time"] == "ahiahi"
+        assert data["at"] == "2024-07-04T18:30:00"
+
+    def test_fragment_cache_is_lru(self):
+        """Fragments are built once and the least recently used is evicted"""
+        cache = FragmentCache(maxsize=2)
+        builds = []
+
+        def build(value):
+            builds.append(value)
+            return value
+
+        cache.get("a", lambda: build("a"))
+        cache.get("b", lambda: build("b"))
+        cache.get("a", lambda: build("a"))
+        cache.get("c", lambda: build("c"))
+        cache.get("b", lambda: build("b"))
+
+        assert builds == ["a", "b", "c", "b"]
+        assert len(cache) == 2
+
+    def test_serialized_context_matches_model(self):
+        """Cached context JSON is equivalent to dumping the model"""
+        manager = CulturalToneManager()
+        for _ in range(3):
+            context = manager.get_cultural_context(business_type="tourism", island="maui")
+            fragment = manager.serialize_context(context)
+            assert json.loads(fragment.data) == context.model_dump(mode="json")
+
+    def test_response_renders_fragments(self):
+        """FastJSONResponse bodies include spliced fragments"""
+        response = FastJSONResponse({"metadata": {"cultural_context": RawJSON(b'{"x":1}')}})
+        assert json.loads(response.body) == {"metadata": {"cultural_context": {"x": 1}}}
+        assert response.media_type == "application/json"
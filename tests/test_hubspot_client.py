@@ -0,0 +1,184 @@
+"""
+Tests for the rate-limit-aware HubSpot client and requeue behaviour
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+
+from api_backend.services.hubspot_client import HubSpotClient, HubSpotRateLimitError, TokenBucket
+from api_backend.services.hubspot_service import HubSpotService
+
+
+def make_response(status_code, headers=None, json_data=None):
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = json_data or {}
+    response.text = ""
+    return response
+
+
+class TestTokenBucket:
+    """Test the local burst allowance"""
+
+    def test_bucket_empties_then_reports_wait(self):
+        """Test bucket hands out its capacity then asks callers to wait"""
+        bucket = TokenBucket(capacity=2, refill_per_second=1)
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() > 0
+
+    def test_drain_syncs_to_remote_remaining(self):
+        """Test draining the bucket down to HubSpot's reported remaining"""
+        bucket = TokenBucket(capacity=100, refill_per_second=0.001)
+        bucket.drain(3)
+        assert bucket.available < 4
+
+
+class TestHubSpotClient:
+    """Test header tracking and 429 handling"""
+
+    @pytest.fixture
+    def session(self):
+        return Mock()
+
+    @pytest.fixture
+    def client(self, session):
+        return HubSpotClient(api_key="pat-test", burst_limit=10, burst_window_seconds=10, session=session)
+
+    def test_tracks_rate_limit_headers(self, client, session):
+        """Test X-HubSpot-RateLimit-* headers are recorded"""
+        session.request.return_value = make_response(200, {
+            "X-HubSpot-RateLimit-Max": "100",
+            "X-HubSpot-RateLimit-Remaining": "42",
+            "X-HubSpot-RateLimit-Daily-Remaining": "9000",
+        })
+
+        client.get("/crm/v3/objects/contacts/test@example.com")
+
+        budget = client.get_budget()
+        assert budget["hubspot"]["max"] == 100
+        assert budget["hubspot"]["remaining"] == 42
+        assert budget["hubspot"]["daily_remaining"] == 9000
+
+    def test_429_raises_with_retry_after(self, client, session):
+        """Test a 429 surfaces Retry-After instead of a silent failure"""
+        session.request.return_value = make_response(429, {"Retry-After": "7"})
+
+        with pytest.raises(HubSpotRateLimitError) as exc_info:
+            client.post("/crm/v3/objects/contacts", json={})
+
+        assert exc_info.value.retry_after == 7
+        assert client.get_budget()["rate_limited_total"] == 1
+
+    def test_empty_bucket_short_circuits(self, session):
+        """Test requests are not sent once the local burst allowance is used up"""
+        client = HubSpotClient(api_key="pat-test", burst_limit=1, burst_window_seconds=10, session=session)
+        session.request.return_value = make_response(200)
+
+        client.get("/first")
+        with pytest.raises(HubSpotRateLimitError):
+            client.get("/second")
+
+        assert session.request.call_count == 1
+
+
+class TestHubSpotServiceRequeue:
+    """Test rate-limited operations are requeued rather than dropped"""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        monkeypatch.setenv("HUBSPOT_API_KEY", "pat-test")
+        return HubSpotService()
+
+    def test_rate_limited_contact_is_requeued(self, service):
+        """Test a 429 on contact creation queues a retry and pauses for Retry-After"""
+        calls = []
+
+        def _upsert_contact(contact_data):
+            calls.append(contact_data)
+            if len(calls) == 1:
+                raise HubSpotRateLimitError(5)
+            return {"success": True}
+
+        with patch.object(service, "_upsert_contact", _upsert_contact):
+            result = service.create_or_update_contact({"email": "keoni@mauigrindz.com"})
+
+        assert result["queued"] is True
+        assert result["retry_after"] == 5
+        assert service.get_rate_limit_status()["requeue"]["pending"] == 1
+        assert service._next_requeue_delay() > 4
+        assert len(calls) == 1
+
+    def test_requeued_call_keeps_trace_id(self, service):
+        """Test a retry running on the timer thread still sends the original trace ID"""
+        import threading
+        from api_backend.services.tracing import current_trace_id, traced
+
+        seen = []
+        done = threading.Event()
+
+        def flaky(contact_data):
+            if not seen:
+                seen.append(None)
+                raise HubSpotRateLimitError(0.01)
+            seen.append(current_trace_id())
+            done.set()
+            return {"success": True}
+
+        flaky.__name__ = "_upsert_contact"
+        with traced("trace-hubspot-1"):
+            service._call_with_requeue(flaky, {})
+
+        assert done.wait(2)
+        assert seen[-1] == "trace-hubspot-1"
+
+    def test_requeue_gives_up_after_max_attempts(self, service):
+        """Test requeueing stops after the configured number of attempts"""
+        func = Mock(side_effect=HubSpotRateLimitError(1))
+        func.__name__ = "_upsert_contact"
+
+        result = service._call_with_requeue(func, {}, attempt=service.max_requeue_attempts)
+
+        assert result["success"] is False
+        assert service.requeue_stats["exhausted_total"] == 1
+
+    def test_burst_larger_than_bucket_is_drained_in_order(self, monkeypatch):
+        """Test more operations than the burst allowance all go through, oldest first"""
+        import threading
+
+        monkeypatch.setenv("HUBSPOT_API_KEY", "pat-test")
+        monkeypatch.setenv("HUBSPOT_BURST_LIMIT", "10")
+        monkeypatch.setenv("HUBSPOT_BURST_WINDOW_SECONDS", "0.5")
+        service = HubSpotService()
+        service.client.session = Mock()
+        service.client.session.request.return_value = make_response(200)
+
+        sent = []
+        done = threading.Event()
+
+        def send(i):
+            service.client.get(f"/crm/v3/objects/contacts/{i}")
+            sent.append(i)
+            if len(sent) == 40:
+                done.set()
+
+        send.__name__ = "_upsert_contact"
+        results = [service._call_with_requeue(send, i) for i in range(40)]
+
+        assert sum(1 for r in results if isinstance(r, dict) and r.get("queued")) == 30
+        assert done.wait(5)
+        assert sent == list(range(40))
+        assert service.requeue_stats["exhausted_total"] == 0
+        assert service.requeue_stats["pending"] == 0
+
+    def test_local_bucket_waits_do_not_use_attempts(self, service):
+        """Test only HubSpot 429s count against the requeue budget"""
+        func = Mock(side_effect=[HubSpotRateLimitError(1, local=True), {"success": True}])
+        func.__name__ = "_upsert_contact"
+
+        result = service._call_with_requeue(func, {}, attempt=service.max_requeue_attempts)
+
+        assert result["queued"] is True
+        assert service.requeue_stats["exhausted_total"] == 0
+        assert service._requeue[0][2] == service.max_requeue_attempts
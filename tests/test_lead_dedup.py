@@ -0,0 +1,138 @@
+"""
+Tests for cross-session lead deduplication
+"""
+
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from api_backend.services import lead_store as lead_store_module
+from api_backend.services.lead_capture_service import LeadCaptureService
+from api_backend.services.lead_store import LeadStore, normalize_email, normalize_phone
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = LeadStore(str(tmp_path / "leads.db"))
+    monkeypatch.setattr(lead_store_module, "lead_store", store)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def service(store, monkeypatch):
+    monkeypatch.delenv("HUBSPOT_API_KEY", raising=False)
+    service = LeadCaptureService()
+    service.sent = {"emails": 0, "webhooks": []}
+
+    async def send_email(lead_data):
+        service.sent["emails"] += 1
+        return True
+
+    async def send_webhook(payload):
+        service.sent["webhooks"].append(payload)
+        return {"success": True}
+
+    from api_backend.services.webhook_lead_capture import webhook_lead_capture
+    monkeypatch.setattr(service, "_send_email_notification", send_email)
+    monkeypatch.setattr(webhook_lead_capture, "send_lead", send_webhook)
+    return service
+
+
+@pytest.fixture
+def hubspot(service, monkeypatch):
+    """HubSpot API that records calls and creates contact 501"""
+    from api_backend.services.hubspot_service import hubspot_service
+
+    calls = []
+
+    def request(method, url, **kwargs):
+        path = url.replace(hubspot_service.base_url, "")
+        calls.append((method, path))
+        response = Mock(status_code=404, headers={}, text="")
+        response.json.return_value = {}
+        if method == "POST" and path.endswith("/search"):
+            response.status_code = 200
+            response.json.return_value = {"results": []}
+        elif method == "POST":
+            response.status_code = 201
+            response.json.return_value = {"id": "501"}
+        elif method == "PATCH":
+            response.status_code = 200
+            response.json.return_value = {"id": path.rsplit("/", 1)[-1]}
+        return response
+
+    monkeypatch.setattr(hubspot_service, "api_key", "pat-test")
+    monkeypatch.setattr(hubspot_service.client, "session", Mock(request=request))
+    service.hubspot_api_key = "pat-test"
+    return calls
+
+
+def capture(service, lead_data, score=50):
+    return asyncio.run(service.capture_lead(lead_data, "Chatted about POS systems", score))
+
+
+class TestLeadDedup:
+    """Test repeat captures of the same person are merged"""
+
+    def test_contact_normalization(self):
+        """Test email and phone keys ignore formatting"""
+        assert normalize_email("  Keoni@MauiGrindz.com ") == "keoni@mauigrindz.com"
+        assert normalize_phone("(808) 555-1234") == normalize_phone("+1 808.555.1234") == "18085551234"
+        assert normalize_phone("123") is None
+
+    def test_second_session_merges_into_first(self, service, store):
+        """Test a repeat visitor updates the original lead and only the delta is sent"""
+        first = capture(service, {"email": "keoni@mauigrindz.com", "name": "Keoni"})
+        second = capture(service, {"email": "KEONI@mauigrindz.com ", "name": "Keoni", "company": "Maui Grindz"}, score=85)
+
+        assert second["merged"] is True
+        assert second["lead_id"] == first["lead_id"]
+        assert store.count() == 1
+
+        lead = store.get_lead(first["lead_id"])
+        assert lead["company"] == "Maui Grindz"
+        assert lead["session_count"] == 2
+        assert "HOT" in lead["lead_quality"]
+        assert store.get_stats()["by_quality"]["hot"] == 1
+
+        assert service.sent["emails"] == 1
+        update = service.sent["webhooks"][-1]
+        assert update["event"] == "lead_updated"
+        assert set(update["changes"]) == {"company", "qualification_score", "lead_quality"}
+
+    def test_phone_match_without_email(self, service, store):
+        """Test leads are matched on phone when the email differs"""
+        capture(service, {"phone": "808-555-1234", "name": "Malia"})
+        result = capture(service, {"phone": "(808) 555 1234", "email": "malia@konacoffee.com"})
+
+        assert result["merged"] is True
+        assert store.count() == 1
+
+    def test_phone_only_merge_updates_same_hubspot_contact(self, service, store, hubspot):
+        """Test a phone-matched repeat capture patches the stored contact instead of creating another"""
+        first = capture(service, {"phone": "808-555-1234", "name": "Malia"})
+        assert store.get_lead(first["lead_id"])["hubspot_contact_id"] == "501"
+
+        capture(service, {"phone": "(808) 555 1234", "email": "malia@konacoffee.com", "company": "Kona Coffee"})
+        capture(service, {"phone": "808 555 1234", "email": "other@example.com"})
+
+        assert hubspot.count(("POST", "/crm/v3/objects/contacts")) == 1
+        assert hubspot.count(("PATCH", "/crm/v3/objects/contacts/501")) == 1
+        assert store.get_lead(first["lead_id"])["email"] == "malia@konacoffee.com"
+
+    def test_unchanged_repeat_sends_nothing(self, service, store):
+        """Test a repeat capture with no new information is not dispatched"""
+        capture(service, {"email": "keoni@mauigrindz.com", "name": "Keoni"})
+        result = capture(service, {"email": "keoni@mauigrindz.com", "name": "Keoni"})
+
+        assert result["changed_fields"] == []
+        assert len(service.sent["webhooks"]) == 1
+
+    def test_merge_window_disabled(self, service, store):
+        """Test a zero merge window keeps every capture separate"""
+        service.dedup_window_days = 0
+        capture(service, {"email": "keoni@mauigrindz.com"})
+        capture(service, {"email": "keoni@mauigrindz.com"})
+        assert store.count() == 2
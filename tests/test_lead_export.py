@@ -0,0 +1,82 @@
+"""
+Tests for the streaming lead export renderers
+"""
+
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from api_backend.services import lead_export
+from api_backend.services.lead_export import CSV_FIELDNAMES, stream_leads
+
+
+def make_leads(count):
+    for i in range(count):
+        yield {
+            "lead_id": f"lead_{i}",
+            "name": f"Keoni {i}",
+            "email": f"keoni{i}@mauigrindz.com",
+            "conversation_summary": "Needs a POS, \"urgent\"\nfollow up",
+            "lead_quality": "🔥 HOT - Ready to buy",
+        }
+
+
+def collect(chunks):
+    return b"".join(chunks)
+
+
+class TestLeadExport:
+    """Test exports are rendered incrementally and stay well-formed"""
+
+    def test_csv_matches_csv_module(self):
+        """Test quoting and newlines survive the row-by-row writer"""
+        body = collect(stream_leads(make_leads(3), "csv")).decode("utf-8")
+
+        rows = list(csv.DictReader(io.StringIO(body)))
+        assert list(rows[0].keys()) == CSV_FIELDNAMES
+        assert [r["lead_id"] for r in rows] == ["lead_0", "lead_1", "lead_2"]
+        assert rows[2]["conversation_summary"] == "Needs a POS, \"urgent\"\nfollow up"
+
+    def test_ndjson_one_lead_per_line(self):
+        """Test NDJSON emits one parseable object per line"""
+        lines = collect(stream_leads(make_leads(4), "ndjson")).decode("utf-8").splitlines()
+        assert [json.loads(line)["lead_id"] for line in lines] == [f"lead_{i}" for i in range(4)]
+
+    def test_json_keeps_legacy_shape(self):
+        """Test the JSON export is one document with leads and total"""
+        document = json.loads(collect(stream_leads(make_leads(2), "json")))
+        assert document["total"] == 2
+        assert [l["lead_id"] for l in document["leads"]] == ["lead_0", "lead_1"]
+        assert "exported_at" in document
+
+        assert json.loads(collect(stream_leads(iter([]), "json")))["leads"] == []
+
+    def test_gzip_round_trip_is_chunked(self, monkeypatch):
+        """Test gzip output decompresses and is produced in several chunks"""
+        monkeypatch.setattr(lead_export, "CHUNK_SIZE", 256)
+        chunks = list(stream_leads(make_leads(200), "ndjson", compress=True))
+
+        assert len(chunks) > 2
+        lines = gzip.decompress(b"".join(chunks)).decode("utf-8").splitlines()
+        assert len(lines) == 200
+
+    def test_leads_are_consumed_lazily(self):
+        """Test the renderer does not drain the lead iterator up front"""
+        consumed = []
+
+        def leads():
+            for lead in make_leads(10_000):
+                consumed.append(lead["lead_id"])
+                yield lead
+
+        stream = stream_leads(leads(), "ndjson")
+        next(stream)
+        assert len(consumed) < 10_000
+
+    def test_unknown_format(self):
+        """Test unsupported formats are rejected"""
+        with pytest.raises(ValueError):
+            stream_leads(make_leads(1), "xml")
@@ -0,0 +1,46 @@
+"""
+Tests for ULID-style lead IDs
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from api_backend.services.lead_ids import LeadIdGenerator, lead_id_timestamp, new_lead_id
+
+
+class TestLeadIds:
+    """Test lead IDs are unique and sort by capture time"""
+
+    def test_format(self):
+        """Test IDs keep the lead_ prefix and a 26-char ULID"""
+        lead_id = new_lead_id()
+        assert lead_id.startswith("lead_")
+        assert len(lead_id) == 5 + 26
+
+    def test_burst_in_same_millisecond_is_unique_and_ordered(self):
+        """Test many IDs minted in one millisecond stay unique and monotonic"""
+        generator = LeadIdGenerator()
+        ids = [generator.new_id(1_790_000_000_000) for _ in range(10_000)]
+        assert len(set(ids)) == len(ids)
+        assert ids == sorted(ids)
+
+    def test_threads_do_not_collide(self):
+        """Test concurrent captures never share an ID"""
+        generator = LeadIdGenerator()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(lambda _: generator.new_id(), range(5_000)))
+        assert len(set(ids)) == len(ids)
+
+    def test_clock_going_backwards_stays_monotonic(self):
+        """Test a clock step back does not produce an out-of-order ID"""
+        generator = LeadIdGenerator()
+        later = generator.new_id(1_790_000_000_500)
+        earlier = generator.new_id(1_790_000_000_000)
+        assert earlier > later
+
+    def test_timestamp_round_trip(self):
+        """Test the capture time can be read back from the ID"""
+        captured = datetime(2026, 10, 1, 19, 0, tzinfo=timezone.utc)
+        lead_id = LeadIdGenerator().new_id(int(captured.timestamp() * 1000))
+        assert lead_id_timestamp(lead_id) == captured
+        assert lead_id_timestamp("lead_20261001_090000") is None
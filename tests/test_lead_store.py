@@ -0,0 +1,192 @@
+"""
+Tests for the indexed SQLite lead store
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from api_backend.services.lead_store import LeadStore, normalize_quality
+
+
+def make_lead(lead_id, captured_at, quality="🔥 HOT - Ready to buy", **extra):
+    lead = {
+        "lead_id": lead_id,
+        "captured_at": captured_at,
+        "lead_quality": quality,
+        "qualification_score": 85,
+        "location": "Maui",
+        "business_type": "restaurant",
+        "email": f"{lead_id}@mauigrindz.com",
+    }
+    lead.update(extra)
+    return lead
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LeadStore(str(tmp_path / "leads.db"))
+    yield store
+    store.close()
+
+
+class TestLeadStore:
+    """Test lead persistence and indexed queries"""
+
+    def test_quality_normalization(self):
+        """Test display qualities map to index keys"""
+        assert normalize_quality("🔥 HOT - Ready to buy") == "hot"
+        assert normalize_quality("🌟 WARM - High interest") == "warm"
+        assert normalize_quality("💫 COOL - Needs nurturing") == "cool"
+        assert normalize_quality("❄️ COLD - Early stage") == "cold"
+        assert normalize_quality(None) == "cold"
+
+    def test_save_get_delete(self, store):
+        """Test round-tripping a lead"""
+        lead = make_lead("lead_1", "2026-10-01T09:00:00-10:00", name="Keoni")
+        assert store.save_lead(lead) is True
+        assert store.get_lead("lead_1")["name"] == "Keoni"
+
+        assert store.delete_lead("lead_1") is True
+        assert store.get_lead("lead_1") is None
+        assert store.delete_lead("lead_1") is False
+
+    def test_duplicate_id_is_not_overwritten(self, store):
+        """Test an existing lead is never silently replaced"""
+        store.save_lead(make_lead("lead_1", "2026-10-01T09:00:00-10:00", name="First"))
+        assert store.save_lead(make_lead("lead_1", "2026-10-01T09:00:00-10:00", name="Second")) is False
+        assert store.get_lead("lead_1")["name"] == "First"
+
+    def test_list_filters_before_limit(self, store):
+        """Test the quality filter is applied before the limit, newest first"""
+        store.save_lead(make_lead("lead_a", "2026-10-01T09:00:00-10:00"))
+        store.save_lead(make_lead("lead_b", "2026-10-02T09:00:00-10:00", quality="❄️ COLD - Early stage"))
+        store.save_lead(make_lead("lead_c", "2026-10-03T09:00:00-10:00", quality="❄️ COLD - Early stage"))
+
+        hot = store.list_leads(limit=1, quality="hot")
+        assert [l["lead_id"] for l in hot] == ["lead_a"]
+        assert [l["lead_id"] for l in store.list_leads(limit=10)] == ["lead_c", "lead_b", "lead_a"]
+
+    def test_iter_leads_pages_through_everything(self, store):
+        """Test the batched iterator visits every lead exactly once"""
+        for i in range(7):
+            store.save_lead(make_lead(f"lead_{i}", f"2026-10-0{i + 1}T09:00:00-10:00"))
+
+        ids = [lead["lead_id"] for lead in store.iter_leads(batch_size=3)]
+        assert ids == [f"lead_{i}" for i in reversed(range(7))]
+
+    def test_cursor_pages_are_stable(self, store):
+        """Test next_cursor walks every lead once and stops on the last page"""
+        for i in range(5):
+            store.save_lead(make_lead(f"lead_{i}", f"2026-10-0{i + 1}T09:00:00-10:00"))
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = store.query_leads(limit=2, cursor=cursor)
+            seen.extend(lead["lead_id"] for lead in page)
+            if cursor is None:
+                break
+            # A lead arriving mid-pagination must not shift later pages
+            store.save_lead(make_lead(f"lead_new_{len(seen)}", "2026-10-09T09:00:00-10:00"))
+
+        assert seen == [f"lead_{i}" for i in reversed(range(5))]
+
+    def test_query_filters(self, store):
+        """Test island, business type, score and date filters are applied together"""
+        store.save_lead(make_lead("lead_a", "2026-10-01T09:00:00-10:00", qualification_score=90))
+        store.save_lead(make_lead("lead_b", "2026-10-02T09:00:00-10:00", qualification_score=40))
+        store.save_lead(make_lead("lead_c", "2026-10-03T09:00:00-10:00", location="Oahu", qualification_score=95))
+        store.save_lead(make_lead("lead_d", "2026-10-04T09:00:00-10:00", business_type="retail", qualification_score=95))
+
+        since = datetime.fromisoformat("2026-10-01T00:00:00-10:00").timestamp()
+        until = datetime.fromisoformat("2026-10-03T00:00:00-10:00").timestamp()
+        leads, cursor = store.query_leads(location="maui", business_type="Restaurant", min_score=80)
+        assert [l["lead_id"] for l in leads] == ["lead_a"]
+        assert cursor is None
+
+        leads, _ = store.query_leads(since=since, until=until)
+        assert [l["lead_id"] for l in leads] == ["lead_b", "lead_a"]
+
+    def test_invalid_cursor_rejected(self, store):
+        """Test tampered page tokens raise ValueError"""
+        with pytest.raises(ValueError):
+            store.query_leads(cursor="not-a-cursor")
+
+    def test_stats(self, store):
+        """Test aggregate counts match the legacy stats shape"""
+        store.save_lead(make_lead("lead_a", "2026-10-01T09:00:00-10:00"))
+        store.save_lead(make_lead("lead_b", "2026-10-02T09:00:00-10:00", quality="💫 COOL - Needs nurturing", location="Oahu"))
+
+        stats = store.get_stats()
+        assert stats["total"] == 2
+        assert stats["by_quality"] == {"hot": 1, "warm": 0, "cold": 1}
+        assert stats["by_location"] == {"Maui": 1, "Oahu": 1}
+        assert stats["last_captured"] == "2026-10-02T09:00:00-10:00"
+
+    def test_stats_follow_writes_and_deletes(self, store):
+        """Test counters are updated in place on save and delete"""
+        store.save_lead(make_lead("lead_a", "2026-10-01T09:00:00-10:00"))
+        store.save_lead(make_lead("lead_b", "2026-10-02T09:00:00-10:00", location="Oahu"))
+        store.save_lead(make_lead("lead_b", "2026-10-02T09:00:00-10:00", location="Oahu"))
+        assert store.get_stats()["total"] == 2
+
+        store.delete_lead("lead_b")
+        stats = store.get_stats()
+        assert stats["total"] == 1
+        assert stats["by_location"] == {"Maui": 1}
+        assert stats["last_captured"] == "2026-10-01T09:00:00-10:00"
+
+    def test_stats_see_writes_from_other_connections(self, store):
+        """Test the cached stats are refreshed when another process writes"""
+        store.save_lead(make_lead("lead_a", "2026-10-01T09:00:00-10:00"))
+        assert store.get_stats()["total"] == 1
+
+        other = LeadStore(store.db_path)
+        other.save_lead(make_lead("lead_b", "2026-10-02T09:00:00-10:00"))
+        other.close()
+
+        assert store.get_stats()["total"] == 2
+
+    def test_ensure_aggregates_rebuilds_drift(self, store):
+        """Test aggregates are rebuilt when they disagree with the leads table"""
+        store.save_lead(make_lead("lead_a", "2026-10-01T09:00:00-10:00"))
+        store.save_lead(make_lead("lead_b", "2026-10-02T09:00:00-10:00", business_type="retail"))
+        store.conn.execute("DELETE FROM lead_aggregates")
+
+        assert store.ensure_aggregates() is True
+        assert store.ensure_aggregates() is False
+        stats = store.get_stats()
+        assert stats["total"] == 2
+        assert stats["by_business_type"] == {"restaurant": 1, "retail": 1}
+
+    def test_migrate_json_files_runs_once(self, store, tmp_path):
+        """Test legacy lead files are imported a single time"""
+        legacy_dir = tmp_path / "legacy"
+        legacy_dir.mkdir()
+        for i in range(3):
+            lead = make_lead(f"lead_2026100{i}_090000", f"2026-10-0{i + 1}T09:00:00-10:00")
+            (legacy_dir / f"{lead['lead_id']}.json").write_text(json.dumps(lead))
+        (legacy_dir / "lead_broken.json").write_text("{not json")
+
+        assert store.migrate_json_files(str(legacy_dir)) == 3
+        assert store.migrate_json_files(str(legacy_dir)) == 0
+        assert store.count() == 3
+
+    def test_search_ranks_and_tracks_changes(self, store):
+        """Test full-text search ranks name hits first and follows updates and deletes"""
+        store.save_lead(make_lead("lead_a", "2026-10-01T09:00:00-10:00", name="Malia", conversation_summary="Customer loves Grindz plates"))
+        store.save_lead(make_lead("lead_b", "2026-10-02T09:00:00-10:00", company="Maui Grindz", phone="808-555-1234"))
+
+        leads, has_more = store.search_leads("grind")
+        assert [l["lead_id"] for l in leads] == ["lead_b", "lead_a"]
+        assert has_more is False
+        assert "[Grindz]" in leads[0]["search_snippet"]
+
+        assert [l["lead_id"] for l in store.search_leads("8085551234")[0]] == ["lead_b"]
+        assert store.search_leads('"unbalanced (query')[0] == []
+
+        store.update_lead({**store.get_lead("lead_b"), "company": "Kona Coffee"})
+        assert [l["lead_id"] for l in store.search_leads("grind")[0]] == ["lead_a"]
+        store.delete_lead("lead_a")
+        assert store.search_leads("grind")[0] == []
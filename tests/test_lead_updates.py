@@ -0,0 +1,145 @@
+"""
+Tests for incremental lead updates with a debounced CRM sync
+"""
+
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from api_backend.services import lead_store as lead_store_module
+from api_backend.services.lead_capture_service import LeadCaptureService
+from api_backend.services.lead_store import LeadStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = LeadStore(str(tmp_path / "leads.db"))
+    monkeypatch.setattr(lead_store_module, "lead_store", store)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def service(store, monkeypatch):
+    monkeypatch.delenv("HUBSPOT_API_KEY", raising=False)
+    monkeypatch.setenv("LEAD_UPDATE_DEBOUNCE_SECONDS", "0.05")
+    service = LeadCaptureService()
+    service.synced = []
+
+    async def send_lead_delta(lead, delta, previous_score):
+        service.synced.append(dict(delta))
+        return True
+
+    monkeypatch.setattr(service, "_send_lead_delta", send_lead_delta)
+    store.save_lead({
+        "lead_id": "lead_1",
+        "captured_at": "2026-10-01T09:00:00-10:00",
+        "email": "keoni@mauigrindz.com",
+        "qualification_score": 50,
+        "lead_quality": "💫 COOL - Needs nurturing",
+    })
+    return service
+
+
+class TestIncrementalLeadUpdates:
+    """Test post-capture fields reach the store at once and the CRM once"""
+
+    def test_burst_of_updates_is_synced_once(self, service, store):
+        """Test several quick updates coalesce into a single downstream sync"""
+        async def run():
+            service.queue_lead_update("lead_1", {"name": "Keoni"})
+            service.queue_lead_update("lead_1", {"company": "Maui Grindz"})
+            service.queue_lead_update("lead_1", {"phone": "808-555-1234"}, qualification_score=85)
+            assert service.synced == []
+            await asyncio.sleep(0.2)
+
+        asyncio.run(run())
+
+        assert len(service.synced) == 1
+        assert set(service.synced[0]) == {"name", "company", "phone", "qualification_score", "lead_quality"}
+
+        lead = store.get_lead("lead_1")
+        assert lead["company"] == "Maui Grindz"
+        assert "HOT" in lead["lead_quality"]
+        assert store.get_stats()["by_quality"]["hot"] == 1
+
+    def test_unchanged_fields_are_ignored(self, service):
+        """Test values the lead already has do not start a sync"""
+        assert service.queue_lead_update("lead_1", {"email": "keoni@mauigrindz.com"}) is False
+        assert service._pending_updates == {}
+
+    def test_flush_sends_pending_immediately(self, service):
+        """Test ending a session does not wait for the debounce"""
+        async def run():
+            service.update_debounce_seconds = 60
+            service.queue_lead_update("lead_1", {"name": "Keoni"})
+            await service.flush_pending_updates()
+
+        asyncio.run(run())
+        assert service.synced == [{"name": "Keoni"}]
+        assert service._update_timers == {}
+
+
+class TestDebouncedCrmSync:
+    """Test the coalesced sync targets the lead's existing HubSpot contact"""
+
+    @pytest.fixture
+    def hubspot(self, monkeypatch):
+        from api_backend.services.hubspot_service import hubspot_service
+
+        calls = []
+
+        def request(method, url, **kwargs):
+            calls.append((method, url.replace(hubspot_service.base_url, "")))
+            response = Mock(status_code=201 if method == "POST" else 200, headers={}, text="")
+            response.json.return_value = {"id": "note", "results": []}
+            return response
+
+        monkeypatch.setattr(hubspot_service, "api_key", "pat-test")
+        monkeypatch.setattr(hubspot_service.client, "session", Mock(request=request))
+        return calls
+
+    @pytest.fixture
+    def service(self, store, hubspot, monkeypatch):
+        from api_backend.services.webhook_lead_capture import webhook_lead_capture
+
+        async def send_webhook(payload):
+            return {"success": True}
+
+        monkeypatch.setattr(webhook_lead_capture, "send_lead", send_webhook)
+        monkeypatch.setenv("LEAD_UPDATE_DEBOUNCE_SECONDS", "60")
+        service = LeadCaptureService()
+        service.hubspot_api_key = "pat-test"
+        return service
+
+    def test_phone_only_flush_patches_stored_contact(self, service, store, hubspot):
+        """Test a phone-only lead's debounced updates patch its contact instead of creating new ones"""
+        store.save_lead({
+            "lead_id": "lead_2",
+            "captured_at": "2026-10-01T09:00:00-10:00",
+            "phone": "808-555-1234",
+            "hubspot_contact_id": "501",
+            "qualification_score": 40,
+        })
+
+        async def run():
+            for fields in ({"name": "Malia"}, {"company": "Kona Coffee"}):
+                service.queue_lead_update("lead_2", fields)
+                await service.flush_lead_update("lead_2")
+
+        asyncio.run(run())
+
+        assert ("POST", "/crm/v3/objects/contacts") not in hubspot
+        assert hubspot.count(("PATCH", "/crm/v3/objects/contacts/501")) == 2
+
+    def test_contact_details_on_file_are_kept(self, service, store):
+        """Test a later mention of a different phone does not re-key the lead"""
+        store.save_lead({
+            "lead_id": "lead_3",
+            "captured_at": "2026-10-01T09:00:00-10:00",
+            "phone": "808-555-1234",
+        })
+
+        assert service.queue_lead_update("lead_3", {"phone": "808-555-9999"}) is False
+        assert store.get_lead("lead_3")["phone"] == "808-555-1234"
@@ -0,0 +1,57 @@
+"""
+Tests for the chat pipeline metrics registry
+"""
+
+from api_backend.services.metrics import MetricsRegistry, StageTimer
+
+
+class TestMetricsRegistry:
+    """Test counters and histograms render as Prometheus text"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test observations land in the right le buckets with sum and count"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("chat_seconds", "Chat time", ["stage"], buckets=(0.1, 1.0))
+        histogram.observe(0.05, stage="claude")
+        histogram.observe(0.5, stage="claude")
+        histogram.observe(3.0, stage="claude")
+
+        text = registry.render()
+
+        assert "# TYPE chat_seconds histogram" in text
+        assert 'chat_seconds_bucket{stage="claude",le="0.1"} 1' in text
+        assert 'chat_seconds_bucket{stage="claude",le="1"} 2' in text
+        assert 'chat_seconds_bucket{stage="claude",le="+Inf"} 3' in text
+        assert 'chat_seconds_sum{stage="claude"} 3.55' in text
+        assert 'chat_seconds_count{stage="claude"} 3' in text
+
+    def test_counters_by_label(self):
+        """Test labelled counters, escaping and unlabelled zero values"""
+        registry = MetricsRegistry()
+        fallbacks = registry.counter("fallbacks_total", "Fallbacks", ["reason"])
+        registry.counter("retries_total", "Retries")
+        fallbacks.inc(reason="claude_error")
+        fallbacks.inc(reason="claude_error")
+        fallbacks.inc(reason='say "aloha"')
+
+        text = registry.render()
+
+        assert 'fallbacks_total{reason="claude_error"} 2' in text
+        assert 'fallbacks_total{reason="say \\"aloha\\""} 1' in text
+        assert "retries_total 0" in text
+        assert registry.counter("fallbacks_total", "Fallbacks", ["reason"]) is fallbacks
+
+    def test_stage_timer_laps(self):
+        """Test each lap is recorded under its stage and skipped time is not"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("stage_seconds", "Stages", ["stage"])
+        timer = StageTimer(histogram)
+        timer.lap("session")
+        timer.skip()
+        timer.lap("post")
+        timer.lap("post")
+
+        assert set(timer.stages) == {"session", "post"}
+        assert histogram.snapshot(stage="post")["count"] == 2
+        assert histogram.snapshot(stage="claude") is None
+        assert timer.total() >= sum(timer.stages.values())
@@ -0,0 +1,159 @@
+"""
+Tests for write-behind Postgres persistence batching
+"""
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+
+import pytest
+
+from api_backend.services.postgres_store import PostgresStore, to_business_type, to_island
+
+
+class FakeConnection:
+    def __init__(self, calls, fail=False, reject=None):
+        self.calls = calls
+        self.fail = fail
+        self.reject = reject
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def fetch(self, sql, *args):
+        self.calls.append(("fetch", sql, args))
+        return [{"id": uuid.uuid4(), "session_id": s} for s in args[0]]
+
+    async def execute(self, sql, *args):
+        if self.fail:
+            raise ConnectionError("connection reset")
+        if self.reject and any(self.reject in value for column in args for value in column if isinstance(value, str)):
+            raise ValueError("invalid byte sequence for encoding \"UTF8\": 0x00")
+        self.calls.append(("execute", sql, args))
+
+    async def executemany(self, sql, rows):
+        self.calls.append(("executemany", sql, rows))
+
+
+class FakePool:
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+        self.reject = None
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self.calls, self.fail, self.reject)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setenv("POSTGRES_BATCH_SIZE", "50")
+    monkeypatch.setenv("POSTGRES_MAX_QUEUE_SIZE", "100")
+    store = PostgresStore()
+    store.enabled = True
+    store.pool = FakePool()
+    return store
+
+
+class TestPostgresStore:
+    """Test the chat path only enqueues and flushes are batched"""
+
+    def test_enum_mapping(self):
+        """Test free-text island and business type map onto the init-db.sql enums"""
+        assert to_island("Big Island") == "big_island"
+        assert to_island("Hawaii Island") == "big_island"
+        assert to_island("Guam") is None
+        assert to_business_type("coffee shop") == "restaurant"
+        assert to_business_type("Real Estate") == "real_estate"
+        assert to_business_type("surf school") == "other"
+
+    def test_messages_written_in_one_statement(self, store):
+        """Test a batch of messages becomes a single multi-row insert"""
+        store.record_conversation("session_1", "user_1")
+        for i in range(10):
+            store.record_message("session_1", "user", f"Aloha {i}")
+        assert store.pool.calls == []
+
+        asyncio.run(store.flush())
+
+        kinds = [(call[0], call[1].split()[2]) for call in store.pool.calls]
+        assert kinds == [("fetch", "chatbot.conversations"), ("execute", "chatbot.messages")]
+        assert len(store.pool.calls[1][2][2]) == 10
+        assert store.get_status()["written_total"] == 11
+
+    def test_cached_conversation_skips_upsert(self, store):
+        """Test later batches reuse the conversation id instead of looking it up"""
+        store.record_message("session_1", "user", "Aloha")
+        asyncio.run(store.flush())
+        store.pool.calls.clear()
+
+        store.record_message("session_1", "bot", "Aloha! Howzit?")
+        asyncio.run(store.flush())
+        assert [call[0] for call in store.pool.calls] == ["execute"]
+
+    def test_queue_is_bounded(self, store):
+        """Test writes beyond the queue limit are counted and dropped"""
+        for i in range(120):
+            store.record_message("session_1", "user", f"message {i}")
+
+        status = store.get_status()
+        assert status["queue_depth"] == 100
+        assert status["dropped_total"] == 20
+
+    def test_connection_failure_keeps_ops_and_backs_off(self, store):
+        """Test a database outage doesn't use up attempts or drop queued writes"""
+        store.pool.fail = True
+        store.record_message("session_1", "user", "Aloha")
+
+        for _ in range(5):
+            asyncio.run(store.flush())
+        status = store.get_status()
+        assert status["queue_depth"] == 1
+        assert status["failed_batches"] == 5
+        assert status["dropped_total"] == 0
+        assert status["retry_delay_seconds"] > store.flush_interval
+        assert store._queue[0]["attempts"] == 0
+
+        store.pool.fail = False
+        asyncio.run(store.flush())
+        status = store.get_status()
+        assert status["queue_depth"] == 0
+        assert status["written_total"] == 1
+        assert status["retry_delay_seconds"] == 0
+
+    def test_bad_row_is_isolated_from_its_batch(self, store):
+        """Test a row the database rejects is split out and only it is retried and dropped"""
+        store.pool.reject = "\x00"
+        for i in range(20):
+            store.record_message("session_1", "user", f"Aloha {i}")
+        store.record_message("session_1", "user", "Aloha\x00")
+
+        asyncio.run(store.flush())
+        status = store.get_status()
+        assert status["written_total"] == 20
+        assert status["queue_depth"] == 1
+
+        asyncio.run(store.flush())
+        asyncio.run(store.flush())
+        assert store.get_status()["queue_depth"] == 0
+        assert store.get_status()["dropped_total"] == 1
+
+    def test_reused_conversation_is_not_evicted(self, store, monkeypatch):
+        """Test the conversation cache keeps recently used sessions"""
+        from api_backend.services import postgres_store as postgres_store_module
+        monkeypatch.setattr(postgres_store_module, "CONVERSATION_CACHE_SIZE", 2)
+
+        for session_id in ("session_1", "session_2", "session_1", "session_3"):
+            store.record_message(session_id, "user", "Aloha")
+            asyncio.run(store.flush())
+
+        assert list(store._conversation_ids) == ["session_1", "session_3"]
+
+    def test_disabled_store_ignores_writes(self, monkeypatch):
+        """Test nothing is queued without a configured database"""
+        monkeypatch.delenv("POSTGRES_PERSISTENCE_ENABLED", raising=False)
+        store = PostgresStore()
+        store.record_message("session_1", "user", "Aloha")
+        assert store.get_status()["queue_depth"] == 0
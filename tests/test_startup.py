@@ -0,0 +1,84 @@
+"""
+Tests for lazy initialization, startup profiling and warm-up
+"""
+
+import asyncio
+
+from api_backend.services.hawaiian_conversation_router import HawaiianConversationRouter
+from api_backend.services.startup_profile import StartupProfile
+from api_backend.services.warmup import warm_up
+
+
+class WarmClient:
+    def __init__(self):
+        self.warmed = 0
+
+    def warm_connection(self):
+        self.warmed += 1
+        return True
+
+
+class StubRouter:
+    """Just the surface warm_up uses"""
+
+    def __init__(self):
+        self.claude_client = WarmClient()
+        self.ready_calls = 0
+        self.lead_capture_calls = 0
+
+    async def ensure_ready(self):
+        self.ready_calls += 1
+
+    async def ensure_lead_capture(self):
+        self.lead_capture_calls += 1
+
+
+class TestLazyInit:
+    """Test the router can defer building its clients"""
+
+    def test_lazy_router_initializes_once_on_demand(self, monkeypatch):
+        """Test each client is built once when first needed, even with concurrent callers"""
+        router = HawaiianConversationRouter(lazy=True)
+        calls = []
+        monkeypatch.setattr(router, "_init_lead_capture", lambda: calls.append("lead_capture"))
+        monkeypatch.setattr(router, "_init_claude_client", lambda: calls.append("claude"))
+
+        async def scenario():
+            await asyncio.gather(router.ensure_ready(), router.ensure_ready(), router.ensure_ready())
+            await router.ensure_ready()
+            assert calls == ["claude"]
+            await router.ensure_lead_capture()
+
+        asyncio.run(scenario())
+        assert calls == ["claude", "lead_capture"]
+
+
+class TestStartupProfile:
+    """Test startup phases are recorded once each"""
+
+    def test_phases_are_marked_once(self):
+        """Test later marks of a phase are ignored and the status is in milliseconds"""
+        profile = StartupProfile()
+        assert profile.mark("imports") is not None
+        assert profile.mark("imports") is None
+        profile.mark("first_chat_response")
+
+        status = profile.get_status()
+        assert list(status["phases_ms"]) == ["imports", "first_chat_response"]
+        assert "first_chat_response +" in profile.summary()
+
+
+class TestWarmUp:
+    """Test the background warm-up"""
+
+    def test_warm_up_readies_router_and_connections(self, monkeypatch):
+        """Test deferred init runs and the Anthropic pool is pre-opened; HubSpot is skipped when unconfigured"""
+        monkeypatch.delenv("HUBSPOT_API_KEY", raising=False)
+        router = StubRouter()
+
+        results = asyncio.run(warm_up(router))
+
+        assert router.ready_calls == 1
+        assert router.lead_capture_calls == 1
+        assert router.claude_client.warmed == 1
+        assert results == {"anthropic": True, "hubspot": False}
@@ -0,0 +1,90 @@
+"""
+Tests for the in-memory static asset cache
+"""
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from api_backend.services.static_assets import StaticAssetCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    page = tmp_path / "landing-page.html"
+    page.write_text("<html><body>" + "Aloha! " * 500 + "</body></html>")
+    logo = tmp_path / "logo.webp"
+    logo.write_bytes(b"RIFF" + bytes(2048))
+
+    cache = StaticAssetCache()
+    cache.register("landing", str(page), "text/html; charset=utf-8")
+    cache.register("logo", str(logo), "image/webp", "public, max-age=86400")
+    return cache
+
+
+@pytest.fixture
+def client(cache):
+    app = FastAPI()
+
+    @app.get("/asset/{name}")
+    async def asset(request: Request, name: str):
+        return cache.response(request, name)
+
+    return TestClient(app)
+
+
+class TestStaticAssetCache:
+    """Precompressed variants, ETags and conditional requests"""
+
+    def test_gzip_variant_served_when_accepted(self, client, cache):
+        """Clients that accept gzip get the precompressed body"""
+        response = client.get("/asset/landing", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.content == cache.get("landing").body
+        assert len(cache.get("landing").variants["gzip"]) < len(cache.get("landing").body)
+
+    def test_identity_when_gzip_not_accepted(self, cache):
+        """Without Accept-Encoding the raw bytes are sent"""
+        app = FastAPI()
+
+        @app.get("/")
+        async def page(request: Request):
+            return cache.response(request, "landing")
+
+        response = TestClient(app).get("/", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.content == cache.get("landing").body
+
+    def test_if_none_match_returns_304(self, client):
+        """A matching ETag is answered with an empty 304"""
+        etag = client.get("/asset/landing").headers["etag"]
+
+        response = client.get("/asset/landing", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_images_are_not_recompressed(self, client, cache):
+        """Already-compressed formats keep a single variant and their cache policy"""
+        response = client.get("/asset/logo", headers={"Accept-Encoding": "gzip"})
+
+        assert cache.get("logo").variants == {}
+        assert "content-encoding" not in response.headers
+        assert response.headers["cache-control"] == "public, max-age=86400"
+
+    def test_reload_changed_picks_up_edits(self, cache, tmp_path):
+        """Edited files get a new body and ETag on reload"""
+        asset = cache.get("landing")
+        old_etag = asset.etag
+
+        page = tmp_path / "landing-page.html"
+        page.write_text("<html>Mahalo</html>")
+        asset.mtime -= 1
+
+        assert cache.reload_changed() == 1
+        assert asset.body == b"<html>Mahalo</html>"
+        assert asset.etag != old_etag
+        assert asset.variants == {}
@@ -0,0 +1,89 @@
+"""
+Tests for queued, sampled and redacted JSON logging
+"""
+
+import io
+import json
+import logging
+
+import pytest
+
+from api_backend.services.structured_logging import (
+    JsonFormatter, SamplingFilter, parse_sample_rates, redact_text, setup_logging, stop_logging
+)
+from api_backend.services.tracing import install_log_trace_ids, traced
+
+
+@pytest.fixture
+def json_log():
+    """Route the root logger through the background writer into a buffer"""
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    stream = io.StringIO()
+    install_log_trace_ids()
+    setup_logging(level="INFO", log_format="json", stream=stream)
+
+    def lines():
+        stop_logging()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield lines
+
+    stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in saved_handlers:
+        root.addHandler(handler)
+    root.setLevel(saved_level)
+
+
+def make_record(message, level=logging.INFO, **extra):
+    record = logging.LogRecord("lenilani", level, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonLogging:
+    """Test records are written as redacted JSON off the calling thread"""
+
+    def test_records_are_json_with_trace_and_extras(self, json_log):
+        """Test the writer thread emits one JSON object per record with the trace ID"""
+        logger = logging.getLogger("lenilani.chat")
+        lead = {"email": "keoni@example.com", "company": "Aloha Poke"}
+        with traced("trace-json-0001"):
+            logger.info("Lead qualification score: %d", 72, extra={"lead": lead})
+        lead["company"] = "changed after logging"
+
+        entry = json_log()[-1]
+        assert entry["message"] == "Lead qualification score: 72"
+        assert entry["trace_id"] == "trace-json-0001"
+        assert entry["lead"] == {"email": "[redacted]", "company": "Aloha Poke"}
+
+    def test_free_text_pii_is_masked(self):
+        """Test emails and phone numbers in messages are masked"""
+        formatter = JsonFormatter()
+        entry = json.loads(formatter.format(make_record("Contact not found: keoni@example.com / 808-555-1234")))
+        assert entry["message"] == "Contact not found: [redacted] / [redacted]"
+
+        raw = json.loads(JsonFormatter(redact=False).format(make_record("keoni@example.com")))
+        assert raw["message"] == "keoni@example.com"
+
+    def test_bare_digit_runs_are_not_phone_numbers(self):
+        """Test timestamps and record IDs survive while formatted phone numbers are masked"""
+        assert redact_text("retry at 1760912345 for contact 123.456.7890") == "retry at 1760912345 for contact [redacted]"
+        assert redact_text("HubSpot contact 8085551234 updated") == "HubSpot contact 8085551234 updated"
+        assert redact_text("call (808) 555-1234 or +18085551234") == "call [redacted] or [redacted]"
+
+
+class TestSampling:
+    """Test high-volume events are sampled and problems never are"""
+
+    def test_sampled_events(self):
+        """Test a zero rate drops INFO events but keeps warnings and unsampled records"""
+        sampler = SamplingFilter(parse_sample_rates("lead_extraction=0,chat_request=bogus"))
+
+        assert not sampler.filter(make_record("extracted", event="lead_extraction"))
+        assert sampler.filter(make_record("extracted", logging.WARNING, event="lead_extraction"))
+        assert sampler.filter(make_record("chat", event="chat_request"))
+        assert sampler.filter(make_record("no event"))
+        assert sampler.dropped == 1
@@ -0,0 +1,78 @@
+"""
+Tests for request trace IDs and Server-Timing
+"""
+
+import asyncio
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api_backend.services.metrics import MetricsRegistry, StageTimer
+from api_backend.services.tracing import (
+    TraceMiddleware, current_trace_id, install_log_trace_ids, trace_headers, traced
+)
+
+
+def make_app():
+    histogram = MetricsRegistry().histogram("stage_seconds", "Stages", ["stage"])
+    app = FastAPI()
+    app.add_middleware(TraceMiddleware)
+
+    @app.get("/chat")
+    async def chat():
+        timer = StageTimer(histogram)
+        timer.lap("session")
+        timer.lap("claude")
+        timer.lap("serialization")
+        return {"trace_id": current_trace_id()}
+
+    return app
+
+
+class TestTraceMiddleware:
+    """Test every response carries its trace ID and timing breakdown"""
+
+    def test_response_headers(self):
+        """Test X-Trace-ID matches the handler's trace and Server-Timing has the stages"""
+        response = TestClient(make_app()).get("/chat")
+
+        trace_id = response.headers["X-Trace-ID"]
+        assert response.json()["trace_id"] == trace_id
+        stages = [part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")]
+        assert stages == ["queue", "context", "llm", "post", "total"]
+
+    def test_client_request_id_is_reused(self):
+        """Test the widget's X-Request-ID becomes the trace ID, junk is replaced"""
+        client = TestClient(make_app())
+
+        response = client.get("/chat", headers={"X-Request-ID": "req-1700000000-abc123"})
+        assert response.headers["X-Trace-ID"] == "req-1700000000-abc123"
+
+        response = client.get("/chat", headers={"X-Request-ID": "bad id\"; drop"})
+        assert response.headers["X-Trace-ID"] != "bad id\"; drop"
+        assert len(response.headers["X-Trace-ID"]) == 32
+
+
+class TestTracePropagation:
+    """Test the trace follows the request into logs and background tasks"""
+
+    def test_logs_and_tasks_share_the_trace(self, caplog):
+        """Test log records and spawned tasks see the request's trace ID"""
+        install_log_trace_ids()
+        logger = logging.getLogger("lenilani.test")
+
+        async def capture_lead():
+            logger.warning("capturing lead")
+            return trace_headers()
+
+        async def scenario():
+            with traced("trace-for-lead-42"):
+                return await asyncio.create_task(capture_lead())
+
+        with caplog.at_level(logging.WARNING):
+            headers = asyncio.run(scenario())
+
+        assert headers == {"X-Trace-ID": "trace-for-lead-42"}
+        assert caplog.records[-1].trace_id == "trace-for-lead-42"
+        assert trace_headers() == {}
@@ -0,0 +1,122 @@
+"""
+Tests for multi-destination webhook fan-out
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+
+import httpx
+import pytest
+
+from api_backend.services.webhook_lead_capture import WebhookLeadCapture
+
+
+@pytest.fixture
+def destinations_env(monkeypatch):
+    monkeypatch.delenv("LEAD_WEBHOOK_URL", raising=False)
+    monkeypatch.setenv(
+        "LEAD_WEBHOOK_DESTINATIONS",
+        "zapier=https://hooks.example.com/zapier,crm=https://crm.example.com/leads"
+    )
+    monkeypatch.setenv("LEAD_WEBHOOK_SECRET", "mahalo-secret")
+    monkeypatch.setenv("LEAD_WEBHOOK_SECRET_CRM", "crm-secret")
+
+
+def make_service(handler):
+    service = WebhookLeadCapture()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+class TestWebhookFanOut:
+    """Test concurrent, signed delivery to several destinations"""
+
+    def test_destinations_loaded_with_own_secrets(self, destinations_env):
+        """Test destinations and per-destination secrets come from the environment"""
+        service = WebhookLeadCapture()
+        secrets = {d.name: d.secret for d in service.destinations}
+        assert secrets == {"zapier": "mahalo-secret", "crm": "crm-secret"}
+
+    def test_payload_is_hmac_signed(self, destinations_env):
+        """Test receivers can verify the body with the shared secret"""
+        captured = {}
+
+        def handler(request):
+            captured[request.url.host] = request
+            return httpx.Response(200, text="ok")
+
+        service = make_service(handler)
+        result = asyncio.run(service.send_lead({"lead_id": "lead_1", "email": "keoni@mauigrindz.com"}))
+
+        assert result["success"] is True
+        request = captured["crm.example.com"]
+        timestamp = request.headers["X-LeniLani-Timestamp"]
+        expected = hmac.new(b"crm-secret", timestamp.encode() + b"." + request.content, hashlib.sha256).hexdigest()
+        assert request.headers["X-LeniLani-Signature"] == f"sha256={expected}"
+        assert "X-Webhook-Secret" not in request.headers
+        assert json.loads(request.content)["email"] == "keoni@mauigrindz.com"
+
+    def test_failing_destination_is_queued_for_retry(self, destinations_env):
+        """Test a 503 lands on that destination's retry queue only"""
+        def handler(request):
+            if request.url.host == "crm.example.com":
+                return httpx.Response(503)
+            return httpx.Response(200)
+
+        async def run():
+            service = make_service(handler)
+            result = await service.send_lead({"lead_id": "lead_2"})
+            metrics = service.get_metrics()
+            await service.close()
+            return result, metrics
+
+        result, metrics = asyncio.run(run())
+
+        assert result["success"] is True
+        assert result["destinations"]["crm"]["queued"] is True
+        assert metrics["crm"]["retry_queue_depth"] == 1
+        assert metrics["crm"]["failed_total"] == 1
+        assert metrics["zapier"]["retry_queue_depth"] == 0
+        assert metrics["zapier"]["sent_total"] == 1
+
+    def test_retries_run_in_due_order(self, destinations_env):
+        """Test a long backoff does not hold up a retry that is due sooner"""
+        delivered = []
+
+        def handler(request):
+            delivered.append(json.loads(request.content)["lead_id"])
+            return httpx.Response(200)
+
+        async def run():
+            service = make_service(handler)
+            crm = next(d for d in service.destinations if d.name == "crm")
+            service._queue_retry(crm, {"lead_id": "slow"}, attempt=5)
+            service._queue_retry(crm, {"lead_id": "fast"}, attempt=0)
+            await asyncio.sleep(1.3)
+            depth = len(crm.retry_queue)
+            await service.close()
+            return depth
+
+        assert asyncio.run(run()) == 1
+        assert delivered == ["fast"]
+
+    def test_slack_update_message(self, monkeypatch):
+        """Test lead updates are announced as updates with their changed fields"""
+        monkeypatch.setenv("LEAD_WEBHOOK_DESTINATIONS", "slack=https://hooks.slack.com/services/T0/B0/x")
+        monkeypatch.delenv("LEAD_WEBHOOK_URL", raising=False)
+        service = WebhookLeadCapture()
+
+        body = service._build_body(service.destinations[0], {
+            "event": "lead_updated",
+            "lead_id": "lead_1",
+            "name": "Keoni",
+            "changes": {"company": "Maui Grindz", "qualification_score": 85}
+        })
+
+        text = json.loads(body)["text"]
+        assert text.startswith("✏️ Lead updated: Keoni")
+        assert "• company: Maui Grindz" in text
+        assert "• qualification_score: 85" in text
+        assert "New lead" not in text
@@ -0,0 +1,296 @@
+"""
+Tests for the WebSocket frame protocol and send queues
+"""
+
+import asyncio
+import json
+
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from api_backend.services.tracing import current_trace_id
+from api_backend.services.websocket_manager import CLOSE_SLOW_CONSUMER, ConnectionManager
+from api_backend.services.ws_backplane import InProcessBackplane
+
+
+class BlockedSocket:
+    """A client that never reads - send_text never completes"""
+
+    def __init__(self):
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+class RecordingSocket(BlockedSocket):
+    """A client that reads everything immediately"""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+def make_app(manager):
+    app = FastAPI()
+
+    @app.websocket("/ws/{client_id}")
+    async def ws(websocket: WebSocket, client_id: str):
+        last_seq = websocket.query_params.get("last_seq")
+        connection = await manager.connect(websocket, client_id, int(last_seq) if last_seq else None)
+        if not connection.resumed:
+            connection.stream.send("welcome", message="Aloha!")
+
+        async def handle(stream, data):
+            await asyncio.sleep(0.05)
+            stream.send("response", message=data["message"].upper(), reply_to=data.get("id"), trace_id=current_trace_id())
+
+        await manager.serve(connection, handle)
+
+    return app
+
+
+class TestWebSocketProtocol:
+    """JSON frames, sequencing and pipelining"""
+
+    def test_frames_are_json_with_sequence_numbers(self):
+        """Welcome and replies are real JSON with increasing seq"""
+        client = TestClient(make_app(ConnectionManager(heartbeat_interval=0)))
+        with client.websocket_connect("/ws/keoni") as ws:
+            welcome = ws.receive_json()
+            assert welcome["type"] == "welcome"
+            assert welcome["seq"] == 1
+
+            ws.send_json({"type": "message", "message": "aloha", "id": "m1"})
+            reply = ws.receive_json()
+            assert reply == {**reply, "type": "response", "message": "ALOHA", "reply_to": "m1", "seq": 2}
+
+    def test_each_message_has_its_own_trace(self):
+        """Replies carry a per-message trace ID, reusing the client's when given"""
+        client = TestClient(make_app(ConnectionManager(heartbeat_interval=0)))
+        with client.websocket_connect("/ws/makana") as ws:
+            ws.receive_json()
+            ws.send_json({"type": "message", "message": "one", "id": "m1"})
+            ws.send_json({"type": "message", "message": "two", "id": "m2", "trace_id": "widget-trace-0002"})
+            first, second = ws.receive_json(), ws.receive_json()
+
+            assert len(first["trace_id"]) == 32
+            assert second["trace_id"] == "widget-trace-0002"
+
+    def test_messages_are_pipelined_in_order(self):
+        """A second message is accepted while the first reply is generating"""
+        client = TestClient(make_app(ConnectionManager(heartbeat_interval=0)))
+        with client.websocket_connect("/ws/leilani") as ws:
+            ws.receive_json()
+            ws.send_json({"message": "one", "id": "1"})
+            ws.send_json({"message": "two", "id": "2"})
+            ws.send_json({"type": "ping"})
+
+            frames = [ws.receive_json() for _ in range(3)]
+            assert frames[0]["type"] == "pong"
+            assert [f["reply_to"] for f in frames[1:]] == ["1", "2"]
+
+    def test_invalid_json_gets_error_frame(self):
+        """Malformed frames are answered, not fatal"""
+        client = TestClient(make_app(ConnectionManager(heartbeat_interval=0)))
+        with client.websocket_connect("/ws/kai") as ws:
+            ws.receive_json()
+            ws.send_text("{not json")
+            assert ws.receive_json()["error"] == "invalid_json"
+
+    def test_binary_frame_gets_error_frame(self):
+        """Binary frames are answered with an error and the socket stays open"""
+        client = TestClient(make_app(ConnectionManager(heartbeat_interval=0)))
+        with client.websocket_connect("/ws/kai") as ws:
+            ws.receive_json()
+            ws.send_bytes(b"\x00\x01")
+            assert ws.receive_json()["error"] == "binary_not_supported"
+            ws.send_json({"type": "ping"})
+            assert ws.receive_json()["type"] == "pong"
+
+
+class TestResumption:
+    """Reconnecting clients get missed frames instead of regenerating"""
+
+    def test_reply_generated_after_drop_is_replayed(self):
+        """A reply finished while disconnected arrives on resume"""
+        manager = ConnectionManager(heartbeat_interval=0)
+        # One event loop across both connections, like a running server
+        with TestClient(make_app(manager)) as client:
+            with client.websocket_connect("/ws/malia") as ws:
+                assert ws.receive_json()["seq"] == 1
+                ws.send_json({"message": "pricing?", "id": "m1"})
+            # Socket dropped mid-reply
+
+            with client.websocket_connect("/ws/malia?last_seq=1") as ws:
+                resumed = ws.receive_json()
+                assert resumed["type"] == "resumed"
+                assert resumed["complete"] is True
+
+                reply = ws.receive_json()
+                assert reply["seq"] == 2
+                assert reply["message"] == "PRICING?"
+
+                # Re-sending the same message does not trigger another generation
+                ws.send_json({"message": "pricing?", "id": "m1"})
+                ws.send_json({"type": "ping"})
+                assert ws.receive_json()["type"] == "pong"
+
+        assert manager.stats["duplicate_messages"] == 1
+        assert manager.stats["resumes"] == 1
+
+    def test_buffer_is_bounded_and_acked(self):
+        """Acks trim the buffer; overflow marks the resume incomplete"""
+        async def scenario():
+            manager = ConnectionManager(heartbeat_interval=0, replay_buffer_size=3)
+            connection = await manager.connect(BlockedSocket(), "kimo")
+            await manager.disconnect(connection)
+
+            stream = manager.streams["kimo"]
+            for i in range(5):
+                stream.send("response", message=str(i))
+            assert [seq for seq, _ in stream.buffer] == [3, 4, 5]
+
+            resumed = await manager.connect(BlockedSocket(), "kimo", last_seq=1)
+            frames = [json.loads(resumed.queue.get_nowait()) for _ in range(resumed.queue.qsize())]
+            assert frames[0] == {**frames[0], "type": "resumed", "complete": False, "last_seq": 5}
+            assert [f["seq"] for f in frames[1:]] == [3, 4, 5]
+
+            stream.ack(4)
+            assert [seq for seq, _ in stream.buffer] == [5]
+            await manager.disconnect(resumed)
+
+        asyncio.run(scenario())
+
+    def test_detached_sessions_expire_without_new_connections(self):
+        """The background sweep drops sessions past the resume TTL"""
+        async def scenario():
+            manager = ConnectionManager(heartbeat_interval=0, resume_ttl=0.05)
+            await manager.start()
+            connection = await manager.connect(BlockedSocket(), "leilani")
+            await manager.disconnect(connection)
+            assert "leilani" in manager.streams
+
+            await asyncio.sleep(0.2)
+            assert "leilani" not in manager.streams
+            await manager.stop()
+
+        asyncio.run(scenario())
+
+
+class TestBackpressure:
+    """Slow consumers are disconnected instead of stalling others"""
+
+    def test_slow_consumer_disconnected_and_broadcast_continues(self):
+        """A full send queue closes that connection; others still get the broadcast"""
+        async def scenario():
+            manager = ConnectionManager(max_queue=2, heartbeat_interval=0)
+            slow_socket = BlockedSocket()
+            slow = await manager.connect(slow_socket, "slow")
+
+            fast_socket = RecordingSocket()
+            await manager.connect(fast_socket, "fast")
+
+            for i in range(5):
+                await manager.broadcast({"message": f"Reno is online {i}"})
+                await asyncio.sleep(0.005)
+            await asyncio.sleep(0.01)
+
+            assert slow.closed
+            assert slow_socket.closed_with == CLOSE_SLOW_CONSUMER
+            frames = fast_socket.sent
+            assert [f["seq"] for f in frames] == [1, 2, 3, 4, 5]
+            assert frames[0]["type"] == "broadcast"
+
+            await manager.disconnect(slow)
+            assert manager.stats["slow_disconnects"] == 1
+
+        asyncio.run(scenario())
+
+
+class TestBackplane:
+    """Delivery to clients connected to another worker"""
+
+    def test_direct_and_broadcast_reach_other_workers(self):
+        """Sends cross workers over the backplane; broadcasts are delivered once each"""
+        async def scenario():
+            backplane = InProcessBackplane()
+            worker_a = ConnectionManager(heartbeat_interval=0, backplane=backplane)
+            worker_b = ConnectionManager(heartbeat_interval=0, backplane=backplane)
+            await worker_a.start()
+            await worker_b.start()
+
+            socket_a, socket_b = RecordingSocket(), RecordingSocket()
+            await worker_a.connect(socket_a, "on-a")
+            await worker_b.connect(socket_b, "on-b")
+
+            assert await worker_a.send_message({"message": "E komo mai!"}, "on-b", frame_type="notice")
+            assert await worker_b.broadcast({"message": "Reno is online now"}) == 1
+            await asyncio.sleep(0.01)
+
+            assert [(f["type"], f["message"]) for f in socket_b.sent] == [
+                ("notice", "E komo mai!"), ("broadcast", "Reno is online now")
+            ]
+            assert [(f["type"], f["seq"]) for f in socket_a.sent] == [("broadcast", 1)]
+            assert worker_b.stats["backplane_received"] == 1
+
+        asyncio.run(scenario())
+
+    def test_detached_session_is_also_published(self):
+        """A push for a client that left this worker reaches it on the worker it reconnected to"""
+        async def scenario():
+            backplane = InProcessBackplane()
+            worker_a = ConnectionManager(heartbeat_interval=0, backplane=backplane)
+            worker_b = ConnectionManager(heartbeat_interval=0, backplane=backplane)
+            await worker_a.start()
+            await worker_b.start()
+
+            old = await worker_a.connect(RecordingSocket(), "roamer")
+            await worker_a.disconnect(old)
+            socket_b = RecordingSocket()
+            await worker_b.connect(socket_b, "roamer")
+
+            assert await worker_a.send_message({"message": "Your quote is ready"}, "roamer", frame_type="notice")
+            await asyncio.sleep(0.01)
+
+            assert [(f["type"], f["message"]) for f in socket_b.sent] == [("notice", "Your quote is ready")]
+            assert worker_a.streams["roamer"].connection is None
+
+        asyncio.run(scenario())
+
+    def test_without_backplane_unknown_client_is_not_delivered(self):
+        """Local-only managers report clients they don't hold"""
+        async def scenario():
+            manager = ConnectionManager(heartbeat_interval=0)
+            await manager.start()
+            assert await manager.send_message({"message": "hi"}, "elsewhere") is False
+
+        asyncio.run(scenario())
+
+    def test_backplane_failure_falls_back_to_local(self):
+        """A backplane that can't start doesn't break local delivery"""
+        class BrokenBackplane(InProcessBackplane):
+            async def start(self):
+                raise ConnectionError("redis down")
+
+        async def scenario():
+            manager = ConnectionManager(heartbeat_interval=0, backplane=BrokenBackplane())
+            await manager.start()
+            socket = RecordingSocket()
+            await manager.connect(socket, "local")
+
+            assert await manager.broadcast({"message": "Aloha"}) == 1
+            await asyncio.sleep(0.01)
+            assert socket.sent[0]["message"] == "Aloha"
+            assert manager.get_status()["backplane"] is None
+
+        asyncio.run(scenario())
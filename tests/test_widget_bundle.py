@@ -0,0 +1,89 @@
+"""
+Tests for content-hashed widget delivery
+"""
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from api_backend.services import widget_bundle
+from api_backend.services.static_assets import static_assets
+from api_backend.services.widget_bundle import minify_js
+
+WIDGET_SOURCE = b"""(function() {
+    'use strict';
+
+    // Configuration
+    const API_URL = (window.LENILANI_CHATBOT_URL || 'http://localhost:8000');
+    const styles = `
+        // not a comment inside CSS text
+        .lenilani-chat-widget {
+            bottom: 20px;
+        }
+    `;
+    console.log(`${API_URL}/chat`);
+})();
+"""
+
+
+@pytest.fixture
+def client(tmp_path):
+    widget = tmp_path / "hawaiian-widget.js"
+    widget.write_bytes(WIDGET_SOURCE)
+    static_assets.register(
+        widget_bundle.BUNDLE_ASSET, str(widget), "application/javascript",
+        widget_bundle.BUNDLE_CACHE_CONTROL, minify_js
+    )
+
+    app = FastAPI()
+
+    @app.get("/widget.js")
+    async def loader(request: Request):
+        return widget_bundle.loader_response(request)
+
+    @app.get("/widget.{version}.js")
+    async def bundle(request: Request, version: str):
+        return widget_bundle.bundle_response(request, version)
+
+    yield TestClient(app)
+
+    static_assets.assets.pop(widget_bundle.BUNDLE_ASSET, None)
+    static_assets.assets.pop(widget_bundle.LOADER_ASSET, None)
+
+
+class TestWidgetBundle:
+    """Minification, hashed URLs and the loader"""
+
+    def test_minify_keeps_template_literals(self):
+        """Comments and indentation go, template literal text stays verbatim"""
+        minified = minify_js(WIDGET_SOURCE).decode()
+
+        assert "// Configuration" not in minified
+        assert "\n    'use strict';" not in minified
+        assert "        // not a comment inside CSS text\n" in minified
+        assert "            bottom: 20px;\n" in minified
+        assert "console.log(`${API_URL}/chat`);" in minified
+
+    def test_loader_points_at_current_bundle(self, client):
+        """The loader references the hashed URL and is only briefly cacheable"""
+        version = widget_bundle.current_version()
+        response = client.get("/widget.js")
+
+        assert f"/widget.{version}.js" in response.text
+        assert response.headers["cache-control"] == widget_bundle.LOADER_CACHE_CONTROL
+
+    def test_bundle_is_immutable(self, client):
+        """The hashed bundle is served minified with an immutable policy"""
+        version = widget_bundle.current_version()
+        response = client.get(f"/widget.{version}.js")
+
+        assert response.status_code == 200
+        assert "immutable" in response.headers["cache-control"]
+        assert response.content == minify_js(WIDGET_SOURCE)
+
+    def test_stale_version_redirects(self, client):
+        """A loader cached before a deploy is sent on to the current bundle"""
+        response = client.get("/widget.000000000000.js", follow_redirects=False)
+
+        assert response.status_code == 302
+        assert response.headers["location"] == f"/widget.{widget_bundle.current_version()}.js"
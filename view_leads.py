@@ -4,33 +4,37 @@ Hawaiian Chatbot - Lead Viewer
 Shows all captured leads with details
 """
 
-import json
 import os
+import sys
 from datetime import datetime
-from pathlib import Path
-import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 def load_leads():
-    """Load all lead files from logs directory"""
-    leads_dir = Path("logs/leads")
-    leads = []
-    
-    if not leads_dir.exists():
-        print("❌ No leads directory found at logs/leads/")
-        return leads
-    
-    # Get all JSON files
-    lead_files = sorted(leads_dir.glob("lead_*.json"), reverse=True)
-    
-    for lead_file in lead_files:
-        try:
-            with open(lead_file, 'r') as f:
-                lead = json.load(f)
-                leads.append(lead)
-        except Exception as e:
-            print(f"⚠️  Error reading {lead_file}: {e}")
-    
-    return leads
+    """Load all leads from the lead store"""
+    from api_backend.services.lead_store import lead_store
+    
+    try:
+        # Pick up any legacy lead_*.json files that haven't been imported yet
+        lead_store.migrate_json_files("logs/leads")
+        return list(lead_store.iter_leads())
+    except Exception as e:
+        print(f"⚠️  Error reading lead store {lead_store.db_path}: {e}")
+        return []
+
+def search_leads(query):
+    """Full-text search over names, companies, contacts, challenges and summaries"""
+    from api_backend.services.lead_store import lead_store
+    
+    leads, has_more = lead_store.search_leads(query, limit=25)
+    if not leads:
+        print(f"\n❌ No leads match '{query}'")
+        return
+    
+    print(f"\n✅ {len(leads)} matches" + (" (showing the best 25)" if has_more else ""))
+    for i, lead in enumerate(leads):
+        display_lead(lead, i)
+        print(f"\n🔎 Match: {lead.get('search_snippet', '')}")
 
 def display_lead(lead, index):
     """Display a single lead with formatting"""
@@ -158,9 +162,10 @@ def main():
         print("2. View summary only")
         print("3. Export to CSV")
         print("4. View specific lead")
-        print("5. Exit")
+        print("5. Search leads")
+        print("6. Exit")
         
-        choice = input("\nSelect option (1-5): ").strip()
+        choice = input("\nSelect option (1-6): ").strip()
         
         if choice == '1':
             for i, lead in enumerate(leads):
@@ -184,6 +189,11 @@ def main():
                 print("❌ Please enter a valid number")
                 
         elif choice == '5':
+            query = input("Search for (name, company, email, phone, keyword): ").strip()
+            if query:
+                search_leads(query)
+                
+        elif choice == '6':
             print("\n🌺 Aloha! Mahalo for using Lead Viewer!")
             break
             